@@ -18,7 +18,137 @@ BOT_TOKEN = os.getenv('BOT_TOKEN', '7607085569:AAHKE8SNOTYycRRzOCCddmm8QPDTOnEx1
 DATABASE_CONFIG = {
     'name': 'fc26_bot.db',
     'path': './database/',
-    'backup_path': './database/backups/'
+    'backup_path': './database/backups/',
+    # Connection pool - اتصالات دائمة بدلاً من اتصال لكل استعلام
+    'pool_size': 8,
+    'pool_timeout': 10.0,  # seconds to wait for a free connection
+    'busy_timeout_ms': 5000,
+    'statement_cache_size': 128,
+}
+
+# Write-behind queue for registration_log / error_log / statistics
+WRITE_BEHIND_CONFIG = {
+    'flush_interval_ms': 500,  # flush at least this often
+    'max_batch': 200,          # flush early once this many rows are pending
+    'max_retries': 3,          # failed flushes of one batch before isolating bad rows
+    'dead_letter_size': 1000,  # rejected rows kept in memory for inspection
+}
+
+# Session persistence (SQLite, one row per user/chat/conversation)
+PERSISTENCE_CONFIG = {
+    'path': 'data/sessions.db',
+    'legacy_pickle': 'data/sessions.pkl',  # imported once, then unused
+    'update_interval': 60,                 # seconds between persistence cycles
+    'flush_delay_ms': 50,                  # coalesce updates of one cycle into one transaction
+    'meta_path': 'data/sessions.meta.json',  # counts/sizes sidecar rewritten on every flush
+    'meta_history_interval': 600,          # seconds between growth samples kept in the sidecar
+    'meta_history_size': 288,              # samples kept (48h at 10 min)
+}
+
+# Per-user lock tables (utils/locks.py)
+LOCK_CONFIG = {
+    'max_users': 50000,                 # hard cap per table; idle locks are evicted LRU-first
+    'idle_seconds': 30 * 60,            # maintenance drops locks unused for this long
+    'acquire_timeout': 30.0,
+    'maintenance_interval_seconds': 5 * 60,
+}
+
+# ترتيب معالجة التحديثات: تسلسلي لكل مستخدم، متوازٍ بين المستخدمين
+UPDATE_PROCESSOR_CONFIG = {
+    'max_concurrent': 64,               # handlers تعمل فعلياً في نفس الوقت (كل المستخدمين)
+    'max_pending': 10000,               # تحديثات مقبولة داخل المعالج (تعمل أو تنتظر دورها)
+}
+
+# التحكم في القبول: أولوية الأدمن ثم الأزرار ثم النصوص + رفض عند الضغط
+ADMISSION_CONFIG = {
+    'max_waiting_callback': 3000,       # أزرار تنتظر دورها - ما بعدها يُرفض
+    'max_waiting_text': 1000,           # نصوص/أوامر تنتظر دورها - تُرفض قبل الأزرار
+    'shed_reply_cooldown': 60,          # ثوانٍ بين رسالتي رفض لنفس المستخدم
+    'max_shed_replies': 20,             # حد رسائل الرفض المرسلة في نفس الوقت
+}
+
+# استقبال التحديثات: polling (افتراضي) أو webhook (BOT_MODE=webhook)
+WEBHOOK_CONFIG = {
+    'enabled': os.getenv('BOT_MODE', 'polling') == 'webhook',
+    'listen': os.getenv('WEBHOOK_LISTEN', '127.0.0.1'),   # خلف reverse proxy (TLS)
+    'port': int(os.getenv('WEBHOOK_PORT', '8443')),
+    'path': os.getenv('WEBHOOK_PATH', '/telegram'),
+    'url': os.getenv('WEBHOOK_URL', ''),                   # الرابط العام https://.../telegram
+    'secret_token': os.getenv('WEBHOOK_SECRET', ''),       # فارغ = يُولد عشوائياً عند كل تشغيل
+    'max_body_bytes': 256 * 1024,
+    'max_connections': 40,              # اتصالات Telegram المتوازية (1-100)
+    'read_timeout': 10,
+}
+
+# اتصالات HTTP مع Bot API
+HTTP_CONFIG = {
+    'connection_pool_size': 32,         # حد الطلبات/الاتصالات المتوازية (ما زاد ينتظر بالترتيب)
+    'max_keepalive': 32,                # اتصالات مفتوحة محفوظة للإعادة
+    'keepalive_expiry': 60,             # ثوانٍ (httpx الافتراضي 5 - إعادة TLS بعد كل هدوء قصير)
+    'connect_timeout': 5.0,
+    'read_timeout': 10.0,
+    'write_timeout': 10.0,
+    'pool_timeout': 5.0,                # انتظار اتصال فارغ قبل TimedOut (الافتراضي 1)
+    'http2': True,                      # فقط إذا كانت مكتبة h2 مثبتة
+    'get_updates_pool_size': 2,         # pool منفصل لـ getUpdates (long polling)
+    'get_updates_read_timeout': 10.0,
+}
+
+# جدولة الإرسال لـ Telegram (كل طلبات البوت تمر عبرها)
+SEND_SCHEDULER_CONFIG = {
+    'global_rate': 30,                  # رسائل/ثانية لكل البوت
+    'global_burst': 1,                  # burst + rate لا يتجاوز 30 في أي ثانية
+    'bulk_rate': 20,                    # سقف الرسائل الجماعية - الباقي محجوز للردود
+    'chat_rate': 1.0,                   # رسائل/ثانية لكل محادثة خاصة
+    'chat_burst': 3,
+    'group_rate_per_minute': 20,        # المجموعات (chat_id سالب)
+    'max_retries': 2,                   # إعادة المحاولة بعد RetryAfter (429)
+}
+
+# الرسائل الجماعية (إشعار تغيير السعر) - السرعة يحددها bulk_rate أعلاه
+BROADCAST_CONFIG = {
+    'batch_size': 100,                  # مستلمون لكل دفعة - نقطة حفظ بعد كل دفعة
+    'progress_interval': 3,             # ثوانٍ بين تحديثات رسالة التقدم للأدمن
+    'resume_on_start': True,            # إكمال الرسائل غير المنتهية عند الإقلاع
+    'db_retries': 3,                    # محاولات قراءة الصفحة / نقطة الحفظ قبل الإيقاف
+    'db_retry_delay': 1.0,              # ثوانٍ قبل أول إعادة (تتضاعف كل مرة)
+    'price_notice_delay': 60,           # ثوانٍ بعد آخر تعديل سعر قبل إرسال إشعار واحد بكل التغييرات
+}
+
+# دمج تعديلات شاشات الأزرار (edit_message_text) لنفس الرسالة
+EDIT_COALESCER_CONFIG = {
+    'debounce_ms': 300,                 # نافذة الدمج بعد كل تعديل - يُرسل آخر محتوى فقط
+    'noop_window_ms': 500,              # نافذة الضغط المزدوج: تعديل مطابق لآخر مرسل خلالها يُتجاهل
+    'max_messages': 10000,              # رسائل محفوظ آخر محتوى لها (الأقدم يُحذف)
+}
+
+# Session health monitor (reads the sidecar only; deep inspection runs in a worker process)
+SESSION_MONITOR_CONFIG = {
+    'interval_seconds': 6 * 3600,
+    'first_check_seconds': 60,
+    'warning_mb': 50,
+    'critical_mb': 100,
+    'max_users': 10000,
+    'deep_inspect_every': 4,               # every Nth check also streams the whole file (0 = never)
+    'deep_inspect_timeout': 300,
+}
+
+# Idle session eviction (user_data buckets + conversation states)
+SESSION_TTL_CONFIG = {
+    'idle_ttl_seconds': 6 * 3600,      # drop sessions untouched for 6 hours
+    'sweep_interval_seconds': 30 * 60,  # run the sweep every 30 minutes
+}
+
+# In-memory price book (database/price_book.py)
+PRICE_BOOK_CONFIG = {
+    'verify_interval_seconds': 15 * 60,  # compare the book with coin_prices and reload on drift
+}
+
+# User profile cache in front of UserOperations.get_user_data
+CACHE_CONFIG = {
+    'user_cache_size': 10000,     # max cached profiles (LRU eviction)
+    'user_cache_ttl': 300,        # seconds a cached profile stays valid
+    'user_cache_negative_ttl': 60,  # seconds an "unknown user" result stays cached
 }
 
 # ┌──────────────────────────────────────────────────────────────────────┐
@@ -68,7 +198,8 @@ SECURITY_CONFIG = {
     'blocked_chars': ['<', '>', '"', "'", '&', 'script', 'javascript'],
     'rate_limit': {
         'messages_per_minute': 10,
-        'registration_attempts': 3
+        'registration_attempts': 3,
+        'exempt_user_ids': [],  # لا يُحد أبداً (الأدمن يُضاف تلقائياً)
     }
 }
 
@@ -108,8 +239,13 @@ STATS_CONFIG = {
 BACKUP_CONFIG = {
     'enabled': True,
     'interval_hours': 6,
-    'max_backups': 10,
-    'compress': True
+    'max_backups': 10,                 # snapshots kept (older manifests + orphan chunks are removed)
+    'compress': True,                  # zlib-compress stored chunks
+    'path': 'data/backups',
+    'chunk_size_kb': 64,               # dedup unit (multiple of the sqlite page size)
+    'first_run_seconds': 3600,         # first backup after start
+    'pages_per_step': 256,             # sqlite online backup step (writers proceed between steps)
+    'restore_path': 'data/restore',    # staged restores + rollback copy of the replaced files
 }
 
 # ────────────────────────────────────────────────────────────────────────
@@ -0,0 +1,295 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🚦 ADMISSION CONTROL                                        ║
+# ║          ميزانية التنفيذ + أولويات + رفض التحديثات عند الضغط            ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+التحكم في قبول التحديثات (يستخدمه core/update_processor.py)
+
+- ميزانية ثابتة للتحديثات العاملة معاً (max_in_flight)
+- ثلاث مسارات أولوية للمكان التالي الفارغ:
+    ADMIN    ← الأدمن (AdminHandler.ADMIN_ID) - لا يُرفض أبداً
+    CALLBACK ← ضغطات الأزرار - المستخدم في منتصف عملية
+    TEXT     ← نصوص وأوامر
+- رفض (load shedding) عند امتلاء طابور المسار: التحديث لا يصل لأي handler،
+  والمستخدم يستلم رد جاهز رخيص (ErrorMessages.get_maintenance_error)
+  مرة واحدة كل shed_reply_cooldown ثانية
+- مقاييس: عمق الطابور لكل مسار، عدد المرفوض، زمن الانتظار حتى التنفيذ
+
+مثال: بعد انقطاع، الـ polling يجلب آلاف الرسائل دفعة واحدة - الأزرار
+والأدمن يُخدمون أولاً، والنصوص الزائدة تُرفض بدل أن تنتظر دقائق.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Deque, Dict, Iterable, Optional, Set
+
+from config import ADMISSION_CONFIG, UPDATE_PROCESSOR_CONFIG
+from messages.error_messages import ErrorMessages
+from utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# حد جدول آخر رد رفض لكل مستخدم (يُنظف عند تجاوزه)
+_REPLIED_MAX = 10000
+
+
+class Lane(IntEnum):
+    """مسارات الأولوية - الأصغر يُخدم أولاً"""
+
+    ADMIN = 0
+    CALLBACK = 1
+    TEXT = 2
+
+
+class AdmissionController:
+    """ميزانية التنفيذ + طوابير أولوية + رفض عند الضغط"""
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_waiting: Optional[Dict[Lane, Optional[int]]] = None,
+        admin_ids: Iterable[int] = (),
+        shed_reply_cooldown: float = 60,
+        max_shed_replies: int = 20,
+    ):
+        self.max_in_flight = max_in_flight
+        # None = بدون حد (لا يُرفض)
+        self.max_waiting = max_waiting or {Lane.ADMIN: None, Lane.CALLBACK: 3000, Lane.TEXT: 1000}
+        self.admin_ids = frozenset(admin_ids)
+        self.shed_reply_cooldown = shed_reply_cooldown
+        self.max_shed_replies = max_shed_replies
+
+        self.in_flight = 0
+        # منتظرو مكان تنفيذ (رأس طابور مستخدمهم)
+        self._waiters: Dict[Lane, Deque[asyncio.Future]] = {lane: deque() for lane in Lane}
+        # مقبولة ولم تبدأ بعد (تشمل انتظار دور المستخدم)
+        self.pending = {lane: 0 for lane in Lane}
+        self.admitted = {lane: 0 for lane in Lane}
+        self.shed = {lane: 0 for lane in Lane}
+        self.latency = {lane: Histogram() for lane in Lane}
+        self.latency_all = Histogram()
+
+        self._replied: Dict[int, float] = {}
+        self._reply_tasks: Set[asyncio.Task] = set()
+        self.shed_replies = 0
+        self.shed_silent = 0
+        self._last_shed_log = 0.0
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # القبول
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def classify(self, update: object) -> Lane:
+        user = getattr(update, "effective_user", None)
+        if user is not None and user.id in self.admin_ids:
+            return Lane.ADMIN
+        if getattr(update, "callback_query", None) is not None:
+            return Lane.CALLBACK
+        return Lane.TEXT
+
+    def admit(self, update: object) -> Optional[Lane]:
+        """مسار التحديث، أو None إذا رُفض (تم إرسال الرد الجاهز)"""
+        lane = self.classify(update)
+        limit = self.max_waiting.get(lane)
+        if limit is not None and self.pending[lane] >= limit:
+            self.shed[lane] += 1
+            self._log_shedding(lane)
+            self._reply_shed(update)
+            return None
+        self.pending[lane] += 1
+        self.admitted[lane] += 1
+        return lane
+
+    def abandon(self, lane: Lane):
+        """تحديث مقبول أُلغي قبل أن يبدأ (إيقاف البوت)"""
+        self.pending[lane] -= 1
+
+    async def acquire(self, lane: Lane, admitted_at: float):
+        """انتظار مكان تنفيذ - الأدمن ثم الأزرار ثم النصوص"""
+        if self.in_flight < self.max_in_flight:
+            # release() يسلم المكان مباشرة لمنتظر إن وُجد، فالمكان الفارغ = لا منتظرين
+            self.in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters[lane].append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # المكان سُلم لنا لحظة الإلغاء - يُمرر للتالي
+                    self.release()
+                else:
+                    try:
+                        self._waiters[lane].remove(waiter)
+                    except ValueError:
+                        pass
+                raise
+
+        self.pending[lane] -= 1
+        waited_ms = (time.perf_counter() - admitted_at) * 1000
+        self.latency[lane].observe(waited_ms)
+        self.latency_all.observe(waited_ms)
+
+    def release(self):
+        """إنهاء تحديث - المكان يُسلم لأعلى مسار ينتظر"""
+        for lane in Lane:
+            waiters = self._waiters[lane]
+            while waiters:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.in_flight -= 1
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الرد على المرفوض
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _log_shedding(self, lane: Lane):
+        now = time.monotonic()
+        if now - self._last_shed_log >= 10:
+            self._last_shed_log = now
+            print(
+                f"⚠️ [ADMISSION] Shedding {lane.name} updates - "
+                f"waiting {dict((l.name, n) for l, n in self.pending.items())}, "
+                f"running {self.in_flight}/{self.max_in_flight}"
+            )
+
+    def _reply_shed(self, update: object):
+        chat = getattr(update, "effective_chat", None)
+        user = getattr(update, "effective_user", None)
+        if chat is None or not hasattr(update, "get_bot"):
+            self.shed_silent += 1
+            return
+
+        key = user.id if user is not None else chat.id
+        now = time.monotonic()
+        last = self._replied.get(key)
+        if (last is not None and now - last < self.shed_reply_cooldown) or len(
+            self._reply_tasks
+        ) >= self.max_shed_replies:
+            self.shed_silent += 1
+            return
+
+        if len(self._replied) >= _REPLIED_MAX:
+            cutoff = now - self.shed_reply_cooldown
+            self._replied = {k: t for k, t in self._replied.items() if t >= cutoff}
+        self._replied[key] = now
+
+        self.shed_replies += 1
+        task = asyncio.create_task(self._send_shed_reply(update, chat.id))
+        self._reply_tasks.add(task)
+        task.add_done_callback(self._reply_tasks.discard)
+
+    @staticmethod
+    async def _send_shed_reply(update, chat_id: int):
+        try:
+            bot = update.get_bot()
+            if update.callback_query is not None:
+                await update.callback_query.answer()
+            await bot.send_message(chat_id, ErrorMessages.get_maintenance_error(), parse_mode="HTML")
+        except Exception as e:
+            logger.warning(f"Shed reply to {chat_id} failed: {e}")
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # المقاييس
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def get_stats(self) -> Dict:
+        """عمق الطوابير + المرفوض + زمن الانتظار لكل مسار"""
+        lanes = {}
+        for lane in Lane:
+            snapshot = self.latency[lane].snapshot()
+            lanes[lane.name] = {
+                "waiting": self.pending[lane],
+                "waiting_for_slot": len(self._waiters[lane]),
+                "limit": self.max_waiting.get(lane),
+                "admitted": self.admitted[lane],
+                "shed": self.shed[lane],
+                "p50_ms": snapshot["p50"],
+                "p95_ms": snapshot["p95"],
+                "p99_ms": snapshot["p99"],
+            }
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": sum(self.pending.values()),
+            "shed_total": sum(self.shed.values()),
+            "shed_replies": self.shed_replies,
+            "shed_silent": self.shed_silent,
+            "latency_ms": self.latency_all.snapshot(),
+            "lanes": lanes,
+        }
+
+
+def create_admission_controller() -> AdmissionController:
+    """إنشاء المتحكم من ADMISSION_CONFIG / UPDATE_PROCESSOR_CONFIG"""
+    # استيراد متأخر: خدمة الأدمن تستورد core.bootstrap
+    from services.admin.admin_handler import AdminHandler
+
+    return AdmissionController(
+        max_in_flight=UPDATE_PROCESSOR_CONFIG["max_concurrent"],
+        max_waiting={
+            Lane.ADMIN: None,
+            Lane.CALLBACK: ADMISSION_CONFIG["max_waiting_callback"],
+            Lane.TEXT: ADMISSION_CONFIG["max_waiting_text"],
+        },
+        admin_ids=(AdminHandler.ADMIN_ID,),
+        shed_reply_cooldown=ADMISSION_CONFIG["shed_reply_cooldown"],
+        max_shed_replies=ADMISSION_CONFIG["max_shed_replies"],
+    )
+
+
+if __name__ == "__main__":
+    from types import SimpleNamespace
+
+    from core.update_processor import PerUserUpdateProcessor
+
+    ADMIN_ID = 1
+    HANDLER_MS = 10
+
+    print("🧪 Admission: catch-up burst of 4000 text + 1500 callbacks + 3 admin updates\n")
+
+    async def burst():
+        admission = AdmissionController(
+            max_in_flight=32,
+            max_waiting={Lane.ADMIN: None, Lane.CALLBACK: 1000, Lane.TEXT: 500},
+            admin_ids=(ADMIN_ID,),
+        )
+        processor = PerUserUpdateProcessor(admission)
+        await processor.initialize()
+
+        async def handler():
+            await asyncio.sleep(HANDLER_MS / 1000)
+
+        def make(user_id: int, callback: bool):
+            return SimpleNamespace(
+                effective_user=SimpleNamespace(id=user_id),
+                effective_chat=None,
+                callback_query=object() if callback else None,
+            )
+
+        updates = [make(1000 + i, False) for i in range(4000)]
+        updates += [make(10000 + i, True) for i in range(1500)]
+        # الأدمن يصل في آخر الدفعة
+        updates += [make(ADMIN_ID, False) for _ in range(3)]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(processor.process_update(u, handler()) for u in updates))
+        elapsed = time.perf_counter() - start
+        await processor.shutdown()
+
+        stats = admission.get_stats()
+        print(f"⏱️ Drained in {elapsed:.2f}s - shed {stats['shed_total']} ({stats['shed_silent']} silent)")
+        for name, lane in stats["lanes"].items():
+            print(
+                f"   {name:9} admitted {lane['admitted']:5}  shed {lane['shed']:5}  "
+                f"wait p50/p95/p99 {lane['p50_ms']}/{lane['p95_ms']}/{lane['p99_ms']} ms"
+            )
+        print(f"   Leftover: in_flight {stats['in_flight']}, queue depth {stats['queue_depth']}")
+
+    asyncio.run(burst())
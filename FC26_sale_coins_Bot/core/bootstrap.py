@@ -0,0 +1,120 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🚀 BOOTSTRAP - مرحلة الإقلاع                                ║
+# ║              تهيئة قواعد البيانات مرة واحدة + تقرير زمن الإقلاع          ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+مرحلة الإقلاع الصريحة
+- لا يوجد أي I/O على قاعدة البيانات وقت الاستيراد
+- bootstrap() تطبق الاستعادة المجهزة (إن وجدت) قبل فتح أي قاعدة بيانات،
+  ثم تنشئ المجلدات والجداول وتطبق الترحيلات وتحمّل دفتر الأسعار
+- آمنة للاستدعاء أكثر من مرة (تُنفذ مرة واحدة فقط)
+- startup_timer يقيس زمن كل مرحلة من مراحل الإقلاع
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+
+class StartupTimer:
+    """قياس زمن مراحل الإقلاع"""
+
+    def __init__(self):
+        self._phases: List[Tuple[str, float]] = []
+        self._started_at = time.perf_counter()
+
+    def mark_start(self, started_at: float):
+        """تحديد بداية الإقلاع (قبل الاستيرادات في main.py)"""
+        self._started_at = started_at
+
+    def add(self, name: str, seconds: float):
+        """إضافة زمن لمرحلة (يُجمع إذا تكررت المرحلة)"""
+        for i, (phase, total) in enumerate(self._phases):
+            if phase == name:
+                self._phases[i] = (phase, total + seconds)
+                return
+        self._phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str):
+        """قياس مرحلة: with startup_timer.phase('db init'): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def get_report(self) -> Dict:
+        total = time.perf_counter() - self._started_at
+        return {
+            'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self._phases},
+            'total_ms': round(total * 1000, 1),
+        }
+
+    def print_report(self):
+        """طباعة تقرير زمن الإقلاع"""
+        report = self.get_report()
+        print("\n⏱️ [STARTUP] Cold start timing:")
+        for name, ms in report['phases_ms'].items():
+            print(f"   • {name:<24} {ms:>9.1f} ms")
+        print(f"   {'─' * 36}")
+        print(f"   • {'total (wall clock)':<24} {report['total_ms']:>9.1f} ms")
+
+
+startup_timer = StartupTimer()
+
+_bootstrap_lock = threading.Lock()
+_bootstrapped = False
+
+
+def bootstrap() -> bool:
+    """
+    تهيئة قواعد البيانات - مرة واحدة فقط
+
+    Returns:
+        bool: True إذا نجحت التهيئة (أو تمت من قبل)
+    """
+    global _bootstrapped
+
+    with _bootstrap_lock:
+        if _bootstrapped:
+            return True
+
+        from database.admin_operations import AdminOperations
+        from database.connection import db
+        from database.models import DatabaseModels
+
+        from utils.restore import PENDING_FILE, apply_pending_restore
+
+        # استعادة مجهزة من /restore أو من سطر الأوامر - قبل أي اتصال بالملفات
+        if PENDING_FILE.exists():
+            with startup_timer.phase("restore apply"):
+                try:
+                    apply_pending_restore()
+                except Exception as e:
+                    # الملفات الحالية لم تتغير (أو أُرجعت) - الإقلاع يستمر عليها
+                    print(f"   ❌ [BOOTSTRAP] Staged restore not applied: {e}")
+
+        print("\n💾 [BOOTSTRAP] Initializing databases...")
+
+        with startup_timer.phase("db init"):
+            db.ensure_directories()
+            if not DatabaseModels.create_all_tables():
+                print("   ❌ Database initialization failed!")
+                return False
+            print("   ✅ Main database ready")
+
+            AdminOperations.init_admin_db()
+            print("   ✅ Admin database ready")
+
+        with startup_timer.phase("price book load"):
+            AdminOperations.load_price_book()
+
+        _bootstrapped = True
+        return True
+
+
+def is_bootstrapped() -> bool:
+    return _bootstrapped
@@ -5,15 +5,36 @@
 
 """
 مصنع تطبيق البوت
-- تفعيل PicklePersistence
+- تفعيل SQLitePersistence (صف لكل مستخدم - حفظ المتغير فقط)
 - إدارة الجلسات الدائمة
+- تفريغ طابور الكتابة المؤجلة عند الإيقاف
+- قياس زمن تحميل الجلسات ضمن تقرير الإقلاع
+- معالجة متوازية بين المستخدمين ومرتبة لكل مستخدم (core/update_processor.py)
+- كل الإرسال عبر جدولة تحترم حدود Telegram (core/send_scheduler.py)
+- pool اتصالات HTTP مضبوط + pool منفصل لـ getUpdates (core/http_client.py)
+- استكمال الرسائل الجماعية غير المنتهية عند الإقلاع وحفظها عند الإيقاف
+- دمج تعديلات شاشات الأزرار (utils/edit_coalescer.py)
 """
 
+import asyncio
 from pathlib import Path
 
-from telegram.ext import Application, PicklePersistence
+from telegram.ext import Application
 
-from config import BOT_TOKEN
+from config import BOT_TOKEN, BROADCAST_CONFIG, PERSISTENCE_CONFIG, SESSION_TTL_CONFIG
+from core.bootstrap import startup_timer
+from core.callback_router import callback_router
+from core.http_client import create_request, get_http_stats
+from core.sqlite_persistence import SQLitePersistence
+from core.send_scheduler import create_send_scheduler
+from core.update_processor import create_update_processor
+from services.broadcast import broadcast_engine, price_notices
+from utils.edit_coalescer import edit_coalescer
+from utils.session_monitor import shutdown_monitor
+from database.async_gateway import get_gateway_stats
+from database.connection import db
+from database.user_cache import user_cache
+from database.write_behind import write_behind
 
 
 class FC26BotApp:
@@ -36,24 +57,44 @@ class FC26BotApp:
         print(f"   📁 Data directory ready: {data_dir}")
 
         # ═══════════════════════════════════════════════════════════════════
-        # 2️⃣ إنشاء كائن PicklePersistence
+        # 2️⃣ إنشاء كائن SQLitePersistence
         # ═══════════════════════════════════════════════════════════════════
-        session_file = data_dir / "sessions.pkl"
+        session_file = PERSISTENCE_CONFIG["path"]
+        update_interval = PERSISTENCE_CONFIG["update_interval"]
 
-        persistence = PicklePersistence(
-            filepath=str(session_file),
-            update_interval=60,  # حفظ كل 60 ثانية
+        persistence = SQLitePersistence(
+            filepath=session_file,
+            legacy_pickle=PERSISTENCE_CONFIG.get("legacy_pickle"),
+            meta_path=PERSISTENCE_CONFIG.get("meta_path"),
+            history_interval=PERSISTENCE_CONFIG.get("meta_history_interval", 600),
+            history_size=PERSISTENCE_CONFIG.get("meta_history_size", 288),
+            update_interval=update_interval,
+            flush_delay=PERSISTENCE_CONFIG.get("flush_delay_ms", 50) / 1000,
+            conversation_ttl=SESSION_TTL_CONFIG["idle_ttl_seconds"],
         )
         print(f"   💾 Persistence configured: {session_file}")
-        print(f"   ⏱️ Update interval: 60 seconds")
+        print(f"   ⏱️ Update interval: {update_interval} seconds")
 
         # ═══════════════════════════════════════════════════════════════════
-        # 3️⃣ بناء التطبيق مع Persistence
+        # 3️⃣ معالج التحديثات: متوازٍ بين المستخدمين، مرتب لكل مستخدم
+        # ═══════════════════════════════════════════════════════════════════
+        update_processor = create_update_processor()
+        print(f"   🔀 Update processor: per-user ordered, max {update_processor.max_running} concurrent")
+
+        # ═══════════════════════════════════════════════════════════════════
+        # 4️⃣ بناء التطبيق مع Persistence
         # ═══════════════════════════════════════════════════════════════════
         app = (
             Application.builder()
             .token(BOT_TOKEN)
             .persistence(persistence)  # 🔥 تفعيل Persistence
+            .concurrent_updates(update_processor)
+            .rate_limiter(create_send_scheduler())  # 📤 حد عام + حد لكل محادثة + 429
+            .request(create_request())
+            .get_updates_request(create_request(get_updates=True))
+            .post_init(self._post_init)
+            .post_stop(self._post_stop)
+            .post_shutdown(self._post_shutdown)
             .build()
         )
 
@@ -62,3 +103,102 @@ class FC26BotApp:
         print()
 
         return app
+
+    @staticmethod
+    async def _post_init(app: Application):
+        """بعد تحميل الجلسات: طباعة تقرير زمن الإقلاع"""
+        if app.persistence is not None:
+            load_ms = app.persistence.get_stats()["load_ms"]
+            startup_timer.add("persistence load", load_ms / 1000)
+        startup_timer.print_report()
+
+        if BROADCAST_CONFIG.get("resume_on_start", True):
+            await broadcast_engine.resume_pending(app.bot)
+
+    @staticmethod
+    async def _post_stop(app: Application):
+        """إيقاف الرسائل الجماعية ونوافذ دمج التعديلات قبل إغلاق اتصال البوت"""
+        await price_notices.shutdown()
+        await broadcast_engine.shutdown()
+        await edit_coalescer.shutdown()
+
+    @staticmethod
+    async def _post_shutdown(app: Application):
+        """تفريغ سجلات الكتابة المؤجلة قبل إغلاق البوت"""
+        print("\n🛑 [BOT-APP] Flushing write-behind queue...")
+        await asyncio.to_thread(write_behind.shutdown)
+        stats = write_behind.get_stats()
+        print(f"   ✅ Flushed: {stats['rows_written']} rows in {stats['flushes']} commits")
+
+        pool_stats = db.pool.get_stats()
+        print(
+            f"   🗄️ DB pool: {pool_stats['checkouts']} checkouts, "
+            f"{pool_stats['opened_total']} connections opened (max {pool_stats['max_size']}), "
+            f"{pool_stats['waits']} waits (max {pool_stats['wait_time_max_ms']} ms)"
+        )
+
+        for gateway_stats in get_gateway_stats().values():
+            print(
+                f"   ⚡ DB gateway {gateway_stats['name']}: {gateway_stats['submitted']} calls, "
+                f"{gateway_stats['failed']} failed, max queue {gateway_stats['max_queue_depth']}, "
+                f"latency avg {gateway_stats['latency_avg_ms']} ms / max {gateway_stats['latency_max_ms']} ms"
+            )
+
+        cache_stats = user_cache.get_stats()
+        print(
+            f"   👤 User cache: hit ratio {cache_stats['hit_ratio']:.0%} "
+            f"({cache_stats['hits'] + cache_stats['negative_hits']} hits, {cache_stats['misses']} misses), "
+            f"{cache_stats['size']}/{cache_stats['max_size']} entries, {cache_stats['evictions']} evictions"
+        )
+
+        shutdown_monitor()
+
+        processor_stats = app.update_processor.get_stats()
+        print(
+            f"   🔀 Updates: {processor_stats['processed']} processed, "
+            f"max queue {processor_stats['max_queued']} "
+            f"(max {processor_stats['max_user_depth']} per user), "
+            f"wait p95 {processor_stats['admission']['latency_ms']['p95']} ms, "
+            f"shed {processor_stats['admission']['shed_total']}"
+        )
+
+        send_stats = app.bot.rate_limiter.get_stats()
+        print(
+            f"   📤 Sends: {send_stats['sent']} sent, {send_stats['retries']} retried after 429, "
+            f"{send_stats['failed']} failed, "
+            f"interactive p95 {send_stats['latency_ms']['INTERACTIVE']['p95']} ms"
+        )
+
+        edit_stats = edit_coalescer.get_stats()
+        print(
+            f"   ✏️ Edits: {edit_stats['sent']} sent of {edit_stats['requested']} requested, "
+            f"{edit_stats['saved_api_calls']} API calls saved "
+            f"({edit_stats['skipped_noop']} identical, {edit_stats['coalesced']} coalesced)"
+        )
+
+        for label, http_stats in get_http_stats().items():
+            print(
+                f"   🔌 HTTP {label}: reuse {http_stats['reuse_ratio']:.0%} "
+                f"({http_stats['new_connections']} new connections), "
+                f"pool wait p95 {http_stats['pool_wait_ms']['p95']} ms"
+            )
+
+        route_stats = callback_router.get_stats()
+        if route_stats:
+            slowest = max(route_stats, key=lambda route: route_stats[route]["p95_ms"])
+            print(
+                f"   🧭 Routes: {sum(r['count'] for r in route_stats.values())} callbacks "
+                f"over {len(route_stats)} routes, "
+                f"{sum(r['errors'] for r in route_stats.values())} errors, "
+                f"{callback_router.legacy_hits()} old-format buttons, "
+                f"slowest {slowest} p95 {route_stats[slowest]['p95_ms']} ms"
+            )
+
+        if app.persistence is not None:
+            stats = app.persistence.get_stats()
+            print(
+                f"   💾 Sessions: {stats['rows_written']} rows / "
+                f"{stats['bytes_written'] / 1024:.1f} KB written in {stats['flushes']} flushes "
+                f"(avg {stats['flush_avg_ms']} ms), "
+                f"{stats['conversations_expired']} stale conversations expired"
+            )
@@ -0,0 +1,376 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🧭 CALLBACK ROUTER                                          ║
+# ║          توجيه ضغطات الأزرار بجدول dict بدل سلسلة regex                 ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+توجيه callback_query عبر جدول (dict) بدل CallbackQueryHandler(pattern=...)
+
+- صيغة موحدة لـ callback_data:  service:action[:arg1:arg2...]
+    callback_data("admin", "edit", "pc", "normal")  →  "admin:edit:pc:normal"
+- RouteHandler = handler واحد لكل مجموعة مسارات (خدمة / حالة محادثة):
+  البحث بمفتاح "service:action" ثم "service:*" - O(1) مهما زاد عدد المسارات،
+  بدل تجربة regex تلو الآخر. يعمل داخل ConversationHandler كأي handler
+- args الزر تصل للـ handler في context.args (مثل CommandHandler)
+- legacy: أزرار أُرسلت بالصيغة القديمة (platform_pc, admin_prices...) قبل
+  التحديث تُترجم للصيغة الجديدة - المحادثات محفوظة عبر إعادة التشغيل، فمن كان
+  في منتصف خطوة وقت النشر لا يبقى أمام أزرار ميتة (legacy_hits = متى يمكن حذفها)
+- فحص التعارض عند الإقلاع (check_collisions): نفس المفتاح في handlerين
+  يراهما PTB في نفس النطاق، wildcard يحجب مساراً بعده، أو regex قديم يلتقط
+  مفاتيح مسار - البوت لا يبدأ (RouteCollisionError)
+- زمن كل مسار (utils.metrics.Histogram) + عدد الأخطاء
+
+الاستخدام:
+    from core.callback_router import callback_data, callback_router
+
+    InlineKeyboardButton("PC", callback_data=callback_data("sell", "platform", "pc"))
+
+    callback_router.handler("sell", {
+        "sell:platform": choose_platform,
+        "sell:cancel": cancel,
+    })
+"""
+
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import BaseHandler, CallbackQueryHandler, ConversationHandler
+
+from utils.metrics import Histogram
+
+SEPARATOR = ":"
+WILDCARD = "*"
+# حد Telegram لطول callback_data
+MAX_CALLBACK_BYTES = 64
+
+_KEY_RE = re.compile(r"^[a-z][a-z0-9_]*:(\*|[a-z][a-z0-9_]*)$")
+
+# regex الصيغة القديمة (مطابقة كاملة) → قالب بالصيغة الجديدة (\1 للمجموعات)
+_LEGACY_ALIASES: Dict[str, Tuple["re.Pattern", str]] = {}
+
+
+class RouteCollisionError(ValueError):
+    """مسارات متعارضة - ضغطة واحدة يلتقطها أكثر من handler"""
+
+
+def callback_data(service: str, action: str, *args: Any) -> str:
+    """بناء callback_data بالصيغة الموحدة service:action:args"""
+    data = SEPARATOR.join((service, action) + tuple(str(arg) for arg in args))
+    if len(data.encode("utf-8")) > MAX_CALLBACK_BYTES:
+        raise ValueError(f"callback_data longer than {MAX_CALLBACK_BYTES} bytes: {data}")
+    return data
+
+
+def normalize_callback_data(data: str) -> str:
+    """callback_data بالصيغة القديمة → الصيغة الجديدة (غيرها يرجع كما هو)"""
+    if SEPARATOR in data:
+        return data
+    for pattern, template in _LEGACY_ALIASES.values():
+        match = pattern.fullmatch(data)
+        if match:
+            return match.expand(template)
+    return data
+
+
+def parse_callback_data(data: str) -> Tuple[str, str, List[str]]:
+    """(service, action, args) من callback_data - الصيغة القديمة تُترجم أولاً"""
+    service, _, rest = normalize_callback_data(data).partition(SEPARATOR)
+    action, _, args = rest.partition(SEPARATOR)
+    return service, action, args.split(SEPARATOR) if args else []
+
+
+class Route:
+    """مسار واحد: المفتاح + الـ callback + المقاييس"""
+
+    __slots__ = ("key", "callback", "latency", "errors")
+
+    def __init__(self, key: str, callback: Callable):
+        self.key = key
+        self.callback = callback
+        self.latency = Histogram()
+        self.errors = 0
+
+
+class RouteHandler(BaseHandler[Update, Any, Any]):
+    """handler واحد لمجموعة مسارات - dict lookup بدل regex"""
+
+    __slots__ = ("name", "routes", "legacy_hits")
+
+    def __init__(self, name: str, routes: Dict[str, Callable], block: bool = True):
+        # الـ callback الفعلي يُختار لكل ضغطة في handle_update
+        super().__init__(self._unrouted, block=block)
+        self.name = name
+        self.routes: Dict[str, Route] = {}
+        for key, callback in routes.items():
+            if not _KEY_RE.match(key):
+                raise ValueError(f"Invalid route key '{key}' in {name} (expected service:action)")
+            self.routes[key] = Route(key, callback)
+        self.legacy_hits = 0
+
+    @staticmethod
+    async def _unrouted(update, context):
+        return None
+
+    def check_update(self, update: object) -> Optional[Tuple[Route, str]]:
+        if not isinstance(update, Update) or update.callback_query is None:
+            return None
+        data = update.callback_query.data
+        if not isinstance(data, str):
+            return None
+
+        service, _, rest = data.partition(SEPARATOR)
+        legacy = not rest
+        if legacy:
+            # لا يوجد ':' - ربما زر بالصيغة القديمة
+            service, _, rest = normalize_callback_data(data).partition(SEPARATOR)
+            if not rest:
+                return None
+        action, _, args = rest.partition(SEPARATOR)
+        route = self.routes.get(f"{service}{SEPARATOR}{action}")
+        if route is None:
+            route = self.routes.get(f"{service}{SEPARATOR}{WILDCARD}")
+            if route is None:
+                return None
+        if legacy:
+            self.legacy_hits += 1
+        return route, args
+
+    def collect_additional_context(self, context, update, application, check_result) -> None:
+        args = check_result[1]
+        context.args = args.split(SEPARATOR) if args else []
+
+    async def handle_update(self, update, application, check_result, context):
+        self.collect_additional_context(context, update, application, check_result)
+        route = check_result[0]
+        started = time.perf_counter()
+        try:
+            return await route.callback(update, context)
+        except Exception:
+            route.errors += 1
+            raise
+        finally:
+            route.latency.observe((time.perf_counter() - started) * 1000)
+
+
+class CallbackRouter:
+    """سجل كل الـ RouteHandlers: إنشاء + فحص التعارض + إحصائيات"""
+
+    def __init__(self):
+        self._handlers: List[RouteHandler] = []
+
+    def handler(self, name: str, routes: Dict[str, Callable], block: bool = True,
+                legacy: Optional[Dict[str, str]] = None) -> RouteHandler:
+        """
+        RouteHandler جديد مسجل في الإحصائيات
+
+        legacy: {regex الصيغة القديمة: قالب جديد} لفترة الانتقال، مثل
+            {r"admin_platform_(\w+)": r"admin:platform:\1"}
+        """
+        route_handler = RouteHandler(name, routes, block=block)
+        for pattern, template in (legacy or {}).items():
+            key = SEPARATOR.join(template.split(SEPARATOR)[:2])
+            if key not in route_handler.routes:
+                raise ValueError(f"Legacy alias '{pattern}' in {name} targets unknown route '{key}'")
+            _LEGACY_ALIASES[pattern] = (re.compile(pattern), template)
+        self._handlers.append(route_handler)
+        return route_handler
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # فحص التعارض
+    # ═══════════════════════════════════════════════════════════════════════
+
+    @staticmethod
+    def _scopes(app) -> Iterable[Tuple[str, List[BaseHandler]]]:
+        """
+        قوائم الـ handlers التي يجربها PTB بالترتيب حتى أول تطابق:
+        كل group على المستوى الأعلى (مع entry_points للمحادثات)، وكل حالة
+        محادثة (entry_points عند allow_reentry + الحالة + fallbacks)
+        """
+        for group, handlers in sorted(app.handlers.items()):
+            top: List[BaseHandler] = []
+            for handler in handlers:
+                if isinstance(handler, ConversationHandler):
+                    top.extend(handler.entry_points)
+                    reentry = handler.entry_points if handler.allow_reentry else []
+                    for state, state_handlers in handler.states.items():
+                        yield (
+                            f"{handler.name or 'conversation'}[{state}]",
+                            list(reentry) + list(state_handlers) + list(handler.fallbacks),
+                        )
+                else:
+                    top.append(handler)
+            yield f"group {group}", top
+
+    @staticmethod
+    def _samples(key: str) -> Tuple[str, ...]:
+        service, action = key.split(SEPARATOR)
+        if action == WILDCARD:
+            action = "x"
+        base = f"{service}{SEPARATOR}{action}"
+        return base, f"{base}{SEPARATOR}x"
+
+    def find_collisions(self, app) -> List[str]:
+        """كل التعارضات في التطبيق (قائمة فارغة = لا تعارض)"""
+        collisions = []
+        for scope, handlers in self._scopes(app):
+            # نفس الـ RouteHandler قد يظهر مرتين (entry point + حالة) - ليس تعارضاً
+            claimed: Dict[str, RouteHandler] = {}
+            wildcards: Dict[str, RouteHandler] = {}
+            patterns: List[Tuple[Any, str]] = []
+
+            for handler in handlers:
+                if isinstance(handler, RouteHandler):
+                    for key in handler.routes:
+                        service = key.split(SEPARATOR)[0]
+                        owner = claimed.get(key)
+                        shadow = wildcards.get(service)
+                        if owner is not None and owner is not handler:
+                            collisions.append(f"{scope}: '{key}' routed by {owner.name} and {handler.name}")
+                        elif shadow is not None and shadow is not handler:
+                            collisions.append(
+                                f"{scope}: '{key}' in {handler.name} is shadowed by "
+                                f"'{service}:*' in {shadow.name}"
+                            )
+                        for pattern, pattern_owner in patterns:
+                            if any(pattern.match(sample) for sample in self._samples(key)):
+                                collisions.append(
+                                    f"{scope}: '{key}' in {handler.name} also matches "
+                                    f"pattern '{pattern.pattern}' of {pattern_owner}"
+                                )
+                        claimed.setdefault(key, handler)
+                    for key in handler.routes:
+                        if key.endswith(f"{SEPARATOR}{WILDCARD}"):
+                            wildcards.setdefault(key.split(SEPARATOR)[0], handler)
+
+                elif isinstance(handler, CallbackQueryHandler):
+                    owner = getattr(handler.callback, "__qualname__", repr(handler.callback))
+                    pattern = handler.pattern
+                    if pattern is None:
+                        collisions.append(f"{scope}: CallbackQueryHandler {owner} without pattern catches every button")
+                        continue
+                    if not hasattr(pattern, "match"):
+                        # pattern من نوع type / callable (arbitrary callback data)
+                        continue
+                    for key, route_owner in claimed.items():
+                        if any(pattern.match(sample) for sample in self._samples(key)):
+                            collisions.append(
+                                f"{scope}: pattern '{pattern.pattern}' of {owner} also matches "
+                                f"'{key}' of {route_owner.name}"
+                            )
+                    patterns.append((pattern, owner))
+        return collisions
+
+    def check_collisions(self, app):
+        """فحص الإقلاع - RouteCollisionError عند أي تعارض"""
+        collisions = self.find_collisions(app)
+        if collisions:
+            raise RouteCollisionError("Callback route collisions:\n  " + "\n  ".join(collisions))
+        routes = sum(len(handler.routes) for handler in self._handlers)
+        print(f"   ✅ [ROUTER] {routes} callback routes in {len(self._handlers)} handlers - no collisions")
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الإحصائيات
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """زمن كل مسار استُخدم: handler/route -> count + p50/p95/p99 + errors"""
+        stats = {}
+        for handler in self._handlers:
+            for key, route in handler.routes.items():
+                if not route.latency.count:
+                    continue
+                snapshot = route.latency.snapshot()
+                stats[f"{handler.name}/{key}"] = {
+                    "count": snapshot["count"],
+                    "errors": route.errors,
+                    "p50_ms": snapshot["p50"],
+                    "p95_ms": snapshot["p95"],
+                    "p99_ms": snapshot["p99"],
+                    "max_ms": snapshot["max"],
+                }
+        return stats
+
+    def legacy_hits(self) -> int:
+        """ضغطات أزرار بالصيغة القديمة - صفر لفترة كافية = يمكن حذف الـ aliases"""
+        return sum(handler.legacy_hits for handler in self._handlers)
+
+
+# Global instance
+callback_router = CallbackRouter()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 BENCHMARK (للتطوير فقط) - python -m core.callback_router
+# ═══════════════════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    import random
+
+    from telegram import CallbackQuery, User
+
+    SERVICES = ("reg", "sell", "admin", "profile", "menu", "orders")
+    ACTIONS_PER_SERVICE = 10
+    DISPATCHES = 200_000
+
+    async def noop(update, context):
+        return None
+
+    user = User(1, "bench", False)
+
+    def make_update(data: str) -> Update:
+        query = CallbackQuery("1", user, "chat", data=data)
+        return Update(1, callback_query=query)
+
+    keys = [(service, f"action{i}") for service in SERVICES for i in range(ACTIONS_PER_SERVICE)]
+
+    # السلسلة القديمة: CallbackQueryHandler لكل زر، بالترتيب كما يجربها PTB
+    legacy = [CallbackQueryHandler(noop, pattern=f"^{service}_{action}(_|$)") for service, action in keys]
+    legacy_updates = [make_update(f"{service}_{action}_pc") for service, action in keys]
+
+    router = CallbackRouter()
+    routed = router.handler("bench", {f"{service}:{action}": noop for service, action in keys})
+    routed_updates = [make_update(callback_data(service, action, "pc")) for service, action in keys]
+
+    def dispatch_chain(update):
+        for handler in legacy:
+            check = handler.check_update(update)
+            if check is not None and check is not False:
+                return handler
+        return None
+
+    def bench(label: str, dispatch, updates: List[Update]) -> float:
+        rng = random.Random(1)
+        sample = [rng.choice(updates) for _ in range(DISPATCHES)]
+        assert all(dispatch(update) for update in updates[:5])
+        start = time.perf_counter()
+        for update in sample:
+            dispatch(update)
+        per_call_us = (time.perf_counter() - start) / DISPATCHES * 1_000_000
+
+        last = updates[-1]
+        start = time.perf_counter()
+        for _ in range(DISPATCHES // 10):
+            dispatch(last)
+        worst_us = (time.perf_counter() - start) / (DISPATCHES // 10) * 1_000_000
+        print(f"   {label:<36} avg {per_call_us:6.2f} µs   last route {worst_us:6.2f} µs")
+        return per_call_us
+
+    print(f"🧪 Callback dispatch: {len(keys)} routes, {DISPATCHES:,} random button presses\n")
+    chain_us = bench("regex chain (CallbackQueryHandler)", dispatch_chain, legacy_updates)
+    router_us = bench("dict lookup (RouteHandler)", routed.check_update, routed_updates)
+    print(f"\n✅ Dispatch speedup: {chain_us / router_us:.1f}x")
+
+    # فحص التعارض على تطبيق صغير
+    from telegram.ext import ApplicationBuilder
+
+    demo = ApplicationBuilder().token("1:bench").build()
+    demo_router = CallbackRouter()
+    demo.add_handler(demo_router.handler("registration", {"reg:platform": noop, "reg:payment": noop}))
+    demo.add_handler(demo_router.handler("sell_menu", {"sell:*": noop}))
+    demo.add_handler(demo_router.handler("sell_flow", {"sell:platform": noop, "reg:platform": noop}))
+    demo.add_handler(CallbackQueryHandler(noop, pattern="^reg"))
+    print("\n🧪 Collision check on a misconfigured app:")
+    for line in demo_router.find_collisions(demo):
+        print(f"   ⚠️ {line}")
@@ -0,0 +1,336 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🔌 BOT API HTTP CLIENT                                      ║
+# ║          pool اتصالات مضبوط + قياس زمن كل endpoint وانتظار الـ pool      ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+طلبات HTTP الخاصة بالبوت (HTTPXRequest مضبوط - HTTP_CONFIG)
+
+- حجم الـ pool، عدد اتصالات keep-alive ومدة بقائها (httpx الافتراضي 5 ثوانٍ،
+  أي أن كل هدوء قصير يعني TCP + TLS من جديد)، المهلات
+- HTTP/2 إذا كانت مكتبة h2 مثبتة (اتصال واحد لكل الطلبات)، وإلا 1.1
+- pool منفصل لـ getUpdates حتى لا ينافس long polling طلبات الإرسال
+- بوابة (semaphore) بحجم الـ pool أمام httpcore: الـ pool في httpcore يعيد
+  فحص كل الطلبات المنتظرة مقابل كل الاتصالات مع كل تغيير (O(طلبات × اتصالات))
+  - 500 طلب متزامن = ثوانٍ من CPU. الانتظار عند البوابة O(1) وبالترتيب
+- transport مُراقب (trace events من httpcore):
+    • زمن انتظار الـ pool = من دخول الطلب (قبل البوابة) حتى بدء
+      الاتصال/إرسال الـ headers
+    • اتصال جديد أم معاد استخدامه
+- histogram لزمن كل endpoint (sendMessage, answerCallbackQuery, ...)
+
+مقارنة مع الإعدادات الافتراضية على Bot API وهمي محلي:
+    python -m core.http_client
+"""
+
+import asyncio
+import importlib.util
+import time
+from typing import Dict, Optional
+
+import httpx
+from telegram.request import HTTPXRequest
+
+from config import HTTP_CONFIG
+from utils.metrics import Histogram
+
+HAS_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# مقاييس كل pool حسب الاسم (bot_api / get_updates)
+REQUEST_METRICS: Dict[str, "RequestMetrics"] = {}
+
+_POOL_WAIT_BOUNDS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class RequestMetrics:
+    """مقاييس pool واحد"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.endpoint_latency: Dict[str, Histogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.pool_wait = Histogram(bounds=_POOL_WAIT_BOUNDS_MS)
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def observe(self, endpoint: str, elapsed_ms: float, ok: bool):
+        histogram = self.endpoint_latency.get(endpoint)
+        if histogram is None:
+            histogram = self.endpoint_latency[endpoint] = Histogram()
+        histogram.observe(elapsed_ms)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def get_stats(self) -> Dict:
+        total = self.new_connections + self.reused_connections
+        endpoints = {}
+        for name, histogram in self.endpoint_latency.items():
+            snapshot = histogram.snapshot()
+            endpoints[name] = {
+                "count": snapshot["count"],
+                "errors": self.errors.get(name, 0),
+                "p50_ms": snapshot["p50"],
+                "p95_ms": snapshot["p95"],
+                "p99_ms": snapshot["p99"],
+            }
+        pool_wait = self.pool_wait.snapshot()
+        return {
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "reuse_ratio": round(self.reused_connections / total, 3) if total else 0.0,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "pool_wait_ms": {key: pool_wait[key] for key in ("avg", "p50", "p95", "p99", "max")},
+            "endpoints": endpoints,
+        }
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """غلاف AsyncHTTPTransport: بوابة max_in_flight + قياس انتظار الـ pool وإعادة الاستخدام"""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, metrics: RequestMetrics, max_in_flight: Optional[int]):
+        self.inner = inner
+        self.metrics = metrics
+        self.gate = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        entered = time.perf_counter()
+        state = {"acquired": None, "connected": False}
+        previous = request.extensions.get("trace")
+
+        async def trace(event: str, info: dict):
+            # أول حدث على الاتصال = خرج الطلب من انتظار الـ pool
+            if state["acquired"] is None and (
+                event.endswith("connect_tcp.started") or event.endswith("send_request_headers.started")
+            ):
+                state["acquired"] = time.perf_counter()
+            if event.endswith("connect_tcp.started"):
+                state["connected"] = True
+            if previous is not None:
+                await previous(event, info)
+
+        request.extensions["trace"] = trace
+        gated = False
+        try:
+            if self.gate is not None:
+                # انتظار البوابة جزء من انتظار الـ pool - نفس حد pool_timeout
+                pool_timeout = request.extensions.get("timeout", {}).get("pool")
+                try:
+                    await asyncio.wait_for(self.gate.acquire(), pool_timeout)
+                except asyncio.TimeoutError:
+                    raise httpx.PoolTimeout("Timed out waiting for a free in-flight slot") from None
+                gated = True
+            return await self.inner.handle_async_request(request)
+        finally:
+            if gated:
+                self.gate.release()
+            if state["acquired"] is not None:
+                self.metrics.pool_wait.observe((state["acquired"] - entered) * 1000)
+                if state["connected"]:
+                    self.metrics.new_connections += 1
+                else:
+                    self.metrics.reused_connections += 1
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class TunedRequest(HTTPXRequest):
+    """HTTPXRequest بـ pool مضبوط + transport مُراقب + زمن كل endpoint"""
+
+    __slots__ = ("metrics", "_transport_kwargs", "_max_in_flight")
+
+    def __init__(
+        self,
+        label: str,
+        connection_pool_size: int = 32,
+        max_keepalive: Optional[int] = 32,
+        keepalive_expiry: float = 60,
+        http2: bool = True,
+        gate: bool = True,
+        **timeouts,
+    ):
+        self.metrics = REQUEST_METRICS[label] = RequestMetrics(label)
+        self._max_in_flight = connection_pool_size if gate else None
+        use_http2 = http2 and HAS_HTTP2
+        # httpx يتجاهل limits الخاصة بالـ client عند تمرير transport - تُعطى للـ transport
+        self._transport_kwargs = {
+            "limits": httpx.Limits(
+                max_connections=connection_pool_size,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            "http1": not use_http2,
+            "http2": use_http2,
+        }
+        super().__init__(
+            connection_pool_size=connection_pool_size,
+            http_version="2" if use_http2 else "1.1",
+            **timeouts,
+        )
+
+    def _build_client(self) -> httpx.AsyncClient:
+        # transport جديد في كل بناء (initialize بعد shutdown)
+        transport = InstrumentedTransport(
+            httpx.AsyncHTTPTransport(**self._transport_kwargs), self.metrics, self._max_in_flight
+        )
+        return httpx.AsyncClient(**{**self._client_kwargs, "transport": transport})
+
+    async def do_request(self, url: str, method: str, request_data=None, *args, **kwargs):
+        endpoint = url.rsplit("/", 1)[-1]
+        metrics = self.metrics
+        metrics.in_flight += 1
+        if metrics.in_flight > metrics.max_in_flight:
+            metrics.max_in_flight = metrics.in_flight
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = await super().do_request(url, method, request_data, *args, **kwargs)
+            ok = True
+            return result
+        finally:
+            metrics.in_flight -= 1
+            metrics.observe(endpoint, (time.perf_counter() - started) * 1000, ok)
+
+
+def create_request(get_updates: bool = False) -> TunedRequest:
+    """طلبات البوت من HTTP_CONFIG - get_updates=True للـ pool المنفصل"""
+    config = HTTP_CONFIG
+    timeouts = {
+        "connect_timeout": config["connect_timeout"],
+        "write_timeout": config["write_timeout"],
+        "pool_timeout": config["pool_timeout"],
+    }
+    if get_updates:
+        return TunedRequest(
+            "get_updates",
+            connection_pool_size=config["get_updates_pool_size"],
+            max_keepalive=config["get_updates_pool_size"],
+            keepalive_expiry=config["keepalive_expiry"],
+            http2=False,
+            read_timeout=config["get_updates_read_timeout"],
+            **timeouts,
+        )
+    return TunedRequest(
+        "bot_api",
+        connection_pool_size=config["connection_pool_size"],
+        max_keepalive=config["max_keepalive"],
+        keepalive_expiry=config["keepalive_expiry"],
+        http2=config["http2"],
+        read_timeout=config["read_timeout"],
+        **timeouts,
+    )
+
+
+def get_http_stats() -> Dict[str, Dict]:
+    """مقاييس كل الـ pools"""
+    return {label: metrics.get_stats() for label, metrics in REQUEST_METRICS.items()}
+
+
+if __name__ == "__main__":
+    import asyncio
+    import json
+
+    USERS = 500
+    CALLS_PER_USER = 4
+    API_MS = 50
+    HANDSHAKE_MS = 100
+    IDLE_SECONDS = 6
+
+    class FakeBotAPI:
+        """Bot API وهمي: كل اتصال جديد يدفع زمن TCP + TLS، وكل طلب API_MS"""
+
+        def __init__(self):
+            self.connections = 0
+
+        async def handle(self, reader, writer):
+            self.connections += 1
+            await asyncio.sleep(HANDSHAKE_MS / 1000)
+            try:
+                while True:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                    length = 0
+                    for line in head.split(b"\r\n"):
+                        if line.lower().startswith(b"content-length:"):
+                            length = int(line.split(b":", 1)[1])
+                    if length:
+                        await reader.readexactly(length)
+                    await asyncio.sleep(API_MS / 1000)
+                    body = json.dumps({"ok": True, "result": True}).encode()
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                        b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                    )
+                    await writer.drain()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+    async def wave(request: TunedRequest, base: str) -> Dict:
+        endpoints = ("sendMessage", "answerCallbackQuery", "editMessageText", "getChatMember")
+        latencies = []
+        errors: Dict[str, int] = {}
+
+        async def user():
+            for i in range(CALLS_PER_USER):
+                started = time.perf_counter()
+                try:
+                    await request.do_request(f"{base}/{endpoints[i % len(endpoints)]}", "POST")
+                except Exception as e:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(USERS)))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {
+            "elapsed": elapsed,
+            "p50": latencies[len(latencies) // 2],
+            "p95": latencies[int(len(latencies) * 0.95)],
+            "errors": errors,
+        }
+
+    async def run(label: str, request: TunedRequest):
+        api = FakeBotAPI()
+        server = await asyncio.start_server(api.handle, "127.0.0.1", 0, backlog=2048)
+        base = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/bot123:abc"
+        await request.initialize()
+
+        print(f"📊 {label}")
+        for name in ("burst 1", f"burst 2 (after {IDLE_SECONDS}s idle)"):
+            if name != "burst 1":
+                await asyncio.sleep(IDLE_SECONDS)
+            before = api.connections
+            result = await wave(request, base)
+            print(
+                f"   {name:24} {result['elapsed']:.2f}s  p50 {result['p50']:.0f} ms  "
+                f"p95 {result['p95']:.0f} ms  new TCP+TLS {api.connections - before:3}  errors {result['errors'] or 0}"
+            )
+        stats = request.metrics.get_stats()
+        print(
+            f"   Pool wait p95 {stats['pool_wait_ms']['p95']} ms, reuse {stats['reuse_ratio']:.0%}, "
+            f"max in flight {stats['max_in_flight']}\n"
+        )
+        await request.shutdown()
+        server.close()
+        await server.wait_closed()
+
+    async def main():
+        print(
+            f"🧪 Bot API client: {USERS} concurrent users x {CALLS_PER_USER} calls, "
+            f"{API_MS} ms per call, {HANDSHAKE_MS} ms per new connection (HTTP/2: {HAS_HTTP2})\n"
+        )
+        # مطابق لافتراضيات ApplicationBuilder/httpx
+        await run(
+            "PTB defaults (pool 256, keep-alive 5s, pool timeout 1s)",
+            TunedRequest(
+                "default", 256, max_keepalive=None, keepalive_expiry=5, http2=False, gate=False, pool_timeout=1.0
+            ),
+        )
+        await run("HTTP_CONFIG", create_request())
+
+    asyncio.run(main())
@@ -0,0 +1,446 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              📤 SEND SCHEDULER                                           ║
+# ║          جدولة الإرسال لـ Telegram - حد عام + حد لكل محادثة             ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+جدولة كل طلبات البوت الصادرة (BaseRateLimiter لـ ExtBot)
+
+- كل reply_text / edit_message_text / send_* تمر من هنا تلقائياً
+  (Application.builder().rate_limiter) - لا تغيير في الـ handlers
+- حد لكل محادثة: ~1 رسالة/ثانية (دفعة قصيرة chat_burst)، المجموعات 20/دقيقة
+  GCRA على لحظة الإرسال الفعلية؛ طلبات نفس المحادثة بالترتيب (FIFO)
+- حد عام (token bucket): ~30 رسالة/ثانية لكل البوت
+- أولوية: الردود التفاعلية قبل الجماعية؛ الجماعية لها سقف bulk_rate حتى
+  يبقى جزء من الحد العام للردود دائماً
+    await bot.send_message(chat_id, text, rate_limit_args=Priority.BULK)
+- RetryAfter (429): إيقاف كل الإرسال للمدة المطلوبة + تأجيل المحادثة،
+  ثم إعادة المحاولة (max_retries) - المستخدم لا يرى الخطأ
+- قياس: زمن الانتظار في الطابور وزمن الطلب الكامل لكل أولوية ولكل endpoint
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from datetime import timedelta
+from enum import IntEnum
+from typing import Any, Callable, Coroutine, Deque, Dict, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from config import SEND_SCHEDULER_CONFIG
+from utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# endpoints تُحسب ضمن حدود Telegram للرسائل
+_LIMITED_PREFIXES = ("send", "edit", "copy", "forward")
+_UNLIMITED = frozenset({"sendChatAction"})
+
+# محادثات منتهية الحجز تُحذف من مقدمة الجدول مع كل طلب
+_EXPIRE_PER_REQUEST = 2
+
+
+class Priority(IntEnum):
+    """أولوية الطلب (rate_limit_args) - الأصغر أولاً"""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+def _seconds(value: Union[int, float, timedelta]) -> float:
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """ثوانٍ حتى يتوفر token كامل"""
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class _ChatChain:
+    """طابور محادثة واحدة: قفل FIFO + عدد الطلبات المعلقة"""
+
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class _GlobalGate:
+    """الحد العام: token bucket + طابور لكل أولوية + إيقاف بعد 429"""
+
+    def __init__(self, rate: float, burst: float, bulk_rate: float):
+        self.bucket = _TokenBucket(rate, burst)
+        self.bulk_bucket = _TokenBucket(bulk_rate, max(1.0, bulk_rate))
+        self.waiters: Dict[Priority, Deque[asyncio.Future]] = {p: deque() for p in Priority}
+        self.paused_until = 0.0
+        self.max_waiting = 0
+        self._pump_task: Optional[asyncio.Task] = None
+
+    def _try_take(self, priority: Priority, now: float) -> bool:
+        if now < self.paused_until:
+            return False
+        self.bucket.refill(now)
+        if self.bucket.tokens < 1:
+            return False
+        if priority is Priority.BULK:
+            self.bulk_bucket.refill(now)
+            if self.bulk_bucket.tokens < 1:
+                return False
+            self.bulk_bucket.tokens -= 1
+        self.bucket.tokens -= 1
+        return True
+
+    async def acquire(self, priority: Priority):
+        # لا يتخطى طلبٌ منتظراً بنفس أولويته أو أعلى
+        ahead = any(self.waiters[p] for p in Priority if p <= priority)
+        if not ahead and self._try_take(priority, time.monotonic()):
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[priority].append(waiter)
+        waiting = sum(len(q) for q in self.waiters.values())
+        if waiting > self.max_waiting:
+            self.max_waiting = waiting
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if not waiter.done():
+                waiter.cancel()
+            raise
+
+    async def _pump(self):
+        """يوزع الـ tokens على المنتظرين بالأولوية حتى يفرغ الطابور"""
+        while True:
+            for queue in self.waiters.values():
+                while queue and queue[0].done():
+                    queue.popleft()
+            waiting = [p for p in Priority if self.waiters[p]]
+            if not waiting:
+                return
+
+            now = time.monotonic()
+            granted = False
+            for priority in waiting:
+                if self._try_take(priority, now):
+                    self.waiters[priority].popleft().set_result(None)
+                    granted = True
+                    break
+            if granted:
+                continue
+
+            if now < self.paused_until:
+                delay = self.paused_until - now
+            else:
+                delay = min(
+                    self.bucket.delay() if p is Priority.INTERACTIVE
+                    else max(self.bucket.delay(), self.bulk_bucket.delay())
+                    for p in waiting
+                )
+            await asyncio.sleep(max(delay, 0.001))
+
+    def pause(self, seconds: float):
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.bucket.refill(now)
+        self.bucket.tokens = 0.0
+
+    def waiting(self) -> Dict[str, int]:
+        return {p.name: sum(1 for w in self.waiters[p] if not w.done()) for p in Priority}
+
+    async def shutdown(self):
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+        for queue in self.waiters.values():
+            while queue:
+                queue.popleft().cancel()
+
+
+class SendScheduler(BaseRateLimiter[Priority]):
+    """جدولة الإرسال: حد لكل محادثة + حد عام + أولوية + RetryAfter"""
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        global_burst: float = 1,
+        bulk_rate: float = 20,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        group_rate_per_minute: float = 20,
+        max_retries: int = 2,
+    ):
+        self.max_retries = max_retries
+        self._gate = _GlobalGate(global_rate, global_burst, bulk_rate)
+
+        # GCRA لكل محادثة: chat_id -> TAT (ترتيب آخر إرسال، الأقدم أولاً)
+        self._chat_interval = 1 / chat_rate
+        self._chat_tolerance = self._chat_interval * (chat_burst - 1)
+        self._group_interval = 60 / group_rate_per_minute
+        self._group_tolerance = self._group_interval * (chat_burst - 1)
+        self._chat_tat: "OrderedDict[Any, float]" = OrderedDict()
+        self._chats: Dict[Any, _ChatChain] = {}
+
+        self.sent = 0
+        self.passthrough = 0
+        self.retries = 0
+        self.retry_after_events = 0
+        self.failed = 0
+        self.queue_wait = {p: Histogram() for p in Priority}
+        self.latency = {p: Histogram() for p in Priority}
+        self.endpoint_latency: Dict[str, Histogram] = {}
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        await self._gate.shutdown()
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # حد المحادثة
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _chat_limits(self, chat_id) -> tuple:
+        if isinstance(chat_id, int) and chat_id > 0:
+            return self._chat_interval, self._chat_tolerance
+        # مجموعات وقنوات (سالب أو @username)
+        return self._group_interval, self._group_tolerance
+
+    def _chat_delay(self, chat_id, now: float) -> float:
+        """ثوانٍ حتى يُسمح بالإرسال التالي للمحادثة"""
+        tat = self._chat_tat.get(chat_id)
+        if tat is None:
+            return 0.0
+        return max(0.0, tat - self._chat_limits(chat_id)[1] - now)
+
+    def _mark_chat(self, chat_id, now: float):
+        """تسجيل إرسال فعلي للمحادثة"""
+        interval = self._chat_limits(chat_id)[0]
+        tats = self._chat_tat
+        tats[chat_id] = max(tats.get(chat_id, now), now) + interval
+        tats.move_to_end(chat_id)
+
+        for _ in range(_EXPIRE_PER_REQUEST):
+            oldest = next(iter(tats))
+            if tats[oldest] > now:
+                break
+            tats.popitem(last=False)
+
+    def _block_chat(self, chat_id, seconds: float):
+        now = time.monotonic()
+        tolerance = self._chat_limits(chat_id)[1]
+        # الطلب التالي لا يبدأ قبل انتهاء المدة
+        self._chat_tat[chat_id] = max(self._chat_tat.get(chat_id, now), now + seconds + tolerance)
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # BaseRateLimiter
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Priority],
+    ) -> Any:
+        chat_id = data.get("chat_id")
+        if chat_id is None or endpoint in _UNLIMITED or not endpoint.startswith(_LIMITED_PREFIXES):
+            # answerCallbackQuery / getMe / deleteMessage ... بدون انتظار
+            self.passthrough += 1
+            return await callback(*args, **kwargs)
+
+        priority = Priority.BULK if rate_limit_args == Priority.BULK else Priority.INTERACTIVE
+        started = time.perf_counter()
+
+        chain = self._chats.get(chat_id)
+        if chain is None:
+            chain = self._chats[chat_id] = _ChatChain()
+        chain.pending += 1
+        try:
+            # رسائل نفس المحادثة تصل بالترتيب
+            async with chain.lock:
+                return await self._send(callback, args, kwargs, endpoint, chat_id, priority, started)
+        finally:
+            chain.pending -= 1
+            if chain.pending == 0:
+                self._chats.pop(chat_id, None)
+
+    async def _send(self, callback, args, kwargs, endpoint: str, chat_id, priority: Priority, started: float):
+        for attempt in range(self.max_retries + 1):
+            delay = self._chat_delay(chat_id, time.monotonic())
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._gate.acquire(priority)
+            self._mark_chat(chat_id, time.monotonic())
+            if attempt == 0:
+                self.queue_wait[priority].observe((time.perf_counter() - started) * 1000)
+
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as exc:
+                seconds = _seconds(exc.retry_after)
+                self.retry_after_events += 1
+                self._gate.pause(seconds + 0.1)
+                self._block_chat(chat_id, seconds)
+                print(f"⚠️ [SEND] 429 on {endpoint} (chat {chat_id}) - pausing sends for {seconds:.1f}s")
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    raise
+                self.retries += 1
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.sent += 1
+            self.latency[priority].observe(elapsed_ms)
+            histogram = self.endpoint_latency.get(endpoint)
+            if histogram is None:
+                histogram = self.endpoint_latency[endpoint] = Histogram()
+            histogram.observe(elapsed_ms)
+            return result
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # المقاييس
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def get_stats(self) -> Dict:
+        """إحصائيات الإرسال"""
+
+        def brief(histogram: Histogram) -> Dict:
+            snapshot = histogram.snapshot()
+            return {key: snapshot[key] for key in ("count", "avg", "p50", "p95", "p99", "max")}
+
+        return {
+            "sent": self.sent,
+            "passthrough": self.passthrough,
+            "retries": self.retries,
+            "retry_after_events": self.retry_after_events,
+            "failed": self.failed,
+            "waiting": self._gate.waiting(),
+            "max_waiting": self._gate.max_waiting,
+            "tracked_chats": len(self._chat_tat),
+            "paused_seconds": round(max(0.0, self._gate.paused_until - time.monotonic()), 1),
+            "queue_wait_ms": {p.name: brief(self.queue_wait[p]) for p in Priority},
+            "latency_ms": {p.name: brief(self.latency[p]) for p in Priority},
+            "endpoints_ms": {name: brief(h) for name, h in self.endpoint_latency.items()},
+        }
+
+
+def create_send_scheduler() -> SendScheduler:
+    """إنشاء الجدولة من SEND_SCHEDULER_CONFIG"""
+    return SendScheduler(**SEND_SCHEDULER_CONFIG)
+
+
+if __name__ == "__main__":
+    import random
+
+    # Telegram وهمي: يرفض (429) عند تجاوز الحدود في نافذة ثانية واحدة
+    class FakeTelegram:
+        GLOBAL_PER_SECOND = 30
+        CHAT_PER_SECOND = 3
+
+        def __init__(self, latency_ms: float = 40):
+            self.latency = latency_ms / 1000
+            self.recent: Deque[float] = deque()
+            self.recent_by_chat: Dict[int, Deque[float]] = {}
+            self.accepted = 0
+            self.rejected = 0
+            self.first = None
+            self.last = None
+
+        async def send_message(self, chat_id: int, text: str):
+            now = time.monotonic()
+            chat_recent = self.recent_by_chat.setdefault(chat_id, deque())
+            for window in (self.recent, chat_recent):
+                while window and now - window[0] >= 1:
+                    window.popleft()
+            if len(self.recent) >= self.GLOBAL_PER_SECOND or len(chat_recent) >= self.CHAT_PER_SECOND:
+                self.rejected += 1
+                raise RetryAfter(1)
+            self.recent.append(now)
+            chat_recent.append(now)
+            self.accepted += 1
+            self.first = self.first or now
+            self.last = now
+            await asyncio.sleep(self.latency)
+            return {"ok": True}
+
+    BULK_MESSAGES = 300
+    INTERACTIVE_REPLIES = 60
+    REPLY_EVERY = 0.2
+
+    async def send_all(label: str, limiter: Optional[SendScheduler]):
+        telegram = FakeTelegram()
+        random.seed(20)
+        latencies: Dict[str, list] = {"INTERACTIVE": [], "BULK": []}
+
+        async def one(chat_id: int, priority: Priority):
+            data = {"chat_id": chat_id, "text": "hi"}
+            started = time.perf_counter()
+            try:
+                if limiter is None:
+                    await telegram.send_message(**data)
+                else:
+                    await limiter.process_request(
+                        telegram.send_message, (), data, "sendMessage", data, priority
+                    )
+            except RetryAfter:
+                return False
+            latencies[priority.name].append((time.perf_counter() - started) * 1000)
+            return True
+
+        async def interactive():
+            # ردود متفرقة من 20 مستخدم أثناء الإرسال الجماعي
+            tasks = []
+            for _ in range(INTERACTIVE_REPLIES):
+                tasks.append(asyncio.create_task(one(random.randint(1, 20), Priority.INTERACTIVE)))
+                await asyncio.sleep(REPLY_EVERY)
+            return await asyncio.gather(*tasks)
+
+        start = time.perf_counter()
+        bulk = asyncio.gather(*(one(1_000_000 + i, Priority.BULK) for i in range(BULK_MESSAGES)))
+        bulk_results, interactive_results = await asyncio.gather(bulk, interactive())
+        results = list(bulk_results) + list(interactive_results)
+        elapsed = time.perf_counter() - start
+        span = (telegram.last - telegram.first) if telegram.accepted > 1 else 0
+
+        print(f"📊 {label}")
+        print(f"   Delivered {sum(results)}/{len(results)} in {elapsed:.1f}s, 429s from Telegram: {telegram.rejected}")
+        if span:
+            print(f"   Sustained throughput: {telegram.accepted / span:.1f} msg/s")
+        for name, values in latencies.items():
+            if values:
+                values.sort()
+                p50 = values[len(values) // 2]
+                p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+                print(f"   {name:11} delivered {len(values):3}  p50 {p50:.0f} ms  p95 {p95:.0f} ms")
+        if limiter is not None:
+            stats = limiter.get_stats()
+            print(f"   Retries: {stats['retries']}, max waiting: {stats['max_waiting']}, tracked chats: {stats['tracked_chats']}")
+            await limiter.shutdown()
+        print()
+
+    print(
+        f"🧪 Send scheduler vs fake Telegram (30 msg/s global, 3/s per chat): "
+        f"{BULK_MESSAGES} bulk + {INTERACTIVE_REPLIES} replies every {REPLY_EVERY}s\n"
+    )
+    asyncio.run(send_all("Direct (no scheduler)", None))
+    asyncio.run(send_all("SendScheduler", create_send_scheduler()))
@@ -0,0 +1,484 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🗄️ SQLITE PERSISTENCE                                       ║
+# ║              حفظ الجلسات في SQLite - صف لكل مستخدم/محادثة               ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+بديل PicklePersistence مبني على SQLite
+
+- صف واحد لكل user_data / chat_data / حالة محادثة
+- يتم حفظ الصفوف المتغيرة فقط (dirty) بدلاً من إعادة كتابة كل الجلسات
+- التحديثات في نفس الدورة تُجمع في معاملة واحدة (transaction)
+- الكتابة تتم على خيط منفصل - لا تحجب الـ event loop
+- لا يتم فتح الملف أو قراءته إلا عند أول طلب من التطبيق
+- استيراد تلقائي لمرة واحدة من data/sessions.pkl القديم
+- ملف جانبي (sessions.meta.json) بالأعداد والأحجام وآخر flush وعينات النمو،
+  يُحدث مع كل flush - utils/session_monitor.py يقرأه بدل فتح الجلسات
+"""
+
+import asyncio
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from database.async_gateway import DatabaseGateway
+# تسجيل رقم امتداد copyreg لسجلات المساحات قبل أي pickle.loads للجلسات
+import utils.session_records  # noqa: F401
+
+# مفاتيح صفوف جدول bot_state
+_BOT_DATA = "bot_data"
+_CALLBACK_DATA = "callback_data"
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS user_data (
+        user_id INTEGER PRIMARY KEY,
+        data BLOB NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS chat_data (
+        chat_id INTEGER PRIMARY KEY,
+        data BLOB NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS bot_state (
+        key TEXT PRIMARY KEY,
+        data BLOB NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS conversations (
+        name TEXT NOT NULL,
+        key TEXT NOT NULL,
+        state BLOB NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (name, key)
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+"""
+
+
+# أعمدة المفتاح الأساسي وعمود البيانات لكل جدول
+_KEY_COLUMNS = {
+    "user_data": ("user_id",),
+    "chat_data": ("chat_id",),
+    "bot_state": ("key",),
+    "conversations": ("name", "key"),
+}
+
+META_VERSION = 1
+
+
+def _blob_column(table: str) -> str:
+    return "state" if table == "conversations" else "data"
+
+
+def _dumps(obj) -> bytes:
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _conversation_key(key: Tuple) -> str:
+    """مفتاح المحادثة (tuple من أرقام) كنص JSON"""
+    return json.dumps(list(key))
+
+
+class SQLitePersistence(BasePersistence):
+    """Persistence يحفظ كل مستخدم/محادثة في صف مستقل ويكتب المتغير فقط"""
+
+    def __init__(
+        self,
+        filepath: str,
+        legacy_pickle: Optional[str] = None,
+        meta_path: Optional[str] = None,
+        history_interval: float = 600,
+        history_size: int = 288,
+        store_data: Optional[PersistenceInput] = None,
+        update_interval: float = 60,
+        flush_delay: float = 0.05,
+        conversation_ttl: Optional[float] = None,
+    ):
+        super().__init__(store_data=store_data, update_interval=update_interval)
+        self.filepath = Path(filepath)
+        self.legacy_pickle = Path(legacy_pickle) if legacy_pickle else None
+        self.flush_delay = flush_delay
+        # حالات محادثات لم تتغير منذ conversation_ttl ثانية لا تُحمّل وتُحذف من الملف
+        # (conversation_timeout في PTB لا يعمل إلا للمحادثات النشطة بعد الإقلاع)
+        self.conversation_ttl = conversation_ttl
+
+        # ملف جانبي صغير (JSON) بالأعداد والأحجام - المراقبة تقرأه بدل فتح الجلسات
+        self.meta_path = Path(meta_path) if meta_path else None
+        self.history_interval = history_interval
+        self.history_size = history_size
+        # table -> [rows, bytes] (تُحسب مرة عند الفتح ثم تُحدث مع كل flush)
+        self._totals: Dict[str, list] = {}
+        # عينات النمو: [timestamp, file_bytes, users, data_bytes]
+        self._history: list = []
+
+        # كل عمليات الملف على خيط واحد بالترتيب
+        self._gateway = DatabaseGateway("SessionsDB")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+
+        # (table, key) -> bytes للحفظ أو None للحذف
+        self._dirty: Dict[Tuple, Optional[bytes]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # آخر نسخة محفوظة من bot_data / callback_data (تُستدعى كل دورة حتى بدون تغيير)
+        self._last_written: Dict[str, bytes] = {}
+
+        # إحصائيات
+        self._load_time = 0.0
+        self._flushes = 0
+        self._rows_written = 0
+        self._bytes_written = 0
+        self._flush_time_total = 0.0
+        self._flush_time_max = 0.0
+        self._last_flush = {"rows": 0, "bytes": 0, "ms": 0.0}
+        self._legacy_imported = 0
+        self._conversations_expired = 0
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 🔌 الاتصال (يُفتح عند أول استخدام فقط)
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.filepath), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._import_legacy_pickle(conn)
+            self._init_meta(conn)
+        return self._conn
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 🗒️ الملف الجانبي (metadata sidecar)
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _init_meta(self, conn: sqlite3.Connection):
+        """حساب المجاميع مرة واحدة عند الفتح + استكمال سجل النمو السابق"""
+        for table in _KEY_COLUMNS:
+            rows, size = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length({_blob_column(table)})), 0) FROM {table}"
+            ).fetchone()
+            self._totals[table] = [rows, size]
+
+        if self.meta_path is not None and self.meta_path.exists():
+            try:
+                previous = json.loads(self.meta_path.read_text(encoding="utf-8"))
+                self._history = list(previous.get("history", []))[-self.history_size:]
+            except (OSError, ValueError) as e:
+                print(f"   ⚠️ [PERSISTENCE] Ignoring unreadable sidecar {self.meta_path}: {e}")
+
+        self._write_meta(None)
+
+    def _file_bytes(self) -> int:
+        """حجم قاعدة الجلسات مع ملف الـ WAL"""
+        size = 0
+        for path in (self.filepath, self.filepath.with_name(self.filepath.name + "-wal")):
+            try:
+                size += path.stat().st_size
+            except OSError:
+                pass
+        return size
+
+    def _write_meta(self, last_flush: Optional[dict]):
+        """كتابة الملف الجانبي بشكل ذري (tmp + replace) - على خيط قاعدة البيانات"""
+        if self.meta_path is None:
+            return
+
+        now = time.time()
+        file_bytes = self._file_bytes()
+        users = self._totals["user_data"][0]
+        data_bytes = sum(size for _, size in self._totals.values())
+
+        if not self._history or now - self._history[-1][0] >= self.history_interval:
+            self._history.append([round(now, 1), file_bytes, users, data_bytes])
+            del self._history[:-self.history_size]
+
+        meta = {
+            "version": META_VERSION,
+            "file": str(self.filepath),
+            "updated_at": now,
+            "file_bytes": file_bytes,
+            "data_bytes": data_bytes,
+            "tables": {
+                table: {"rows": rows, "bytes": size}
+                for table, (rows, size) in self._totals.items()
+            },
+            "flushes": self._flushes + (1 if last_flush else 0),
+            "last_flush": last_flush,
+            "history": self._history,
+        }
+
+        tmp = self.meta_path.with_name(self.meta_path.name + ".tmp")
+        try:
+            self.meta_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(meta, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.meta_path)
+        except OSError as e:
+            # الملف الجانبي للمراقبة فقط - لا يُفشل الحفظ
+            print(f"   ⚠️ [PERSISTENCE] Could not write sidecar {self.meta_path}: {e}")
+
+    def _import_legacy_pickle(self, conn: sqlite3.Connection):
+        """استيراد sessions.pkl القديم مرة واحدة فقط"""
+        if self.legacy_pickle is None or not self.legacy_pickle.exists():
+            return
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_import'").fetchone():
+            return
+
+        print(f"   📦 [PERSISTENCE] Importing legacy sessions from {self.legacy_pickle}...")
+        with open(self.legacy_pickle, "rb") as f:
+            data = pickle.load(f)
+
+        now = time.time()
+        rows = 0
+        with conn:
+            for user_id, user_data in (data.get("user_data") or {}).items():
+                conn.execute(
+                    "INSERT OR REPLACE INTO user_data VALUES (?, ?, ?)",
+                    (user_id, _dumps(user_data), now),
+                )
+                rows += 1
+            for chat_id, chat_data in (data.get("chat_data") or {}).items():
+                conn.execute(
+                    "INSERT OR REPLACE INTO chat_data VALUES (?, ?, ?)",
+                    (chat_id, _dumps(chat_data), now),
+                )
+                rows += 1
+            for key in (_BOT_DATA, _CALLBACK_DATA):
+                if data.get(key) is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO bot_state VALUES (?, ?, ?)",
+                        (key, _dumps(data[key]), now),
+                    )
+                    rows += 1
+            for name, conversations in (data.get("conversations") or {}).items():
+                for key, state in conversations.items():
+                    conn.execute(
+                        "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?, ?)",
+                        (name, _conversation_key(key), _dumps(state), now),
+                    )
+                    rows += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('legacy_import', ?)",
+                (f"{self.legacy_pickle} @ {now}",),
+            )
+
+        self._legacy_imported = rows
+        print(f"   ✅ [PERSISTENCE] Imported {rows} rows from legacy pickle")
+
+    def _read(self, sql: str, params: tuple = ()):
+        with self._conn_lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    async def _load(self, sql: str, params: tuple = ()):
+        start = time.perf_counter()
+        try:
+            return await self._gateway.run(self._read, sql, params)
+        finally:
+            self._load_time += time.perf_counter() - start
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 📥 التحميل (مرة واحدة عند initialize)
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def get_user_data(self) -> Dict[int, dict]:
+        rows = await self._load("SELECT user_id, data FROM user_data")
+        return {user_id: pickle.loads(blob) for user_id, blob in rows}
+
+    async def get_chat_data(self) -> Dict[int, dict]:
+        rows = await self._load("SELECT chat_id, data FROM chat_data")
+        return {chat_id: pickle.loads(blob) for chat_id, blob in rows}
+
+    async def get_bot_data(self) -> dict:
+        rows = await self._load("SELECT data FROM bot_state WHERE key = ?", (_BOT_DATA,))
+        if not rows:
+            return {}
+        self._last_written[_BOT_DATA] = rows[0][0]
+        return pickle.loads(rows[0][0])
+
+    async def get_callback_data(self):
+        rows = await self._load("SELECT data FROM bot_state WHERE key = ?", (_CALLBACK_DATA,))
+        if not rows:
+            return None
+        self._last_written[_CALLBACK_DATA] = rows[0][0]
+        return pickle.loads(rows[0][0])
+
+    async def get_conversations(self, name: str) -> dict:
+        rows = await self._load("SELECT key, state, updated_at FROM conversations WHERE name = ?", (name,))
+        cutoff = time.time() - self.conversation_ttl if self.conversation_ttl else None
+        conversations = {}
+        for key, state, updated_at in rows:
+            if cutoff is not None and updated_at < cutoff:
+                self._mark(("conversations", name, key), None)
+                self._conversations_expired += 1
+                continue
+            conversations[tuple(json.loads(key))] = pickle.loads(state)
+        return conversations
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 📤 التحديثات - تُسجل كـ dirty وتُكتب مجمعة
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _mark(self, key: Tuple, blob: Optional[bytes]):
+        self._dirty[key] = blob
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._mark(("user_data", user_id), _dumps(data))
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        self._mark(("chat_data", chat_id), _dumps(data))
+
+    async def _update_bot_state(self, key: str, data) -> None:
+        blob = _dumps(data)
+        # bot_data يُرسل كل دورة - نتجاهله إذا لم يتغير
+        if self._last_written.get(key) == blob:
+            return
+        self._last_written[key] = blob
+        self._mark(("bot_state", key), blob)
+
+    async def update_bot_data(self, data: dict) -> None:
+        await self._update_bot_state(_BOT_DATA, data)
+
+    async def update_callback_data(self, data) -> None:
+        await self._update_bot_state(_CALLBACK_DATA, data)
+
+    async def update_conversation(self, name: str, key: Tuple, new_state) -> None:
+        blob = None if new_state is None else _dumps(new_state)
+        self._mark(("conversations", name, _conversation_key(key)), blob)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._mark(("user_data", user_id), None)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._mark(("chat_data", chat_id), None)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 💾 الكتابة
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _write(self, batch: Dict[Tuple, Optional[bytes]]):
+        """كتابة الصفوف المتغيرة في معاملة واحدة (على خيط قاعدة البيانات)"""
+        now = time.time()
+        start = time.perf_counter()
+        # table -> [rows, bytes] - تُطبق على المجاميع فقط بعد نجاح المعاملة
+        deltas: Dict[str, list] = {}
+
+        with self._conn_lock:
+            conn = self._connection()
+            with conn:
+                for key, blob in batch.items():
+                    table, ident = key[0], key[1:]
+                    where = " AND ".join(f"{column} = ?" for column in _KEY_COLUMNS[table])
+                    # الحجم القديم (بحث بالمفتاح الأساسي) حتى تبقى المجاميع دقيقة بدون COUNT
+                    old = conn.execute(
+                        f"SELECT length({_blob_column(table)}) FROM {table} WHERE {where}", ident
+                    ).fetchone()
+                    old_size = old[0] if old else None
+                    delta = deltas.setdefault(table, [0, 0])
+
+                    if blob is None:
+                        if old_size is not None:
+                            conn.execute(f"DELETE FROM {table} WHERE {where}", ident)
+                            delta[0] -= 1
+                            delta[1] -= old_size
+                    else:
+                        placeholders = ", ".join("?" * (len(ident) + 2))
+                        conn.execute(
+                            f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})",
+                            (*ident, blob, now),
+                        )
+                        delta[0] += 0 if old_size is not None else 1
+                        delta[1] += len(blob) - (old_size or 0)
+
+            for table, (rows, size) in deltas.items():
+                self._totals[table][0] += rows
+                self._totals[table][1] += size
+
+            self._write_meta({
+                "at": now,
+                "rows": len(batch),
+                "bytes": sum(len(blob) for blob in batch.values() if blob),
+                "ms": round((time.perf_counter() - start) * 1000, 2),
+            })
+
+    async def _delayed_flush(self):
+        # تجميع كل تحديثات نفس الدورة (update_persistence يرسلها معاً)
+        await asyncio.sleep(self.flush_delay)
+        await self._flush_dirty()
+
+    async def _flush_dirty(self):
+        if not self._dirty:
+            return
+        batch, self._dirty = self._dirty, {}
+        size = sum(len(blob) for blob in batch.values() if blob)
+
+        start = time.perf_counter()
+        try:
+            await self._gateway.run(self._write, batch)
+        except Exception as e:
+            print(f"   ❌ [PERSISTENCE] Flush failed ({len(batch)} rows kept dirty): {e}")
+            # إعادة الصفوف بدون الكتابة فوق تحديثات أحدث
+            for key, blob in batch.items():
+                self._dirty.setdefault(key, blob)
+            return
+
+        elapsed = time.perf_counter() - start
+        self._flushes += 1
+        self._rows_written += len(batch)
+        self._bytes_written += size
+        self._flush_time_total += elapsed
+        self._flush_time_max = max(self._flush_time_max, elapsed)
+        self._last_flush = {"rows": len(batch), "bytes": size, "ms": round(elapsed * 1000, 2)}
+        print(
+            f"💾 [PERSISTENCE] Flushed {len(batch)} rows "
+            f"({size / 1024:.1f} KB) in {elapsed * 1000:.1f} ms"
+        )
+
+    async def flush(self) -> None:
+        """يُستدعى عند الإيقاف - كتابة كل ما تبقى"""
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self._flush_dirty()
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 📊 الإحصائيات
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def get_stats(self) -> dict:
+        return {
+            "file": str(self.filepath),
+            "meta_file": str(self.meta_path) if self.meta_path else None,
+            "rows": {table: rows for table, (rows, _) in self._totals.items()},
+            "load_ms": round(self._load_time * 1000, 2),
+            "legacy_rows_imported": self._legacy_imported,
+            "conversations_expired": self._conversations_expired,
+            "pending_rows": len(self._dirty),
+            "flushes": self._flushes,
+            "rows_written": self._rows_written,
+            "bytes_written": self._bytes_written,
+            "last_flush": dict(self._last_flush),
+            "flush_avg_ms": round(self._flush_time_total / self._flushes * 1000, 2) if self._flushes else 0.0,
+            "flush_max_ms": round(self._flush_time_max * 1000, 2),
+        }
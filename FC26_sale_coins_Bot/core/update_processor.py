@@ -0,0 +1,208 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🔀 PER-USER UPDATE PROCESSOR                                ║
+# ║          تحديثات متوازية بين المستخدمين - مرتبة لكل مستخدم              ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+معالج تحديثات مخصص (BaseUpdateProcessor)
+
+- الافتراضي في PTB تسلسلي: مستخدم بطيء واحد يوقف الجميع
+- هنا: تحديثات المستخدمين المختلفين تعمل بالتوازي
+- تحديثات نفس المستخدم (effective_user.id) تعمل بالترتيب وواحداً تلو الآخر،
+  فلا تتداخل حالات ConversationHandler ولا مساحات user_data
+- حد عام لعدد الـ handlers العاملة معاً + أولويات ورفض عند الضغط
+  (core/admission.py)
+- مقاييس: عمق الطابور، أكبر عمق لمستخدم واحد، زمن الانتظار قبل التنفيذ
+
+ملاحظة: PTB يحجز مكاناً في semaphore الأساسي قبل do_process_update، لذلك
+يُعطى الأساس max_pending (كبير) ويُطبق الحد الفعلي هنا بعد دور المستخدم -
+وإلا فمستخدم يرسل 100 رسالة يحجز 100 مكان وهو ينتظر نفسه.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Dict, Hashable, Optional
+
+from telegram.ext import BaseUpdateProcessor
+
+from config import UPDATE_PROCESSOR_CONFIG
+from core.admission import AdmissionController, Lane, create_admission_controller
+
+
+class _UserChain:
+    """دور مستخدم واحد: قفل FIFO + عدد التحديثات المعلقة"""
+
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """تحديثات متوازية بين المستخدمين ومرتبة لكل مستخدم"""
+
+    __slots__ = (
+        "admission",
+        "_chains",
+        "queued",
+        "running",
+        "max_queued",
+        "max_user_depth",
+        "processed",
+        "unordered",
+    )
+
+    def __init__(self, admission: Optional[AdmissionController] = None, max_pending: int = 10000):
+        self.admission = admission or AdmissionController()
+        super().__init__(max_concurrent_updates=max(max_pending, self.admission.max_in_flight))
+        self._chains: Dict[Hashable, _UserChain] = {}
+
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.max_user_depth = 0
+        self.processed = 0
+        self.unordered = 0
+
+    @property
+    def max_running(self) -> int:
+        return self.admission.max_in_flight
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self._chains.clear()
+
+    @staticmethod
+    def _key(update: object) -> Optional[Hashable]:
+        """مفتاح الترتيب: المستخدم، ثم المحادثة - None = بدون ترتيب"""
+        user = getattr(update, "effective_user", None)
+        if user is not None:
+            return user.id
+        chat = getattr(update, "effective_chat", None)
+        if chat is not None:
+            return chat.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        lane = self.admission.admit(update)
+        if lane is None:
+            # مرفوض - لا يصل لأي handler
+            coroutine.close()
+            return
+
+        key = self._key(update)
+        enqueued = time.perf_counter()
+        self.queued += 1
+        if self.queued > self.max_queued:
+            self.max_queued = self.queued
+
+        if key is None:
+            self.unordered += 1
+            await self._run(coroutine, lane, enqueued)
+            return
+
+        chain = self._chains.get(key)
+        if chain is None:
+            chain = self._chains[key] = _UserChain()
+        chain.pending += 1
+        if chain.pending > self.max_user_depth:
+            self.max_user_depth = chain.pending
+
+        try:
+            # asyncio.Lock يوقظ المنتظرين بالترتيب = ترتيب وصول التحديثات
+            async with chain.lock:
+                await self._run(coroutine, lane, enqueued)
+        finally:
+            chain.pending -= 1
+            if chain.pending == 0:
+                self._chains.pop(key, None)
+
+    async def _run(self, coroutine: Awaitable[Any], lane: Lane, enqueued: float) -> None:
+        try:
+            await self.admission.acquire(lane, enqueued)
+        except BaseException:
+            # أُلغي قبل دوره (إيقاف البوت)
+            self.queued -= 1
+            self.admission.abandon(lane)
+            coroutine.close()
+            raise
+
+        self.queued -= 1
+        self.running += 1
+        try:
+            await coroutine
+        finally:
+            self.running -= 1
+            self.processed += 1
+            self.admission.release()
+
+    def get_stats(self) -> Dict:
+        """إحصائيات المعالج"""
+        return {
+            "max_concurrent": self.max_running,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "active_users": len(self._chains),
+            "max_user_depth": self.max_user_depth,
+            "processed": self.processed,
+            "unordered": self.unordered,
+            "admission": self.admission.get_stats(),
+        }
+
+
+def create_update_processor() -> PerUserUpdateProcessor:
+    """إنشاء المعالج من UPDATE_PROCESSOR_CONFIG"""
+    return PerUserUpdateProcessor(
+        admission=create_admission_controller(),
+        max_pending=UPDATE_PROCESSOR_CONFIG["max_pending"],
+    )
+
+
+if __name__ == "__main__":
+    from types import SimpleNamespace
+
+    from telegram.ext import SimpleUpdateProcessor
+
+    USERS = 100
+    UPDATES_PER_USER = 4
+    HANDLER_MS = 20
+
+    print(f"🧪 Update processor: {USERS} users x {UPDATES_PER_USER} updates, {HANDLER_MS} ms I/O per handler\n")
+
+    async def bench(processor) -> None:
+        seen: Dict[int, list] = {}
+
+        async def handler(user_id: int, seq: int):
+            seen.setdefault(user_id, []).append(seq)
+            await asyncio.sleep(HANDLER_MS / 1000)
+
+        await processor.initialize()
+        start = time.perf_counter()
+        tasks = []
+        # نفس أسلوب Application: task لكل تحديث بترتيب الوصول
+        for seq in range(UPDATES_PER_USER):
+            for user_id in range(USERS):
+                update = SimpleNamespace(effective_user=SimpleNamespace(id=user_id))
+                tasks.append(asyncio.create_task(processor.process_update(update, handler(user_id, seq))))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        await processor.shutdown()
+
+        ordered = all(seqs == sorted(seqs) for seqs in seen.values())
+        print(f"📊 {type(processor).__name__}")
+        print(f"   Total: {elapsed:.2f}s ({USERS * UPDATES_PER_USER / elapsed:.0f} updates/s)")
+        print(f"   Per-user order preserved: {'✅' if ordered else '❌'}")
+        if isinstance(processor, PerUserUpdateProcessor):
+            stats = processor.get_stats()
+            print(f"   Max queued: {stats['max_queued']}, max per user: {stats['max_user_depth']}")
+            wait = stats["admission"]["latency_ms"]
+            print(f"   Wait p50/p95/p99: {wait['p50']}/{wait['p95']}/{wait['p99']} ms")
+            print(f"   Leftover user chains: {stats['active_users']}")
+        print()
+
+    asyncio.run(bench(SimpleUpdateProcessor(1)))
+    asyncio.run(bench(PerUserUpdateProcessor(AdmissionController(max_in_flight=64))))
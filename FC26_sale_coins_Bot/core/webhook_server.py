@@ -0,0 +1,448 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🌐 WEBHOOK RECEIVER                                         ║
+# ║          استقبال التحديثات عبر HTTP بدل run_polling                      ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+وضع Webhook (WEBHOOK_CONFIG['enabled'] / BOT_MODE=webhook)
+
+- خادم HTTP/1.1 صغير على asyncio (بدون مكتبات إضافية) - يوضع خلف
+  reverse proxy يتولى TLS
+- فحص X-Telegram-Bot-Api-Secret-Token قبل قراءة الجسم (403)
+- حد لحجم الجسم من Content-Length قبل قراءته (413) وحد للـ headers (431)
+- التحديث يُحول لـ Update ويُوضع في app.update_queue والرد 200 فوراً -
+  المعالجة نفسها في update processor كما في polling
+- اتصالات keep-alive (Telegram يعيد استخدام الاتصال)
+- مقاييس: طلبات مقبولة/مرفوضة حسب السبب، زمن الاستقبال حتى الطابور
+
+مولد الحمل والمقارنة مع polling (بدون Telegram الحقيقي):
+    python -m core.webhook_server bench
+    python -m core.webhook_server loadgen --url http://127.0.0.1:8443/telegram --secret ...
+"""
+
+import asyncio
+import hmac
+import json
+import secrets
+import signal
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from telegram import Update
+
+from config import WEBHOOK_CONFIG
+from utils.metrics import Histogram
+
+# حد سطر الطلب + الـ headers
+_HEADER_LIMIT = 16 * 1024
+# مهلة انتظار طلب جديد على اتصال keep-alive
+_IDLE_TIMEOUT = 75
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    411: "Length Required",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+}
+
+
+class WebhookServer:
+    """مستقبل التحديثات: فحص + تحويل + وضع في الطابور + رد فوري"""
+
+    def __init__(
+        self,
+        update_queue: asyncio.Queue,
+        decode: Callable[[dict], object],
+        path: str = "/telegram",
+        secret_token: str = "",
+        max_body_bytes: int = 256 * 1024,
+        read_timeout: float = 10,
+    ):
+        self.update_queue = update_queue
+        self.decode = decode
+        self.path = path
+        self.secret_token = secret_token.encode()
+        self.max_body_bytes = max_body_bytes
+        self.read_timeout = read_timeout
+        self._server: Optional[asyncio.base_events.Server] = None
+
+        self.accepted = 0
+        self.rejected: Dict[int, int] = {}
+        self.connections = 0
+        self.bytes_received = 0
+        self.ingest_latency = Histogram(bounds=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100))
+
+    async def start(self, host: str, port: int):
+        self._server = await asyncio.start_server(self._handle, host, port, limit=_HEADER_LIMIT)
+        print(f"   ✅ [WEBHOOK] Listening on http://{host}:{self.port}{self.path}")
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # HTTP
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), _IDLE_TIMEOUT)
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, keep_alive=False)
+                    return
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+
+                received = time.perf_counter()
+                status, keep_alive = await self._handle_request(head, reader)
+                if status == 200:
+                    self.accepted += 1
+                    self.ingest_latency.observe((time.perf_counter() - received) * 1000)
+                else:
+                    self.rejected[status] = self.rejected.get(status, 0) + 1
+                await self._respond(writer, status, keep_alive)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # العميل أغلق الاتصال (مثلاً في منتصف الجسم) - لا يوجد من نرد عليه
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _handle_request(self, head: bytes, reader: asyncio.StreamReader) -> Tuple[int, bool]:
+        """(status, keep_alive) - أي خطأ قبل قراءة الجسم يغلق الاتصال"""
+        try:
+            request_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ", 2)
+        except ValueError:
+            return 400, False
+
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if target.split("?", 1)[0] != self.path:
+            return 404, False
+        if method != "POST":
+            return 405, False
+
+        # السر قبل الجسم - طلب مزيف لا يكلف قراءة ولا JSON
+        token = headers.get("x-telegram-bot-api-secret-token", "").encode("latin-1")
+        if not self.secret_token or not hmac.compare_digest(token, self.secret_token):
+            return 403, False
+
+        try:
+            length = int(headers["content-length"])
+        except (KeyError, ValueError):
+            return 411, False
+        if length < 0 or length > self.max_body_bytes:
+            return 413, False
+
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), self.read_timeout)
+        except asyncio.TimeoutError:
+            return 408, False
+        self.bytes_received += length
+
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        try:
+            update = self.decode(json.loads(body))
+        except Exception:
+            return 400, keep_alive
+
+        self.update_queue.put_nowait(update)
+        return 200, keep_alive
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, keep_alive: bool):
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            f"Content-Length: 0\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+    def get_stats(self) -> Dict:
+        """إحصائيات الاستقبال"""
+        return {
+            "accepted": self.accepted,
+            "rejected": dict(self.rejected),
+            "connections": self.connections,
+            "bytes_received": self.bytes_received,
+            "queue_size": self.update_queue.qsize(),
+            "ingest_ms": self.ingest_latency.snapshot(),
+        }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# تشغيل البوت في وضع Webhook
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+async def _serve(app):
+    config = WEBHOOK_CONFIG
+    secret = config["secret_token"] or secrets.token_urlsafe(32)
+    server = WebhookServer(
+        app.update_queue,
+        decode=lambda data: Update.de_json(data, app.bot),
+        path=config["path"],
+        secret_token=secret,
+        max_body_bytes=config["max_body_bytes"],
+        read_timeout=config["read_timeout"],
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows - KeyboardInterrupt يوقف asyncio.run
+            pass
+
+    async with app:
+        if app.post_init:
+            await app.post_init(app)
+        try:
+            # داخل الـ try: فشل الاستماع أو set_webhook يوقف الـ app أيضاً
+            await app.start()
+            await server.start(config["listen"], config["port"])
+
+            await app.bot.set_webhook(
+                url=config["url"],
+                secret_token=secret,
+                max_connections=config["max_connections"],
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=True,
+            )
+            print(f"   ✅ [WEBHOOK] Registered with Telegram: {config['url']}")
+
+            await stop.wait()
+        finally:
+            print("\n🛑 [WEBHOOK] Stopping...")
+            await server.stop()
+            stats = server.get_stats()
+            print(
+                f"   📥 Received {stats['accepted']} updates, rejected {stats['rejected']}, "
+                f"ingest p95 {stats['ingest_ms']['p95']} ms"
+            )
+            if app.running:
+                await app.stop()
+            if app.post_stop:
+                await app.post_stop(app)
+
+    if app.post_shutdown:
+        await app.post_shutdown(app)
+
+
+def run_webhook(app):
+    """بديل app.run_polling - يعمل حتى SIGINT/SIGTERM"""
+    if not WEBHOOK_CONFIG["url"]:
+        raise ValueError("WEBHOOK_URL is required in webhook mode")
+    print(f"\n🌐 [WEBHOOK] Starting webhook mode ({WEBHOOK_CONFIG['url']})")
+    asyncio.run(_serve(app))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# مولد الحمل + مقارنة مع polling
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def _synthetic_update(update_id: int, user_id: int) -> bytes:
+    return json.dumps(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "Load"},
+                "text": "/start",
+            },
+        }
+    ).encode()
+
+
+async def load_generate(
+    host: str,
+    port: int,
+    path: str,
+    secret: str,
+    updates: int = 5000,
+    concurrency: int = 40,
+    rate: float = 0,
+    sent_at: Optional[Dict[int, float]] = None,
+) -> Dict:
+    """POST تحديثات وهمية (اتصالات keep-alive بعدد concurrency) - rate=0 بأقصى سرعة"""
+    ack = Histogram(bounds=(0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250))
+    statuses: Dict[int, int] = {}
+    counter = iter(range(1, updates + 1))
+    start = time.perf_counter()
+
+    async def worker():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for update_id in counter:
+                if rate:
+                    delay = start + update_id / rate - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                body = _synthetic_update(update_id, 100000 + update_id % 1000)
+                request = (
+                    f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                    f"X-Telegram-Bot-Api-Secret-Token: {secret}\r\n\r\n"
+                ).encode("latin-1") + body
+                sent = time.perf_counter()
+                if sent_at is not None:
+                    sent_at[update_id] = sent
+                writer.write(request)
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                ack.observe((time.perf_counter() - sent) * 1000)
+                status = int(head.split(b" ", 2)[1])
+                statuses[status] = statuses.get(status, 0) + 1
+                if b"connection: close" in head.lower():
+                    return
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "updates": updates,
+        "elapsed": elapsed,
+        "throughput": updates / elapsed,
+        "statuses": statuses,
+        "ack_ms": ack.snapshot(),
+    }
+
+
+async def _bench(updates: int, rate: float, rtt_ms: float):
+    """webhook محلي حقيقي مقابل نموذج long-polling بنفس معدل الوصول"""
+    rtt = rtt_ms / 1000
+
+    async def consume(queue: asyncio.Queue, sent_at: Dict[int, float], latency: Histogram, total: int):
+        for _ in range(total):
+            update = await queue.get()
+            latency.observe((time.perf_counter() - sent_at[update.update_id]) * 1000)
+
+    def report(label: str, elapsed: float, latency: Histogram):
+        snapshot = latency.snapshot()
+        print(f"📊 {label}")
+        print(f"   Throughput: {updates / elapsed:.0f} updates/s")
+        print(f"   End-to-end p50/p95/p99: {snapshot['p50']}/{snapshot['p95']}/{snapshot['p99']} ms\n")
+
+    # 1️⃣ Webhook: HTTP حقيقي محلي -> Update.de_json -> الطابور
+    queue: asyncio.Queue = asyncio.Queue()
+    secret = secrets.token_urlsafe(16)
+    server = WebhookServer(queue, decode=lambda data: Update.de_json(data, None), secret_token=secret)
+    await server.start("127.0.0.1", 0)
+    port = server.port
+    sent_at: Dict[int, float] = {}
+    latency = Histogram()
+    start = time.perf_counter()
+    consumer = asyncio.create_task(consume(queue, sent_at, latency, updates))
+    result = await load_generate("127.0.0.1", port, "/telegram", secret, updates, 40, rate, sent_at)
+    await consumer
+    elapsed = time.perf_counter() - start
+
+    report(f"Webhook (local HTTP, ack p95 {result['ack_ms']['p95']} ms, statuses {result['statuses']})", elapsed, latency)
+    print(f"   ℹ️ Real webhook adds ~RTT/2 ({rtt_ms / 2:.0f} ms) for Telegram -> server\n")
+
+    # 403 / 413 سريعة
+    bad = await load_generate("127.0.0.1", port, "/telegram", "wrong", 5, 1)
+    print(f"🔐 Wrong secret -> {bad['statuses']}\n")
+    await server.stop()
+
+    # 2️⃣ نموذج long-polling: getUpdates يعلق حتى يصل تحديث، كل رحلة RTT/2
+    buffer = []
+    arrived = asyncio.Event()
+    queue = asyncio.Queue()
+    sent_at = {}
+    latency = Histogram()
+
+    async def telegram_side():
+        begin = time.perf_counter()
+        for update_id in range(1, updates + 1):
+            if rate:
+                delay = begin + update_id / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            sent_at[update_id] = time.perf_counter()
+            buffer.append(Update.de_json(json.loads(_synthetic_update(update_id, 100000 + update_id % 1000)), None))
+            arrived.set()
+
+    async def poller():
+        received = 0
+        while received < updates:
+            await asyncio.sleep(rtt / 2)          # الطلب يصل لـ Telegram
+            while not buffer:
+                arrived.clear()
+                await arrived.wait()
+            batch = buffer[:100]                  # حد getUpdates
+            del buffer[:100]
+            await asyncio.sleep(rtt / 2)          # الرد يعود
+            for update in batch:
+                queue.put_nowait(update)
+            received += len(batch)
+
+    start = time.perf_counter()
+    await asyncio.gather(telegram_side(), poller(), consume(queue, sent_at, latency, updates))
+    report(f"Long polling model (RTT {rtt_ms:.0f} ms, batches of 100)", time.perf_counter() - start, latency)
+
+
+def main(argv=None) -> int:
+    import argparse
+    from urllib.parse import urlparse
+
+    parser = argparse.ArgumentParser(prog="python -m core.webhook_server", description="FC26 webhook tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="local webhook vs long-polling model")
+    bench.add_argument("--updates", type=int, default=5000)
+    bench.add_argument("--rate", type=float, default=1000, help="arrivals per second (0 = max)")
+    bench.add_argument("--rtt-ms", type=float, default=100, help="assumed Bot API round trip")
+    loadgen = sub.add_parser("loadgen", help="POST synthetic updates to a running receiver")
+    loadgen.add_argument("--url", required=True)
+    loadgen.add_argument("--secret", required=True)
+    loadgen.add_argument("--updates", type=int, default=5000)
+    loadgen.add_argument("--concurrency", type=int, default=40)
+    loadgen.add_argument("--rate", type=float, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        print(f"🧪 Webhook vs polling: {args.updates} updates at {args.rate or 'max'}/s\n")
+        asyncio.run(_bench(args.updates, args.rate, args.rtt_ms))
+        return 0
+
+    url = urlparse(args.url)
+    result = asyncio.run(
+        load_generate(
+            url.hostname, url.port or 80, url.path or "/", args.secret,
+            args.updates, args.concurrency, args.rate,
+        )
+    )
+    ack = result["ack_ms"]
+    print(f"📊 {result['updates']} updates in {result['elapsed']:.2f}s ({result['throughput']:.0f}/s)")
+    print(f"   Statuses: {result['statuses']}")
+    print(f"   Ack p50/p95/p99: {ack['p50']}/{ack['p95']}/{ack['p99']} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,6 +10,8 @@ from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
 
+from database.price_book import price_book
+
 logger = logging.getLogger(__name__)
 
 class AdminOperations:
@@ -58,6 +60,10 @@ class AdminOperations:
         conn.commit()
         conn.close()
         
+        # الفهارس وتحديثات المخطط (PRAGMA user_version)
+        from database.migrations import migrate_admin_db
+        migrate_admin_db()
+        
         logger.info("✅ Admin database initialized successfully")
     
     @classmethod
@@ -137,7 +143,17 @@ class AdminOperations:
                 VALUES (?, ?, ?)
             ''', (admin_id, "UPDATE_PRICE", details))
             
+            cursor.execute('''
+                SELECT updated_at FROM coin_prices 
+                WHERE platform = ? AND transfer_type = ? AND amount = ?
+            ''', (platform, transfer_type, amount))
+            updated_at = cursor.fetchone()[0]
+            
             conn.commit()
+            
+            # نشر نسخة جديدة من دفتر الأسعار بعد نجاح الـ commit فقط
+            version = price_book.apply_update(platform, transfer_type, amount, new_price, updated_at)
+            print(f"📒 [DB] Price book updated to v{version}")
             print(f"✅ [DB] Price updated successfully: {platform} {transfer_type} {amount} -> {new_price}")
             logger.info(f"✅ Price updated: {platform} {transfer_type} {amount} -> {new_price}")
             return True
@@ -196,6 +212,42 @@ class AdminOperations:
         
         return prices
     
+    @classmethod
+    def load_price_book(cls) -> int:
+        """تحميل جدول الأسعار كاملاً في دفتر الأسعار (عند بدء التشغيل)"""
+        version = price_book.publish(cls.get_all_prices())
+        print(f"📒 [DB] Price book loaded: v{version}")
+        return version
+    
+    @classmethod
+    def get_cached_price(cls, platform: str, transfer_type: str, amount: int) -> Optional[int]:
+        """جلب السعر من دفتر الأسعار في الذاكرة - بدون أي استعلام"""
+        price_book.ensure_loaded(cls.get_all_prices)
+        return price_book.get(platform, transfer_type, amount)
+    
+    @classmethod
+    async def ensure_price_book(cls):
+        """تحميل دفتر الأسعار عبر بوابة الادمن إذا لم يُحمّل عند الإقلاع - لا يحجب الـ event loop"""
+        if price_book.loaded:
+            return
+        # استيراد متأخر: async_gateway يستورد هذا الملف
+        from database.async_gateway import admin_gateway
+        await admin_gateway.run(price_book.ensure_loaded, cls.get_all_prices)
+    
+    @classmethod
+    def verify_price_book(cls, repair: bool = True) -> Dict:
+        """مقارنة دفتر الأسعار مع قاعدة البيانات وإعادة التحميل عند الاختلاف"""
+        mismatches = price_book.diff(cls.get_all_prices())
+        if mismatches:
+            logger.warning(f"⚠️ Price book out of sync: {mismatches}")
+            if repair:
+                cls.load_price_book()
+        return {
+            'consistent': not mismatches,
+            'version': price_book.version,
+            'mismatches': mismatches,
+        }
+    
     @classmethod
     def log_admin_action(cls, admin_id: int, action: str, details: str = ""):
         """تسجيل عمل الادمن"""
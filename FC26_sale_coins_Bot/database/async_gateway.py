@@ -0,0 +1,139 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              ⚡ FC26 ASYNC DATABASE GATEWAY - بوابة قاعدة البيانات        ║
+# ║                  Non-blocking Database Access for Handlers               ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+Awaitable access to the synchronous database operations.
+
+Every call is queued to a dedicated worker thread per database file, so the
+event loop never waits on sqlite (fsync, busy locks, slow queries).
+
+Usage in async handlers:
+    from database.async_gateway import users, admin
+
+    user_data = await users.get_user_data(user_id)
+    await admin.log_admin_action(user_id, "ADMIN_LOGIN")
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from database.admin_operations import AdminOperations
+from database.operations import (
+    BroadcastOperations,
+    ErrorOperations,
+    RegistrationOperations,
+    SellOrderOperations,
+    StatisticsOperations,
+    UserOperations,
+)
+
+logger = logging.getLogger(__name__)
+
+class DatabaseGateway:
+    """Runs blocking database calls on one dedicated worker thread (request queue)"""
+
+    def __init__(self, name: str, executor: Optional[ThreadPoolExecutor] = None):
+        self.name = name
+        # max_workers=1: calls are serialized in submission order on one thread
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+        # Statistics (only touched from the event loop thread)
+        self._submitted = 0
+        self._failed = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Queue func(*args, **kwargs) on the worker thread and await its result"""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+
+        self._submitted += 1
+        self._in_flight += 1
+        self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._in_flight -= 1
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+
+    def get_stats(self) -> Dict:
+        """Queue depth and round-trip latency (queue wait + execution)"""
+        completed = self._submitted - self._in_flight
+        return {
+            'name': self.name,
+            'submitted': self._submitted,
+            'failed': self._failed,
+            'queue_depth': self._in_flight,
+            'max_queue_depth': self._max_in_flight,
+            'latency_avg_ms': round(self._latency_total / completed * 1000, 2) if completed else 0.0,
+            'latency_max_ms': round(self._latency_max * 1000, 2),
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker thread after queued calls finish"""
+        self._executor.shutdown(wait=wait)
+
+class AsyncOperations:
+    """
+    Awaitable facade over an operations class.
+    Every public static/class method of the wrapped class becomes a coroutine
+    that runs on the gateway thread; methods that are already async pass through.
+    """
+
+    def __init__(self, operations_cls, gateway: DatabaseGateway):
+        self._operations = operations_cls
+        self._gateway = gateway
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        attr = getattr(self._operations, name)
+        if not callable(attr) or asyncio.iscoroutinefunction(attr):
+            return attr
+
+        gateway = self._gateway
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await gateway.run(attr, *args, **kwargs)
+
+        # Cache the wrapper so later lookups skip __getattr__
+        self.__dict__[name] = call
+        return call
+
+# One worker per database file - fc26_bot.db and fc26_admin.db never block each other
+main_gateway = DatabaseGateway("FC26DB")
+# Share the executor AdminOperations.update_price already uses, so every admin DB
+# call stays serialized on the same thread
+admin_gateway = DatabaseGateway("AdminDB", executor=AdminOperations._db_executor)
+
+users = AsyncOperations(UserOperations, main_gateway)
+registration = AsyncOperations(RegistrationOperations, main_gateway)
+stats = AsyncOperations(StatisticsOperations, main_gateway)
+errors = AsyncOperations(ErrorOperations, main_gateway)
+orders = AsyncOperations(SellOrderOperations, main_gateway)
+broadcasts = AsyncOperations(BroadcastOperations, main_gateway)
+admin = AsyncOperations(AdminOperations, admin_gateway)
+
+def get_gateway_stats() -> Dict[str, Dict]:
+    """Statistics for both database gateways"""
+    return {
+        'main': main_gateway.get_stats(),
+        'admin': admin_gateway.get_stats(),
+    }
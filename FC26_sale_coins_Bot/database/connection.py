@@ -6,49 +6,204 @@
 import sqlite3
 import logging
 import os
-from typing import Optional
+import queue
+import threading
+import time
+from typing import Dict, Optional
 from contextlib import contextmanager
 from config import DATABASE_CONFIG
 
 logger = logging.getLogger(__name__)
 
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free within pool_timeout"""
+    pass
+
+class ConnectionPool:
+    """Bounded pool of persistent SQLite connections with per-thread checkout"""
+
+    def __init__(self, db_path: str, max_size: int = 8, timeout: float = 10.0,
+                 busy_timeout_ms: int = 5000, statement_cache_size: int = 128):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache_size = statement_cache_size
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open_count = 0
+
+        # Pool statistics
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._opened_total = 0
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open one pooled connection and apply the connection PRAGMAs once"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,  # connections move between threads via the pool
+            cached_statements=self.statement_cache_size,
+        )
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        logger.debug(f"🔌 Opened pooled connection to {self.db_path}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, open a new one, or wait for a release"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._open_count < self.max_size
+            if can_open:
+                self._open_count += 1
+                self._opened_total += 1
+
+        if can_open:
+            try:
+                return self._open_connection()
+            except Exception:
+                with self._lock:
+                    self._open_count -= 1
+                raise
+
+        # Pool exhausted - wait for another thread to release
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(
+                f"No free connection for {self.db_path} after {self.timeout}s"
+            )
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._waits += 1
+            self._wait_time_total += waited
+            self._wait_time_max = max(self._wait_time_max, waited)
+        return conn
+
+    def _release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool with no transaction left open"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Broken connection - drop it instead of pooling it
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._open_count -= 1
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the current thread.
+        Nested checkouts on the same thread reuse the same connection,
+        so helpers calling helpers never deadlock on a full pool.
+        """
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        with self._lock:
+            self._checkouts += 1
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def get_stats(self) -> Dict:
+        """Pool statistics for monitoring"""
+        with self._lock:
+            return {
+                'db_path': self.db_path,
+                'max_size': self.max_size,
+                'open_connections': self._open_count,
+                'idle_connections': self._idle.qsize(),
+                'opened_total': self._opened_total,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total_ms': round(self._wait_time_total * 1000, 2),
+                'wait_time_max_ms': round(self._wait_time_max * 1000, 2),
+                'wait_time_avg_ms': round(self._wait_time_total / self._waits * 1000, 2) if self._waits else 0.0,
+            }
+
 class DatabaseConnection:
     """Database connection manager with proper error handling"""
-    
+
     def __init__(self):
+        # No I/O here - connections open lazily, directories via ensure_directories()
         self.db_path = os.path.join(DATABASE_CONFIG['path'], DATABASE_CONFIG['name'])
-        self._ensure_database_directory()
-    
-    def _ensure_database_directory(self):
-        """Ensure database directory exists"""
+        self.pool = ConnectionPool(
+            self.db_path,
+            max_size=DATABASE_CONFIG.get('pool_size', 8),
+            timeout=DATABASE_CONFIG.get('pool_timeout', 10.0),
+            busy_timeout_ms=DATABASE_CONFIG.get('busy_timeout_ms', 5000),
+            statement_cache_size=DATABASE_CONFIG.get('statement_cache_size', 128),
+        )
+
+    def ensure_directories(self):
+        """Ensure database directory exists (called from core.bootstrap)"""
         os.makedirs(DATABASE_CONFIG['path'], exist_ok=True)
         if DATABASE_CONFIG.get('backup_path'):
             os.makedirs(DATABASE_CONFIG['backup_path'], exist_ok=True)
-    
+
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Enable dict-like access
-            yield conn
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            logger.error(f"Database error: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
-    
+        """Context manager for pooled database connections"""
+        with self.pool.connection() as conn:
+            try:
+                yield conn
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                logger.error(f"Database error: {e}")
+                raise
+
     def execute_query(self, query: str, params: tuple = ()) -> Optional[list]:
         """Execute a SELECT query and return results"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
             return cursor.fetchall()
-    
+
     def execute_update(self, query: str, params: tuple = ()) -> int:
         """Execute an INSERT/UPDATE/DELETE query and return affected rows"""
         with self.get_connection() as conn:
@@ -56,12 +211,30 @@ class DatabaseConnection:
             cursor.execute(query, params)
             conn.commit()
             return cursor.rowcount
-    
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run several statements on one connection with a single commit.
+        Rolls back everything if any statement fails.
+        """
+        with self.get_connection() as conn:
+            yield conn
+            conn.commit()
+
     def execute_script(self, script: str):
         """Execute multiple SQL statements"""
         with self.get_connection() as conn:
             conn.executescript(script)
             conn.commit()
 
+    def get_pool_stats(self) -> Dict:
+        """Connection pool statistics (checkouts, waits, open count)"""
+        return self.pool.get_stats()
+
+    def close(self):
+        """Close pooled connections"""
+        self.pool.close_all()
+
 # Global database instance
-db = DatabaseConnection()
\ No newline at end of file
+db = DatabaseConnection()
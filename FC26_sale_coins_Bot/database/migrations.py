@@ -0,0 +1,224 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🧬 FC26 SCHEMA MIGRATIONS - ترحيل مخطط قاعدة البيانات        ║
+# ║                  Versioned Schema Evolution (PRAGMA user_version)        ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+Versioned schema migrations for fc26_bot.db and fc26_admin.db.
+
+The applied version is stored in PRAGMA user_version of each database file.
+Each migration runs in its own transaction together with the version bump,
+so a failed migration leaves the database at the previous version.
+
+To evolve the schema, append a Migration with the next version number to
+MAIN_MIGRATIONS or ADMIN_MIGRATIONS - never edit one that already shipped.
+
+Run `python -m database.migrations` to apply pending migrations and print
+the query plans of the hot queries.
+"""
+
+import logging
+import sqlite3
+from contextlib import closing
+from typing import Dict, List, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    statements: Tuple[str, ...]
+
+# ═══════════════════════════════════════════════════════════════════════════
+# fc26_bot.db
+# ═══════════════════════════════════════════════════════════════════════════
+
+MAIN_MIGRATIONS: List[Migration] = [
+    Migration(1, "Indexes for registration history, completed count and error log", (
+        "CREATE INDEX IF NOT EXISTS idx_registration_log_user_time "
+        "ON registration_log (telegram_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_error_log_timestamp ON error_log (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_users_registration_step ON users (registration_step)",
+    )),
+    Migration(2, "Append-only sell order ledger", (
+        """CREATE TABLE IF NOT EXISTS sell_orders (
+            id INTEGER PRIMARY KEY,
+            order_id TEXT NOT NULL UNIQUE,
+            telegram_id INTEGER NOT NULL,
+            platform TEXT NOT NULL,
+            transfer_type TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            price INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'open',
+            created_at TIMESTAMP NOT NULL
+        )""",
+        # (status, created_at) + implicit rowid = keyset paging order for admin listing
+        "CREATE INDEX IF NOT EXISTS idx_sell_orders_status_created "
+        "ON sell_orders (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_sell_orders_telegram_id ON sell_orders (telegram_id)",
+    )),
+    Migration(3, "Resumable broadcasts and blocked-user marker", (
+        # Set when a send fails with Forbidden (user blocked the bot); broadcasts skip these users
+        "ALTER TABLE users ADD COLUMN blocked_at TIMESTAMP",
+        """CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            text TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            created_by INTEGER,
+            last_telegram_id INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            blocked INTEGER NOT NULL DEFAULT 0,
+            progress_chat_id INTEGER,
+            progress_message_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_broadcasts_status ON broadcasts (status)",
+    )),
+]
+
+# ═══════════════════════════════════════════════════════════════════════════
+# fc26_admin.db
+# ═══════════════════════════════════════════════════════════════════════════
+
+ADMIN_MIGRATIONS: List[Migration] = [
+    Migration(1, "Index for admin log listing", (
+        "CREATE INDEX IF NOT EXISTS idx_admin_logs_timestamp ON admin_logs (timestamp)",
+    )),
+]
+
+# Hot queries whose plans are reported (name -> (sql, sample params))
+MAIN_HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    'registration_history': (
+        "SELECT step, data, timestamp FROM registration_log "
+        "WHERE telegram_id = ? ORDER BY timestamp DESC", (0,)),
+    'completed_registrations': (
+        "SELECT COUNT(*) FROM users WHERE registration_step = 'completed'", ()),
+    'user_by_id': (
+        "SELECT * FROM users WHERE telegram_id = ?", (0,)),
+    'recent_errors': (
+        "SELECT * FROM error_log ORDER BY timestamp DESC LIMIT 50", ()),
+    'open_orders_page': (
+        "SELECT * FROM sell_orders WHERE status = ? AND (created_at, id) > (?, ?) "
+        "ORDER BY created_at, id LIMIT ?", ('open', '', 0, 20)),
+    'user_orders': (
+        "SELECT * FROM sell_orders WHERE telegram_id = ? ORDER BY id DESC", (0,)),
+    'broadcast_recipients_page': (
+        "SELECT telegram_id FROM users WHERE registration_step = 'completed' "
+        "AND blocked_at IS NULL AND telegram_id > ? ORDER BY telegram_id LIMIT ?", (0, 100)),
+}
+
+ADMIN_HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    'admin_logs': (
+        "SELECT admin_id, action, details, timestamp FROM admin_logs "
+        "ORDER BY timestamp DESC LIMIT ?", (50,)),
+    'price_lookup': (
+        "SELECT price FROM coin_prices WHERE platform = ? AND transfer_type = ? AND amount = ?",
+        ('pc', 'normal', 1000000)),
+}
+
+class MigrationRunner:
+    """Applies pending migrations to one sqlite connection"""
+
+    def __init__(self, conn: sqlite3.Connection, migrations: List[Migration], name: str):
+        self.conn = conn
+        self.migrations = sorted(migrations, key=lambda m: m.version)
+        self.name = name
+
+        versions = [m.version for m in self.migrations]
+        if len(versions) != len(set(versions)):
+            raise ValueError(f"Duplicate migration versions for {name}: {versions}")
+
+    def current_version(self) -> int:
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def pending(self) -> List[Migration]:
+        current = self.current_version()
+        return [m for m in self.migrations if m.version > current]
+
+    def apply(self) -> int:
+        """Apply every pending migration. Returns the resulting schema version."""
+        if self.conn.in_transaction:
+            self.conn.commit()
+
+        for migration in self.pending():
+            try:
+                self.conn.execute("BEGIN")
+                for statement in migration.statements:
+                    self.conn.execute(statement)
+                # user_version is transactional - it only moves if the statements did
+                self.conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                logger.error(f"❌ [{self.name}] Migration {migration.version} failed: {e}")
+                raise
+            logger.info(f"✅ [{self.name}] Migration {migration.version} applied: {migration.description}")
+            print(f"   🧬 [{self.name}] v{migration.version}: {migration.description}")
+
+        return self.current_version()
+
+def explain(conn: sqlite3.Connection, queries: Dict[str, Tuple[str, tuple]]) -> Dict[str, List[str]]:
+    """EXPLAIN QUERY PLAN for each query -> list of plan detail lines"""
+    plans = {}
+    for name, (sql, params) in queries.items():
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            plans[name] = [row[-1] for row in rows]
+        except sqlite3.Error as e:
+            plans[name] = [f"error: {e}"]
+    return plans
+
+def uses_index(plan: List[str]) -> bool:
+    """True when no step of the plan is a full table scan"""
+    return not any(line.startswith('SCAN ') and 'USING' not in line for line in plan)
+
+def migrate_main_db() -> int:
+    """Apply pending migrations to fc26_bot.db (tables must already exist)"""
+    from database.connection import db
+
+    with db.get_connection() as conn:
+        return MigrationRunner(conn, MAIN_MIGRATIONS, "FC26DB").apply()
+
+def migrate_admin_db() -> int:
+    """Apply pending migrations to fc26_admin.db (tables must already exist)"""
+    from database.admin_operations import AdminOperations
+
+    with closing(sqlite3.connect(AdminOperations.DB_NAME)) as conn:
+        return MigrationRunner(conn, ADMIN_MIGRATIONS, "AdminDB").apply()
+
+def get_query_plans() -> Dict[str, Dict[str, List[str]]]:
+    """Query plans of the hot queries on both databases"""
+    from database.admin_operations import AdminOperations
+    from database.connection import db
+
+    with db.get_connection() as conn:
+        main_plans = explain(conn, MAIN_HOT_QUERIES)
+    with closing(sqlite3.connect(AdminOperations.DB_NAME)) as conn:
+        admin_plans = explain(conn, ADMIN_HOT_QUERIES)
+    return {'FC26DB': main_plans, 'AdminDB': admin_plans}
+
+def print_query_plans():
+    """Print hot query plans with a ✅/⚠️ marker for index use"""
+    for database, plans in get_query_plans().items():
+        print(f"\n📊 [{database}] Query plans:")
+        for name, plan in plans.items():
+            marker = "✅" if uses_index(plan) else "⚠️ FULL SCAN"
+            print(f"   {marker} {name}")
+            for line in plan:
+                print(f"      • {line}")
+
+if __name__ == "__main__":
+    from database.admin_operations import AdminOperations
+    from database.models import DatabaseModels
+
+    print("🧬 Applying schema migrations...")
+    DatabaseModels.create_all_tables()
+    AdminOperations.init_admin_db()
+    print(f"   FC26DB  schema version: {migrate_main_db()}")
+    print(f"   AdminDB schema version: {migrate_admin_db()}")
+    print_query_plans()
@@ -63,6 +63,10 @@ class DatabaseModels:
                 )
             """)
             
+            # Indexes and later schema changes (PRAGMA user_version)
+            from database.migrations import migrate_main_db
+            migrate_main_db()
+            
             logger.info("✅ All database tables created successfully")
             return True
             
@@ -77,6 +81,8 @@ class DatabaseModels:
         try:
             for table in tables:
                 db.execute_update(f"DROP TABLE IF EXISTS {table}")
+            # Indexes went with the tables - let migrations run again
+            db.execute_update("PRAGMA user_version = 0")
             logger.info("⚠️ All database tables dropped")
             return True
         except Exception as e:
@@ -114,7 +120,3 @@ class DatabaseModels:
         except Exception as e:
             logger.error(f"❌ Error getting table info: {e}")
             return {}
-
-# Initialize database on import
-if __name__ != "__main__":
-    DatabaseModels.create_all_tables()
\ No newline at end of file
@@ -4,53 +4,54 @@
 # ╚══════════════════════════════════════════════════════════════════════════╝
 
 import logging
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime
 from database.connection import db
+from database.order_ids import sell_order_ids
+from database.user_cache import user_cache
+from database.write_behind import write_behind
 
 logger = logging.getLogger(__name__)
 
 class UserOperations:
     """User-related database operations"""
     
+    # Columns a registration step is allowed to write
+    USER_DATA_FIELDS = ('platform', 'whatsapp', 'payment_method', 'payment_details')
+
     @staticmethod
     def save_user_step(user_id: int, step: str, data: Dict = None) -> bool:
-        """Save user registration step and data"""
+        """
+        Save user registration step and data.
+        One UPSERT plus the registration_log insert in a single transaction
+        (one connection, one commit). Only the fields present in data are
+        overwritten for an existing user. A user who registers again has
+        unblocked the bot, so blocked_at is cleared.
+        """
         try:
-            # Check if user exists
-            existing = db.execute_query(
-                "SELECT telegram_id FROM users WHERE telegram_id = ?", (user_id,)
+            fields = [key for key in UserOperations.USER_DATA_FIELDS if data and key in data]
+            columns = ['telegram_id', 'registration_step'] + fields
+            params = [user_id, step] + [data[key] for key in fields]
+
+            assignments = ['registration_step = excluded.registration_step',
+                           'blocked_at = NULL',
+                           'updated_at = CURRENT_TIMESTAMP']
+            assignments += [f"{key} = excluded.{key}" for key in fields]
+
+            upsert = (
+                f"INSERT INTO users ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(telegram_id) DO UPDATE SET {', '.join(assignments)}"
             )
-            
-            if existing:
-                # Update existing user
-                query = "UPDATE users SET registration_step = ?, updated_at = CURRENT_TIMESTAMP"
-                params = [step, user_id]
-                
-                if data:
-                    for key, value in data.items():
-                        if key in ['platform', 'whatsapp', 'payment_method', 'payment_details']:
-                            query += f", {key} = ?"
-                            params.insert(-1, value)
-                
-                query += " WHERE telegram_id = ?"
-                db.execute_update(query, tuple(params))
-                
-            else:
-                # Insert new user
-                platform = data.get('platform') if data else None
-                whatsapp = data.get('whatsapp') if data else None
-                payment_method = data.get('payment_method') if data else None
-                payment_details = data.get('payment_details') if data else None
-                
-                db.execute_update("""
-                    INSERT INTO users (telegram_id, platform, whatsapp, payment_method, payment_details, registration_step)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (user_id, platform, whatsapp, payment_method, payment_details, step))
-            
-            # Log the step
-            RegistrationOperations.log_step(user_id, step, str(data) if data else None)
-            
+
+            with db.transaction() as conn:
+                conn.execute(upsert, params)
+                conn.execute("""
+                    INSERT INTO registration_log (telegram_id, step, data)
+                    VALUES (?, ?, ?)
+                """, (user_id, step, str(data) if data else None))
+
+            user_cache.invalidate(user_id)
             logger.info(f"✅ Step saved for user {user_id}: {step}")
             return True
             
@@ -60,7 +61,11 @@ class UserOperations:
     
     @staticmethod
     def get_user_data(user_id: int) -> Optional[Dict]:
-        """Get user data from database"""
+        """Get user data (read-through user_cache, then database)"""
+        found, cached = user_cache.get(user_id)
+        if found:
+            return cached
+
         try:
             result = db.execute_query("""
                 SELECT telegram_id, platform, whatsapp, payment_method, 
@@ -70,7 +75,7 @@ class UserOperations:
             
             if result:
                 row = result[0]
-                return {
+                data = {
                     "telegram_id": row[0],
                     "platform": row[1],
                     "whatsapp": row[2],
@@ -80,15 +85,37 @@ class UserOperations:
                     "created_at": row[6],
                     "updated_at": row[7]
                 }
+                user_cache.put(user_id, data)
+                return data
+
+            # Remember unknown users too (negative lookup)
+            user_cache.put(user_id, None)
             return None
             
         except Exception as e:
             logger.error(f"❌ Error getting user data: {e}")
             return None
     
+    @staticmethod
+    def clear_blocked(user_id: int) -> bool:
+        """User is talking to the bot again - include them in broadcasts"""
+        try:
+            db.execute_update(
+                "UPDATE users SET blocked_at = NULL WHERE telegram_id = ? AND blocked_at IS NOT NULL",
+                (user_id,)
+            )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error clearing blocked marker: {e}")
+            return False
+    
     @staticmethod
     def user_exists(user_id: int) -> bool:
         """Check if user exists in database"""
+        found, cached = user_cache.get(user_id)
+        if found:
+            return cached is not None
+
         try:
             result = db.execute_query(
                 "SELECT telegram_id FROM users WHERE telegram_id = ?", (user_id,)
@@ -102,11 +129,17 @@ class UserOperations:
     def delete_user(user_id: int) -> bool:
         """Delete user and related data"""
         try:
+            # Flush buffered log rows first so none are written after the delete
+            write_behind.flush()
+
             # Delete user data
             affected = db.execute_update("DELETE FROM users WHERE telegram_id = ?", (user_id,))
             
             # Delete registration logs
             db.execute_update("DELETE FROM registration_log WHERE telegram_id = ?", (user_id,))
+
+            # The user is gone now - cache the negative result
+            user_cache.put(user_id, None)
             
             if affected > 0:
                 logger.info(f"✅ User {user_id} deleted successfully")
@@ -133,6 +166,7 @@ class UserOperations:
                 f"UPDATE users SET {field} = ?, updated_at = CURRENT_TIMESTAMP WHERE telegram_id = ?",
                 (value, user_id)
             )
+            user_cache.invalidate(user_id)
             
             if affected > 0:
                 logger.info(f"✅ Field {field} updated for user {user_id}")
@@ -150,12 +184,9 @@ class RegistrationOperations:
     
     @staticmethod
     def log_step(user_id: int, step: str, data: str = None) -> bool:
-        """Log registration step"""
+        """Log registration step (buffered, written by the write-behind queue)"""
         try:
-            db.execute_update("""
-                INSERT INTO registration_log (telegram_id, step, data)
-                VALUES (?, ?, ?)
-            """, (user_id, step, data))
+            write_behind.add_registration_log(user_id, step, data)
             return True
         except Exception as e:
             logger.error(f"❌ Error logging registration step: {e}")
@@ -165,6 +196,7 @@ class RegistrationOperations:
     def get_user_registration_history(user_id: int) -> List[Dict]:
         """Get user's registration history"""
         try:
+            write_behind.flush()
             result = db.execute_query("""
                 SELECT step, data, timestamp 
                 FROM registration_log 
@@ -204,22 +236,9 @@ class StatisticsOperations:
     
     @staticmethod
     def update_daily_metric(metric_name: str, value: int = 1) -> bool:
-        """Update daily metric"""
-        try:
-            # Try to update existing record
-            affected = db.execute_update("""
-                UPDATE statistics 
-                SET metric_value = metric_value + ? 
-                WHERE date = CURRENT_DATE AND metric_name = ?
-            """, (value, metric_name))
-            
-            # If no record exists, create new one
-            if affected == 0:
-                db.execute_update("""
-                    INSERT INTO statistics (metric_name, metric_value)
-                    VALUES (?, ?)
-                """, (metric_name, value))
-            
+        """Update daily metric (buffered; increments are summed per flush)"""
+        try:
+            write_behind.add_metric(metric_name, value)
             return True
         except Exception as e:
             logger.error(f"❌ Error updating daily metric: {e}")
@@ -232,11 +251,345 @@ class ErrorOperations:
     def log_error(user_id: int, error_type: str, error_message: str) -> bool:
         """Log error to database"""
         try:
-            db.execute_update("""
-                INSERT INTO error_log (telegram_id, error_type, error_message)
-                VALUES (?, ?, ?)
-            """, (user_id, error_type, error_message))
+            write_behind.add_error_log(user_id, error_type, error_message)
             return True
         except Exception as e:
             logger.error(f"❌ Error logging error: {e}")
-            return False
\ No newline at end of file
+            return False
+
+class SellOrderOperations:
+    """Append-only sell order ledger"""
+    
+    ORDER_COLUMNS = "id, order_id, telegram_id, platform, transfer_type, amount, price, status, created_at"
+    INSERT_ORDER = """
+        INSERT INTO sell_orders
+            (order_id, telegram_id, platform, transfer_type, amount, price, status, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    @staticmethod
+    def _row_to_dict(row) -> Dict:
+        return {
+            "id": row[0],
+            "order_id": row[1],
+            "telegram_id": row[2],
+            "platform": row[3],
+            "transfer_type": row[4],
+            "amount": row[5],
+            "price": row[6],
+            "status": row[7],
+            "created_at": row[8],
+        }
+    
+    @staticmethod
+    def create_order(user_id: int, platform: str, transfer_type: str, amount: int, price: int) -> Optional[str]:
+        """
+        Record a sell order and return its order ID.
+        The ID is generated in-process; the row is committed before this
+        returns, so a confirmed order survives a crash. Returns None on failure.
+        """
+        try:
+            order_id = sell_order_ids.next_id()
+            created_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            with db.transaction() as conn:
+                conn.execute(SellOrderOperations.INSERT_ORDER, (
+                    order_id, user_id, platform, transfer_type, amount, price, 'open', created_at
+                ))
+            logger.info(f"✅ Sell order {order_id} saved for user {user_id}")
+            return order_id
+        except Exception as e:
+            logger.error(f"❌ Error creating sell order: {e}")
+            return None
+    
+    @staticmethod
+    def get_orders_page(status: str = 'open', after: Optional[Tuple[str, int]] = None,
+                        limit: int = 20) -> Tuple[List[Dict], Optional[Tuple[str, int]]]:
+        """
+        Keyset-paginated orders by status, oldest first.
+        Pass the returned cursor as `after` to fetch the next page; cost per page
+        stays constant no matter how deep the admin pages (no OFFSET).
+        """
+        try:
+            if after is None:
+                result = db.execute_query(f"""
+                    SELECT {SellOrderOperations.ORDER_COLUMNS} FROM sell_orders
+                    WHERE status = ?
+                    ORDER BY created_at, id LIMIT ?
+                """, (status, limit))
+            else:
+                result = db.execute_query(f"""
+                    SELECT {SellOrderOperations.ORDER_COLUMNS} FROM sell_orders
+                    WHERE status = ? AND (created_at, id) > (?, ?)
+                    ORDER BY created_at, id LIMIT ?
+                """, (status, after[0], after[1], limit))
+            
+            orders = [SellOrderOperations._row_to_dict(row) for row in result]
+            cursor = (orders[-1]["created_at"], orders[-1]["id"]) if len(orders) == limit else None
+            return orders, cursor
+        except Exception as e:
+            logger.error(f"❌ Error getting sell orders page: {e}")
+            return [], None
+    
+    @staticmethod
+    def get_user_orders(user_id: int, limit: int = 20) -> List[Dict]:
+        """Latest orders of one user"""
+        try:
+            result = db.execute_query(f"""
+                SELECT {SellOrderOperations.ORDER_COLUMNS} FROM sell_orders
+                WHERE telegram_id = ?
+                ORDER BY id DESC LIMIT ?
+            """, (user_id, limit))
+            return [SellOrderOperations._row_to_dict(row) for row in result]
+        except Exception as e:
+            logger.error(f"❌ Error getting user orders: {e}")
+            return []
+    
+    @staticmethod
+    def count_orders(status: str = 'open') -> int:
+        """Number of orders with a status"""
+        try:
+            result = db.execute_query("SELECT COUNT(*) FROM sell_orders WHERE status = ?", (status,))
+            return result[0][0] if result else 0
+        except Exception as e:
+            logger.error(f"❌ Error counting sell orders: {e}")
+            return 0
+
+class BroadcastOperations:
+    """Resumable broadcast jobs and their recipients"""
+
+    BROADCAST_COLUMNS = ("id, kind, text, status, created_by, last_telegram_id, total, "
+                         "sent, failed, blocked, progress_chat_id, progress_message_id")
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict:
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "text": row[2],
+            "status": row[3],
+            "created_by": row[4],
+            "last_telegram_id": row[5],
+            "total": row[6],
+            "sent": row[7],
+            "failed": row[8],
+            "blocked": row[9],
+            "progress_chat_id": row[10],
+            "progress_message_id": row[11],
+        }
+
+    @staticmethod
+    def create_broadcast(kind: str, text: str, created_by: int) -> Optional[Dict]:
+        """
+        Create a running broadcast addressed to every completed, non-blocked user.
+        The recipient count is taken once here so progress and ETA have a total.
+        """
+        try:
+            with db.transaction() as conn:
+                total = conn.execute(
+                    "SELECT COUNT(*) FROM users "
+                    "WHERE registration_step = 'completed' AND blocked_at IS NULL"
+                ).fetchone()[0]
+                cursor = conn.execute(
+                    "INSERT INTO broadcasts (kind, text, created_by, total) VALUES (?, ?, ?, ?)",
+                    (kind, text, created_by, total)
+                )
+                broadcast_id = cursor.lastrowid
+            logger.info(f"✅ Broadcast {broadcast_id} ({kind}) created for {total} users")
+            return BroadcastOperations.get_broadcast(broadcast_id)
+        except Exception as e:
+            logger.error(f"❌ Error creating broadcast: {e}")
+            return None
+
+    @staticmethod
+    def get_broadcast(broadcast_id: int) -> Optional[Dict]:
+        """One broadcast by id"""
+        try:
+            result = db.execute_query(
+                f"SELECT {BroadcastOperations.BROADCAST_COLUMNS} FROM broadcasts WHERE id = ?",
+                (broadcast_id,)
+            )
+            return BroadcastOperations._row_to_dict(result[0]) if result else None
+        except Exception as e:
+            logger.error(f"❌ Error getting broadcast {broadcast_id}: {e}")
+            return None
+
+    @staticmethod
+    def get_unfinished() -> List[Dict]:
+        """Broadcasts interrupted by a restart, oldest first"""
+        try:
+            result = db.execute_query(
+                f"SELECT {BroadcastOperations.BROADCAST_COLUMNS} FROM broadcasts "
+                f"WHERE status = 'running' ORDER BY id"
+            )
+            return [BroadcastOperations._row_to_dict(row) for row in result]
+        except Exception as e:
+            logger.error(f"❌ Error getting unfinished broadcasts: {e}")
+            return []
+
+    @staticmethod
+    def get_recipients_page(after: int = 0, limit: int = 100) -> Optional[List[int]]:
+        """
+        Keyset-paginated recipients: completed, non-blocked users with
+        telegram_id > after. Walks idx_users_registration_step in rowid order,
+        so every page costs the same however far the broadcast has got.
+        An empty list is the end of the recipients; None is a database error.
+        """
+        try:
+            result = db.execute_query("""
+                SELECT telegram_id FROM users
+                WHERE registration_step = 'completed' AND blocked_at IS NULL AND telegram_id > ?
+                ORDER BY telegram_id LIMIT ?
+            """, (after, limit))
+            return [row[0] for row in result]
+        except Exception as e:
+            logger.error(f"❌ Error getting broadcast recipients: {e}")
+            return None
+
+    @staticmethod
+    def set_progress_message(broadcast_id: int, chat_id: int, message_id: int) -> bool:
+        """Remember the admin message that shows live progress"""
+        try:
+            db.execute_update(
+                "UPDATE broadcasts SET progress_chat_id = ?, progress_message_id = ? WHERE id = ?",
+                (chat_id, message_id, broadcast_id)
+            )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error saving broadcast progress message: {e}")
+            return False
+
+    @staticmethod
+    def checkpoint(broadcast_id: int, last_telegram_id: int, sent: int, failed: int,
+                   blocked: int, blocked_ids: List[int] = ()) -> bool:
+        """
+        Persist the cursor and counters after a batch, and mark the users who
+        blocked the bot, in one transaction. A restart resumes after
+        last_telegram_id.
+        """
+        try:
+            with db.transaction() as conn:
+                conn.execute("""
+                    UPDATE broadcasts
+                    SET last_telegram_id = ?, sent = ?, failed = ?, blocked = ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (last_telegram_id, sent, failed, blocked, broadcast_id))
+                if blocked_ids:
+                    conn.executemany(
+                        "UPDATE users SET blocked_at = CURRENT_TIMESTAMP WHERE telegram_id = ?",
+                        ((user_id,) for user_id in blocked_ids)
+                    )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error checkpointing broadcast {broadcast_id}: {e}")
+            return False
+
+    @staticmethod
+    def finish(broadcast_id: int, status: str = 'done') -> bool:
+        """Close a broadcast so it is not resumed again"""
+        try:
+            db.execute_update("""
+                UPDATE broadcasts
+                SET status = ?, updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (status, broadcast_id))
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error finishing broadcast {broadcast_id}: {e}")
+            return False
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 BENCHMARK (للتطوير فقط) - python -m database.operations
+# ═══════════════════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+    from database.connection import ConnectionPool
+
+    def _legacy_save_user_step(user_id: int, step: str, data: Dict = None):
+        """Previous path: SELECT, then UPDATE or INSERT, then log insert (3 commits)"""
+        existing = db.execute_query(
+            "SELECT telegram_id FROM users WHERE telegram_id = ?", (user_id,)
+        )
+        if existing:
+            query = "UPDATE users SET registration_step = ?, updated_at = CURRENT_TIMESTAMP"
+            params = [step, user_id]
+            for key, value in (data or {}).items():
+                query += f", {key} = ?"
+                params.insert(-1, value)
+            db.execute_update(query + " WHERE telegram_id = ?", tuple(params))
+        else:
+            data = data or {}
+            db.execute_update("""
+                INSERT INTO users (telegram_id, platform, whatsapp, payment_method, payment_details, registration_step)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (user_id, data.get('platform'), data.get('whatsapp'),
+                  data.get('payment_method'), data.get('payment_details'), step))
+        db.execute_update("""
+            INSERT INTO registration_log (telegram_id, step, data)
+            VALUES (?, ?, ?)
+        """, (user_id, step, str(data) if data else None))
+
+    # Registration flow: 4 steps per user, first one inserts the row
+    steps = [
+        ('platform_selected', {'platform': 'playstation'}),
+        ('whatsapp_entered', {'whatsapp': '01012345678'}),
+        ('payment_selected', {'payment_method': 'vodafone_cash'}),
+        ('completed', {'payment_details': '01012345678'}),
+    ]
+    users_count = 500
+
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Point the global db at a scratch file - the real database is never touched
+        db.pool = ConnectionPool(os.path.join(tmp, 'bench.db'))
+        from database.models import DatabaseModels
+        DatabaseModels.create_all_tables()
+
+        print(f"🧪 save_user_step benchmark - {users_count} users x {len(steps)} steps\n")
+        results = {}
+        for label, func, offset in (("legacy (SELECT + UPDATE/INSERT + log)", _legacy_save_user_step, 0),
+                                    ("upsert (single transaction)", UserOperations.save_user_step, 10**6)):
+            start = time.perf_counter()
+            for user_id in range(offset, offset + users_count):
+                for step, data in steps:
+                    func(user_id, step, data)
+            elapsed = time.perf_counter() - start
+            per_step_us = elapsed / (users_count * len(steps)) * 1_000_000
+            results[label] = per_step_us
+            print(f"   {label:<40} {elapsed:7.3f}s  {per_step_us:8.1f} µs/step")
+
+        # Sell order paging: keyset vs OFFSET on a large ledger
+        orders_count = 300_000
+        print(f"\n🧪 sell_orders paging - {orders_count:,} orders, 20 per page\n")
+        with db.transaction() as conn:
+            conn.executemany(
+                SellOrderOperations.INSERT_ORDER,
+                ((sell_order_ids.next_id(), i % 5000, 'pc', 'normal', 1000, 6,
+                  'open' if i % 3 else 'done', f"2026-01-01 00:{i // 6000 % 60:02d}:{i // 100 % 60:02d}")
+                 for i in range(orders_count))
+            )
+
+        start = time.perf_counter()
+        pages, cursor = 0, None
+        while True:
+            page, cursor = SellOrderOperations.get_orders_page('open', cursor, 20)
+            pages += 1
+            if cursor is None:
+                break
+        keyset_ms = (time.perf_counter() - start) / pages * 1000
+        print(f"   keyset: {pages:,} pages, {keyset_ms:.3f} ms/page (constant with depth)")
+
+        start = time.perf_counter()
+        db.execute_query(
+            "SELECT * FROM sell_orders WHERE status = 'open' ORDER BY created_at, id LIMIT 20 OFFSET ?",
+            (pages * 20 - 20,)
+        )
+        print(f"   OFFSET for the last page: {(time.perf_counter() - start) * 1000:.3f} ms")
+
+        db.pool.close_all()
+
+    legacy, upsert = results.values()
+    print(f"\n✅ save_user_step speedup: {legacy / upsert:.2f}x")
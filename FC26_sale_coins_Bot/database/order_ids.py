@@ -0,0 +1,57 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🆔 FC26 ORDER IDS - أرقام الطلبات                            ║
+# ║                  Compact Unique IDs Without a DB Round Trip              ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+Order IDs are base36(milliseconds since EPOCH) + base36(sequence, 2 chars),
+e.g. "S7K2MZQ4X01". They sort by creation time, fit in 11 characters and
+need no database access. The sequence disambiguates orders created in the
+same millisecond; the clock never moves backwards for the generator.
+"""
+
+import threading
+import time
+
+_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+def to_base36(value: int) -> str:
+    if value == 0:
+        return "0"
+    digits = []
+    while value:
+        value, rem = divmod(value, 36)
+        digits.append(_ALPHABET[rem])
+    return "".join(reversed(digits))
+
+class OrderIdGenerator:
+    """Thread-safe, monotonic order ID generator"""
+
+    EPOCH_MS = 1735689600000  # 2025-01-01 UTC
+    SEQUENCE_WIDTH = 2
+    MAX_SEQUENCE = 36 ** SEQUENCE_WIDTH - 1
+
+    def __init__(self, prefix: str = "S"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_id(self) -> str:
+        with self._lock:
+            now_ms = int(time.time() * 1000) - self.EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # Same millisecond (or clock went back) - bump the sequence
+                self._sequence += 1
+                if self._sequence > self.MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            ms, sequence = self._last_ms, self._sequence
+
+        return f"{self.prefix}{to_base36(ms)}{to_base36(sequence).rjust(self.SEQUENCE_WIDTH, '0')}"
+
+# Global generator for sell orders
+sell_order_ids = OrderIdGenerator("S")
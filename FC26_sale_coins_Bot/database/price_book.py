@@ -0,0 +1,144 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              📒 FC26 PRICE BOOK - دفتر الأسعار في الذاكرة                 ║
+# ║                  Immutable Versioned Price Snapshots                     ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+In-memory copy of the coin_prices table.
+
+Readers get O(1) dict lookups on an immutable snapshot with no I/O. Writers
+(AdminOperations._update_price_sync, after its commit) build a new snapshot
+and swap the reference in one assignment, so a reader always sees either the
+old or the new prices - never a mix. Every publish bumps the version counter.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PriceKey = Tuple[str, str, int]  # (platform, transfer_type, amount)
+
+class PriceSnapshot:
+    """One immutable version of the price table"""
+
+    __slots__ = ('version', 'prices', 'rows', 'loaded_at')
+
+    def __init__(self, version: int, rows: List[Dict]):
+        self.version = version
+        self.rows = tuple(MappingProxyType(dict(row)) for row in rows)
+        self.prices: Mapping[PriceKey, int] = MappingProxyType({
+            (row['platform'], row['transfer_type'], row['amount']): row['price']
+            for row in rows
+        })
+        self.loaded_at = datetime.now().isoformat()
+
+class PriceBook:
+    """Holds the current PriceSnapshot and publishes replacements atomically"""
+
+    def __init__(self):
+        self._snapshot: Optional[PriceSnapshot] = None
+        self._version = 0
+        # Serializes publishers; readers never take it
+        self._publish_lock = threading.Lock()
+        self._lookups = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def publish(self, rows: List[Dict]) -> int:
+        """Replace the whole book (startup load / reload). Returns the new version."""
+        with self._publish_lock:
+            self._version += 1
+            self._snapshot = PriceSnapshot(self._version, rows)
+        logger.info(f"📒 Price book v{self._version} published ({len(rows)} prices)")
+        return self._version
+
+    def apply_update(self, platform: str, transfer_type: str, amount: int, price: int,
+                     updated_at: Optional[str] = None) -> int:
+        """Publish a copy of the current snapshot with one price changed"""
+        with self._publish_lock:
+            current = self._snapshot
+            rows = [dict(row) for row in current.rows] if current else []
+            for row in rows:
+                if (row['platform'], row['transfer_type'], row['amount']) == (platform, transfer_type, amount):
+                    row['price'] = price
+                    row['updated_at'] = updated_at
+                    break
+            else:
+                rows.append({
+                    'platform': platform,
+                    'transfer_type': transfer_type,
+                    'amount': amount,
+                    'price': price,
+                    'updated_at': updated_at,
+                })
+                rows.sort(key=lambda row: (row['platform'], row['transfer_type'], row['amount']))
+
+            self._version += 1
+            self._snapshot = PriceSnapshot(self._version, rows)
+        logger.info(f"📒 Price book v{self._version}: {platform} {transfer_type} {amount} -> {price}")
+        return self._version
+
+    def ensure_loaded(self, loader: Callable[[], List[Dict]]):
+        """Load the book once, on first use, if startup didn't already"""
+        if self._snapshot is not None:
+            return
+        with self._publish_lock:
+            if self._snapshot is not None:
+                return
+            rows = loader()
+            self._version += 1
+            self._snapshot = PriceSnapshot(self._version, rows)
+
+    def get(self, platform: str, transfer_type: str, amount: int) -> Optional[int]:
+        """O(1) price lookup - no I/O"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        self._lookups += 1
+        return snapshot.prices.get((platform, transfer_type, amount))
+
+    def get_all(self) -> List[Dict]:
+        """All prices as plain dicts (same shape as AdminOperations.get_all_prices)"""
+        snapshot = self._snapshot
+        return [dict(row) for row in snapshot.rows] if snapshot else []
+
+    def diff(self, rows: List[Dict]) -> List[Dict]:
+        """Compare the book with rows read from the database; returns mismatches"""
+        snapshot = self._snapshot
+        book = dict(snapshot.prices) if snapshot else {}
+        database = {
+            (row['platform'], row['transfer_type'], row['amount']): row['price']
+            for row in rows
+        }
+        mismatches = []
+        for key in sorted(set(book) | set(database)):
+            if book.get(key) != database.get(key):
+                mismatches.append({
+                    'key': key,
+                    'book_price': book.get(key),
+                    'db_price': database.get(key),
+                })
+        return mismatches
+
+    def get_stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'loaded': snapshot is not None,
+            'version': self._version,
+            'prices': len(snapshot.prices) if snapshot else 0,
+            'loaded_at': snapshot.loaded_at if snapshot else None,
+            'lookups': self._lookups,
+        }
+
+# Global price book
+price_book = PriceBook()
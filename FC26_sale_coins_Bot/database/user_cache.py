@@ -0,0 +1,106 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🗂️ FC26 USER CACHE - ذاكرة مؤقتة لبيانات المستخدمين          ║
+# ║                  Read-through LRU/TTL Profile Cache                      ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from config import CACHE_CONFIG
+
+# Marker stored for users known NOT to exist (negative lookup)
+_MISSING = object()
+
+class UserCache:
+    """Thread-safe LRU cache with TTL keyed by telegram_id, including negative entries"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300, negative_ttl: float = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._entries: "OrderedDict[int, Tuple[object, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Statistics
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, user_id: int) -> Tuple[bool, Optional[Dict]]:
+        """
+        Look up a profile.
+        Returns (found, data): found=False means the database must be queried;
+        found=True with data=None is a cached "user does not exist".
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self._misses += 1
+                return False, None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                self._misses += 1
+                return False, None
+
+            self._entries.move_to_end(user_id)
+            if value is _MISSING:
+                self._negative_hits += 1
+                return True, None
+            self._hits += 1
+            # Copy so callers can't mutate the cached profile
+            return True, dict(value)
+
+    def put(self, user_id: int, data: Optional[Dict]):
+        """Cache a profile, or a negative entry when data is None"""
+        if self.max_size <= 0:
+            return
+        if data is None:
+            value, ttl = _MISSING, self.negative_ttl
+        else:
+            value, ttl = dict(data), self.ttl
+
+        with self._lock:
+            self._entries[user_id] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, user_id: int):
+        """Drop an entry after a write"""
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Hit ratio and size - used to tune user_cache_size"""
+        with self._lock:
+            lookups = self._hits + self._negative_hits + self._misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self._hits,
+                'negative_hits': self._negative_hits,
+                'misses': self._misses,
+                'hit_ratio': round((self._hits + self._negative_hits) / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
+
+# Global user profile cache
+user_cache = UserCache(
+    max_size=CACHE_CONFIG.get('user_cache_size', 10000),
+    ttl=CACHE_CONFIG.get('user_cache_ttl', 300),
+    negative_ttl=CACHE_CONFIG.get('user_cache_negative_ttl', 60),
+)
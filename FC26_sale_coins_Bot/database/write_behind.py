@@ -0,0 +1,262 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              📮 FC26 WRITE-BEHIND QUEUE - طابور الكتابة المؤجلة           ║
+# ║                  Batched Audit & Metric Writes                           ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+Write-behind buffer for audit and metric rows.
+
+registration_log / error_log rows and statistics increments are buffered in
+memory and written by a background flusher thread with executemany inside one
+transaction, every flush_interval_ms or as soon as max_batch rows are pending.
+Timestamps are captured at enqueue time so delayed rows keep their real time.
+
+A failed flush is retried up to max_retries times (a locked or busy database
+usually recovers). After that each table is written on its own and the batch is
+bisected to find the rows the database rejects (UNIQUE violations, missing
+table before a migration); those rows are dropped into a bounded dead-letter
+buffer so one bad row cannot block every later audit and metric write.
+
+Call write_behind.flush() before reading these tables back when exact
+read-after-write is needed, and write_behind.shutdown() on exit.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from config import WRITE_BEHIND_CONFIG
+from database.connection import db
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    """Buffers audit/metric rows and flushes them in batches on a background thread"""
+
+    INSERT_REGISTRATION_LOG = """
+        INSERT INTO registration_log (telegram_id, step, data, timestamp)
+        VALUES (?, ?, ?, ?)
+    """
+    INSERT_ERROR_LOG = """
+        INSERT INTO error_log (telegram_id, error_type, error_message, timestamp)
+        VALUES (?, ?, ?, ?)
+    """
+    UPSERT_STATISTIC = """
+        INSERT INTO statistics (date, metric_name, metric_value)
+        VALUES (?, ?, ?)
+        ON CONFLICT(date, metric_name) DO UPDATE
+        SET metric_value = metric_value + excluded.metric_value
+    """
+
+    def __init__(self, flush_interval_ms: int = 500, max_batch: int = 200,
+                 max_retries: int = 3, dead_letter_size: int = 1000):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+
+        self._cond = threading.Condition()
+        self._registration_rows: List[Tuple] = []
+        self._error_rows: List[Tuple] = []
+        # Increments for the same (date, metric) are summed before hitting the db
+        self._metric_deltas: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._pending = 0
+
+        self._thread = None
+        self._stopping = False
+        # Serializes flushes between the flusher thread and explicit flush() calls
+        self._flush_lock = threading.Lock()
+        # Consecutive failed flushes of the batch at the front of the queue
+        self._retries = 0
+        # (table, row, error) of rows the database rejected
+        self.dead_letters = deque(maxlen=dead_letter_size)
+
+        # Statistics
+        self._enqueued = 0
+        self._rows_written = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._dead_lettered = 0
+        self._flush_time_total = 0.0
+        self._flush_time_max = 0.0
+        self._last_flush_at = None
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # Enqueue
+    # ═══════════════════════════════════════════════════════════════════════
+
+    @staticmethod
+    def _now() -> str:
+        """UTC timestamp in the same format as sqlite CURRENT_TIMESTAMP"""
+        return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+    def _enqueue(self, append):
+        with self._cond:
+            append()
+            self._pending += 1
+            self._enqueued += 1
+            if self._thread is None:
+                self._start()
+            if self._pending >= self.max_batch:
+                self._cond.notify()
+
+    def add_registration_log(self, user_id: int, step: str, data: str = None):
+        row = (user_id, step, data, self._now())
+        self._enqueue(lambda: self._registration_rows.append(row))
+
+    def add_error_log(self, user_id: int, error_type: str, error_message: str):
+        row = (user_id, error_type, error_message, self._now())
+        self._enqueue(lambda: self._error_rows.append(row))
+
+    def add_metric(self, metric_name: str, value: int = 1):
+        key = (datetime.utcnow().strftime('%Y-%m-%d'), metric_name)
+
+        def append():
+            self._metric_deltas[key] += value
+        self._enqueue(append)
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # Flushing
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _start(self):
+        """Start the flusher thread (called with _cond held)"""
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="WriteBehind", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and self._pending < self.max_batch:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def _take_batch(self):
+        with self._cond:
+            batch = (self._registration_rows, self._error_rows, self._metric_deltas)
+            count = self._pending
+            self._registration_rows = []
+            self._error_rows = []
+            self._metric_deltas = defaultdict(int)
+            self._pending = 0
+        return batch, count
+
+    def _requeue(self, batch):
+        """Put a failed batch back in front of newer rows"""
+        registration_rows, error_rows, metric_deltas = batch
+        with self._cond:
+            self._registration_rows[:0] = registration_rows
+            self._error_rows[:0] = error_rows
+            for key, value in metric_deltas.items():
+                self._metric_deltas[key] += value
+            self._pending += len(registration_rows) + len(error_rows) + len(metric_deltas)
+
+    def _statements(self, batch) -> List[Tuple[str, str, List[Tuple]]]:
+        """(table, sql, rows) for every non-empty part of a batch"""
+        registration_rows, error_rows, metric_deltas = batch
+        statements = [
+            ('registration_log', self.INSERT_REGISTRATION_LOG, registration_rows),
+            ('error_log', self.INSERT_ERROR_LOG, error_rows),
+            ('statistics', self.UPSERT_STATISTIC,
+             [(date, name, value) for (date, name), value in metric_deltas.items()]),
+        ]
+        return [statement for statement in statements if statement[2]]
+
+    def _write_isolated(self, table: str, sql: str, rows: List[Tuple]) -> int:
+        """Write rows, bisecting on failure; rows rejected on their own are dead-lettered"""
+        try:
+            with db.transaction() as conn:
+                conn.executemany(sql, rows)
+            return len(rows)
+        except Exception as e:
+            if len(rows) == 1:
+                self._dead_lettered += 1
+                self.dead_letters.append((table, rows[0], str(e)))
+                logger.error(f"❌ Write-behind dropped a {table} row: {e} - {rows[0]}")
+                return 0
+        middle = len(rows) // 2
+        return (self._write_isolated(table, sql, rows[:middle])
+                + self._write_isolated(table, sql, rows[middle:]))
+
+    def flush(self) -> int:
+        """Write everything pending in one transaction. Returns rows written."""
+        with self._flush_lock:
+            batch, count = self._take_batch()
+            if not count:
+                return 0
+
+            statements = self._statements(batch)
+            start = time.perf_counter()
+            try:
+                with db.transaction() as conn:
+                    for _, sql, rows in statements:
+                        conn.executemany(sql, rows)
+            except Exception as e:
+                self._failed_flushes += 1
+                self._retries += 1
+                if self._retries < self.max_retries:
+                    logger.error(f"❌ Write-behind flush failed ({count} rows requeued): {e}")
+                    self._requeue(batch)
+                    return 0
+                logger.error(
+                    f"❌ Write-behind flush failed {self._retries} times ({e}) - isolating bad rows"
+                )
+                written = sum(self._write_isolated(table, sql, rows) for table, sql, rows in statements)
+            else:
+                written = sum(len(rows) for _, _, rows in statements)
+            self._retries = 0
+
+            elapsed = time.perf_counter() - start
+            self._flushes += 1
+            self._rows_written += written
+            self._flush_time_total += elapsed
+            self._flush_time_max = max(self._flush_time_max, elapsed)
+            self._last_flush_at = datetime.now().isoformat()
+            return written
+
+    def shutdown(self):
+        """Stop the flusher thread after a final flush"""
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._thread = None
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+        # Rows enqueued while the thread was stopping - retried until bad rows are isolated
+        for _ in range(self.max_retries):
+            self.flush()
+            if not self._pending:
+                break
+        logger.info(f"✅ Write-behind queue flushed on shutdown ({self._rows_written} rows total)")
+
+    def get_stats(self) -> Dict:
+        """Queue depth and flush latency"""
+        with self._cond:
+            pending = self._pending
+        return {
+            'queue_depth': pending,
+            'enqueued': self._enqueued,
+            'rows_written': self._rows_written,
+            'flushes': self._flushes,
+            'failed_flushes': self._failed_flushes,
+            'dead_lettered': self._dead_lettered,
+            'avg_rows_per_flush': round(self._rows_written / self._flushes, 1) if self._flushes else 0.0,
+            'flush_latency_avg_ms': round(self._flush_time_total / self._flushes * 1000, 2) if self._flushes else 0.0,
+            'flush_latency_max_ms': round(self._flush_time_max * 1000, 2),
+            'last_flush_at': self._last_flush_at,
+        }
+
+# Global write-behind queue
+write_behind = WriteBehindQueue(
+    flush_interval_ms=WRITE_BEHIND_CONFIG.get('flush_interval_ms', 500),
+    max_batch=WRITE_BEHIND_CONFIG.get('max_batch', 200),
+    max_retries=WRITE_BEHIND_CONFIG.get('max_retries', 3),
+    dead_letter_size=WRITE_BEHIND_CONFIG.get('dead_letter_size', 1000),
+)
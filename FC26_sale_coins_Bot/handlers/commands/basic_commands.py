@@ -12,7 +12,7 @@
 
 from telegram.ext import CommandHandler
 
-from database.operations import UserOperations
+from database.async_gateway import users
 from handlers.profile_delete_handler import ProfileDeleteHandler
 from messages.error_messages import ErrorMessages
 from messages.summary_messages import SummaryMessages
@@ -35,7 +35,7 @@ async def handle_profile(update, context):
     user_id = update.effective_user.id
     log_user_action(user_id, "Profile")
 
-    user_data = UserOperations.get_user_data(user_id)
+    user_data = await users.get_user_data(user_id)
 
     if not user_data:
         await update.message.reply_text(ErrorMessages.get_start_required_error())
@@ -54,7 +54,7 @@ async def handle_delete(update, context):
     user_id = update.effective_user.id
     log_user_action(user_id, "Delete request")
 
-    user_data = UserOperations.get_user_data(user_id)
+    user_data = await users.get_user_data(user_id)
 
     if not user_data:
         await update.message.reply_text(
@@ -4,13 +4,16 @@
 # ╚══════════════════════════════════════════════════════════════════════════╝
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes, BaseHandler
 from typing import List
 
+from core.callback_router import callback_data, callback_router
+
 # Import database operations
-from database.operations import UserOperations
+from database.async_gateway import users
 
 # Import logging utilities
+from utils.edit_coalescer import edit_coalescer
 from utils.logger import log_user_action, fc26_logger
 
 # Import messages
@@ -23,7 +26,7 @@ class ProfileDeleteHandler:
     def create_profile_management_keyboard():
         """Create keyboard for profile management with delete option"""
         keyboard = [
-            [InlineKeyboardButton("🗑️ مسح الملف الشخصي", callback_data="delete_profile_confirm")]
+            [InlineKeyboardButton("🗑️ مسح الملف الشخصي", callback_data=callback_data("profile", "delete_confirm"))]
         ]
         return InlineKeyboardMarkup(keyboard)
     
@@ -32,8 +35,8 @@ class ProfileDeleteHandler:
         """Create confirmation keyboard for profile deletion"""
         keyboard = [
             [
-                InlineKeyboardButton("❌ نعم، امسح كل شيء", callback_data="delete_profile_execute"),
-                InlineKeyboardButton("✅ لا، راجع تاني", callback_data="delete_profile_cancel")
+                InlineKeyboardButton("❌ نعم، امسح كل شيء", callback_data=callback_data("profile", "delete_execute")),
+                InlineKeyboardButton("✅ لا، راجع تاني", callback_data=callback_data("profile", "delete_cancel"))
             ]
         ]
         return InlineKeyboardMarkup(keyboard)
@@ -49,12 +52,13 @@ class ProfileDeleteHandler:
         logger.info(f"🗑️ User {user_id} requested profile deletion confirmation")
         
         try:
-            await query.answer()
+            await edit_coalescer.answer(query)
             
             # Check if user exists
-            user_data = UserOperations.get_user_data(user_id)
+            user_data = await users.get_user_data(user_id)
             if not user_data:
-                await query.edit_message_text(
+                await edit_coalescer.edit(
+                    query,
                     "❌ لم يتم العثور على ملف شخصي لحذفه!\n\n🚀 اكتب /start لبدء التسجيل",
                     parse_mode="HTML"
                 )
@@ -86,7 +90,8 @@ class ProfileDeleteHandler:
             
             keyboard = ProfileDeleteHandler.create_delete_confirmation_keyboard()
             
-            await query.edit_message_text(
+            await edit_coalescer.edit(
+                query,
                 confirmation_text,
                 reply_markup=keyboard,
                 parse_mode="HTML"
@@ -96,7 +101,8 @@ class ProfileDeleteHandler:
             
         except Exception as e:
             logger.error(f"❌ Error showing deletion confirmation for user {user_id}: {e}")
-            await query.edit_message_text(
+            await edit_coalescer.edit(
+                query,
                 ErrorMessages.get_general_error(),
                 parse_mode="HTML"
             )
@@ -112,19 +118,20 @@ class ProfileDeleteHandler:
         logger.info(f"🗑️ User {user_id} confirmed profile deletion - executing...")
         
         try:
-            await query.answer()
+            await edit_coalescer.answer(query)
             
             # Check if user exists before deletion
-            user_data = UserOperations.get_user_data(user_id)
+            user_data = await users.get_user_data(user_id)
             if not user_data:
-                await query.edit_message_text(
+                await edit_coalescer.edit(
+                    query,
                     "❌ <b>الملف الشخصي غير موجود!</b>\n\n🚀 اكتب /start لبدء التسجيل من جديد",
                     parse_mode="HTML"
                 )
                 return
             
             # Execute deletion
-            deletion_success = UserOperations.delete_user(user_id)
+            deletion_success = await users.delete_user(user_id)
             
             if deletion_success:
                 # Success message
@@ -143,14 +150,15 @@ class ProfileDeleteHandler:
 
 <b>👋 شكراً لاستخدامك بوت FC26</b>"""
                 
-                await query.edit_message_text(success_message, parse_mode="HTML")
+                await edit_coalescer.edit(query, success_message, parse_mode="HTML")
                 
                 log_user_action(user_id, f"Profile deletion completed successfully", f"@{username}")
                 logger.info(f"✅ User {user_id} profile deleted successfully")
                 
             else:
                 # Failure message
-                await query.edit_message_text(
+                await edit_coalescer.edit(
+                    query,
                     "❌ <b>حدث خطأ أثناء مسح الملف الشخصي!</b>\n\n🔄 الرجاء المحاولة مرة أخرى أو التواصل مع الدعم الفني",
                     parse_mode="HTML"
                 )
@@ -158,7 +166,8 @@ class ProfileDeleteHandler:
         
         except Exception as e:
             logger.error(f"❌ Error executing profile deletion for user {user_id}: {e}")
-            await query.edit_message_text(
+            await edit_coalescer.edit(
+                query,
                 ErrorMessages.get_general_error(),
                 parse_mode="HTML"
             )
@@ -174,7 +183,7 @@ class ProfileDeleteHandler:
         logger.info(f"🚫 User {user_id} cancelled profile deletion")
         
         try:
-            await query.answer("تم الإلغاء - لم يحدث أي تغيير")
+            await edit_coalescer.answer(query, "تم الإلغاء - لم يحدث أي تغيير")
             
             cancellation_message = """✅ <b>تم إلغاء العملية بنجاح!</b>
 
@@ -188,23 +197,30 @@ class ProfileDeleteHandler:
 
 <b>💚 شكراً لك على الحذر!</b>"""
 
-            await query.edit_message_text(cancellation_message, parse_mode="HTML")
+            await edit_coalescer.edit(query, cancellation_message, parse_mode="HTML")
             
             log_user_action(user_id, f"Profile deletion cancelled", f"@{username}")
             
         except Exception as e:
             logger = fc26_logger.get_logger()
             logger.error(f"❌ Error handling deletion cancellation for user {user_id}: {e}")
-            await query.edit_message_text(
+            await edit_coalescer.edit(
+                query,
                 ErrorMessages.get_general_error(),
                 parse_mode="HTML"
             )
     
     @staticmethod
-    def get_handlers() -> List[CallbackQueryHandler]:
+    def get_handlers() -> List[BaseHandler]:
         """Get all callback handlers for profile deletion"""
         return [
-            CallbackQueryHandler(ProfileDeleteHandler.handle_delete_confirmation, pattern="^delete_profile_confirm$"),
-            CallbackQueryHandler(ProfileDeleteHandler.handle_delete_execution, pattern="^delete_profile_execute$"),
-            CallbackQueryHandler(ProfileDeleteHandler.handle_delete_cancellation, pattern="^delete_profile_cancel$")
+            callback_router.handler("profile.delete", {
+                "profile:delete_confirm": ProfileDeleteHandler.handle_delete_confirmation,
+                "profile:delete_execute": ProfileDeleteHandler.handle_delete_execution,
+                "profile:delete_cancel": ProfileDeleteHandler.handle_delete_cancellation,
+            }, legacy={
+                "delete_profile_confirm": "profile:delete_confirm",
+                "delete_profile_execute": "profile:delete_execute",
+                "delete_profile_cancel": "profile:delete_cancel",
+            })
         ]
\ No newline at end of file
@@ -13,7 +13,8 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import MessageHandler, filters
 
-from database.operations import UserOperations
+from core.callback_router import callback_data
+from database.async_gateway import users
 from utils.message_tagger import MessageTagger
 
 
@@ -57,7 +58,7 @@ async def global_recovery_router(update, context):
 
     print(f"   🔍 No active conversation - checking database...")
 
-    user_data = UserOperations.get_user_data(user_id)
+    user_data = await users.get_user_data(user_id)
 
     if not user_data:
         print(f"   🆕 New user detected")
@@ -108,8 +109,8 @@ async def global_recovery_router(update, context):
 <b>❓ تحب تكمل ولا تبدأ من جديد؟</b>"""
 
         keyboard = [
-            [InlineKeyboardButton("✅ متابعة", callback_data="reg_continue")],
-            [InlineKeyboardButton("🔄 بدء من جديد", callback_data="reg_restart")],
+            [InlineKeyboardButton("✅ متابعة", callback_data=callback_data("reg", "continue"))],
+            [InlineKeyboardButton("🔄 بدء من جديد", callback_data=callback_data("reg", "restart"))],
         ]
 
         await update.message.reply_text(
@@ -11,13 +11,15 @@
 """
 
 from telegram.ext import (
-    CallbackQueryHandler,
     CommandHandler,
     ConversationHandler,
     MessageHandler,
     filters,
 )
 
+from config import GAMING_PLATFORMS, PAYMENT_METHODS, SESSION_TTL_CONFIG
+from core.callback_router import callback_router
+
 from .handlers import RegistrationHandlers
 from .states import REG_INTERRUPTED, REG_PAYMENT, REG_PLATFORM, REG_WHATSAPP
 
@@ -25,19 +27,28 @@ from .states import REG_INTERRUPTED, REG_PAYMENT, REG_PLATFORM, REG_WHATSAPP
 def get_registration_handler():
     """إنشاء ConversationHandler للتسجيل"""
 
+    # نفس الـ handler في entry_points وفي REG_INTERRUPTED
+    interrupted_choice = callback_router.handler(
+        "registration.interrupted",
+        {
+            "reg:continue": RegistrationHandlers.handle_interrupted_choice,
+            "reg:restart": RegistrationHandlers.handle_interrupted_choice,
+        },
+        # أزرار أُرسلت قبل صيغة service:action (فترة انتقالية)
+        legacy={"reg_continue": "reg:continue", "reg_restart": "reg:restart"},
+    )
+
     return ConversationHandler(
         entry_points=[
             CommandHandler("start", RegistrationHandlers.start_registration),
-            CallbackQueryHandler(
-                RegistrationHandlers.handle_interrupted_choice,
-                pattern="^reg_(continue|restart)$",
-            ),
+            interrupted_choice,
         ],
         states={
             REG_PLATFORM: [
-                CallbackQueryHandler(
-                    RegistrationHandlers.handle_platform_callback,
-                    pattern="^platform_",
+                callback_router.handler(
+                    "registration.platform",
+                    {"reg:platform": RegistrationHandlers.handle_platform_callback},
+                    legacy={f"platform_({'|'.join(GAMING_PLATFORMS)})": r"reg:platform:\1"},
                 ),
                 MessageHandler(
                     filters.TEXT & ~filters.COMMAND,
@@ -51,9 +62,10 @@ def get_registration_handler():
                 ),
             ],
             REG_PAYMENT: [
-                CallbackQueryHandler(
-                    RegistrationHandlers.handle_payment_callback,
-                    pattern="^payment_",
+                callback_router.handler(
+                    "registration.payment",
+                    {"reg:payment": RegistrationHandlers.handle_payment_callback},
+                    legacy={f"payment_({'|'.join(PAYMENT_METHODS)})": r"reg:payment:\1"},
                 ),
                 MessageHandler(
                     filters.TEXT & ~filters.COMMAND,
@@ -61,10 +73,7 @@ def get_registration_handler():
                 ),
             ],
             REG_INTERRUPTED: [
-                CallbackQueryHandler(
-                    RegistrationHandlers.handle_interrupted_choice,
-                    pattern="^reg_(continue|restart)$",
-                ),
+                interrupted_choice,
                 MessageHandler(
                     filters.TEXT & ~filters.COMMAND,
                     RegistrationHandlers.nudge_interrupted,
@@ -74,6 +83,7 @@ def get_registration_handler():
         fallbacks=[CommandHandler("cancel", RegistrationHandlers.cancel_registration)],
         name="registration",
         persistent=True,  # 🔥 تفعيل Persistence
+        conversation_timeout=SESSION_TTL_CONFIG["idle_ttl_seconds"],  # ⏳ إنهاء المحادثة الخاملة
         per_user=True,
         allow_reentry=True,
         block=True,
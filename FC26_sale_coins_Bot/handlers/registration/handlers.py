@@ -12,13 +12,14 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ConversationHandler
 
-from database.operations import StatisticsOperations, UserOperations
+from core.callback_router import callback_data, parse_callback_data
+from database.async_gateway import stats, users
 from keyboards.payment_keyboard import PaymentKeyboard
 from keyboards.platform_keyboard import PlatformKeyboard
 from messages.confirmation_msgs import ConfirmationMessages
 from messages.error_messages import ErrorMessages
 from messages.welcome_messages import WelcomeMessages
-from utils.locks import is_rate_limited
+from utils.edit_coalescer import edit_coalescer
 from utils.logger import log_user_action
 from utils.message_tagger import MessageTagger
 from utils.session_bucket import bucket, clear_bucket
@@ -41,12 +42,9 @@ class RegistrationHandlers:
         print(f"🧠 [SMART-ROUTER] /start from user {user_id} (@{username})")
         print(f"{'='*80}")
 
-        if is_rate_limited(user_id):
-            print(f"🚫 [SMART-ROUTER] Rate limited")
-            await update.message.reply_text(ErrorMessages.get_rate_limit_error())
-            return ConversationHandler.END
-
         log_user_action(user_id, "Started bot", f"@{username}")
+        # /start بعد فك الحظر - يعود لقائمة مستلمي الإرسال الجماعي
+        await users.clear_blocked(user_id)
 
         print(f"🔍 [SMART-ROUTER] Checking for interrupted registration...")
 
@@ -56,7 +54,7 @@ class RegistrationHandlers:
         )
         print(f"   📝 Memory check: {has_memory_data}")
 
-        user_data = UserOperations.get_user_data(user_id)
+        user_data = await users.get_user_data(user_id)
         current_step = (
             user_data.get("registration_step", "unknown") if user_data else "unknown"
         )
@@ -108,10 +106,10 @@ class RegistrationHandlers:
             keyboard = [
                 [
                     InlineKeyboardButton(
-                        "✅ متابعة من حيث توقفت", callback_data="reg_continue"
+                        "✅ متابعة من حيث توقفت", callback_data=callback_data("reg", "continue")
                     )
                 ],
-                [InlineKeyboardButton("🔄 البدء من جديد", callback_data="reg_restart")],
+                [InlineKeyboardButton("🔄 البدء من جديد", callback_data=callback_data("reg", "restart"))],
             ]
 
             await update.message.reply_text(
@@ -148,10 +146,10 @@ class RegistrationHandlers:
         MessageTagger.mark_as_handled(context)
 
         query = update.callback_query
-        await query.answer()
+        await edit_coalescer.answer(query)
 
         user_id = query.from_user.id
-        choice = query.data
+        _, choice, _ = parse_callback_data(query.data)
 
         print(f"\n{'='*80}")
         print(f"🎯 [INTERRUPTED-CHOICE] User {user_id}: {choice}")
@@ -159,13 +157,14 @@ class RegistrationHandlers:
 
         reg_bucket = bucket(context, "reg")
 
-        if choice == "reg_restart":
+        if choice == "restart":
             print(f"🔄 [INTERRUPTED-CHOICE] RESTART chosen")
 
             clear_bucket(context, "reg")
 
             keyboard = PlatformKeyboard.create_platform_selection_keyboard()
-            await query.edit_message_text(
+            await edit_coalescer.edit(
+                query,
                 "🔄 <b>حسناً، لنبدأ من جديد!</b>\n\n"
                 + WelcomeMessages.get_start_message(),
                 reply_markup=keyboard,
@@ -178,7 +177,7 @@ class RegistrationHandlers:
 
             return REG_PLATFORM
 
-        elif choice == "reg_continue":
+        elif choice == "continue":
             print(f"✅ [INTERRUPTED-CHOICE] CONTINUE chosen")
 
             interrupted_step = reg_bucket.get("interrupted_step")
@@ -191,7 +190,8 @@ class RegistrationHandlers:
             if not platform:
                 print(f"   ⚠️ [EDGE-CASE] Data lost - auto restart")
 
-                await query.edit_message_text(
+                await edit_coalescer.edit(
+                    query,
                     "😔 <b>عذراً، حدث خطأ في استرجاع بياناتك.</b>\n\n🔄 لنبدأ من جديد...",
                     parse_mode="HTML",
                 )
@@ -215,7 +215,8 @@ class RegistrationHandlers:
                 print(f"   ➡️ Continuing at: WHATSAPP")
 
                 platform_name = PlatformKeyboard.get_platform_name(platform)
-                await query.edit_message_text(
+                await edit_coalescer.edit(
+                    query,
                     f"✅ <b>رائع! لنكمل من حيث توقفنا</b>\n\n"
                     f"🎮 المنصة: {platform_name}\n\n"
                     f"📱 أدخل رقم الواتساب:\n"
@@ -233,7 +234,8 @@ class RegistrationHandlers:
                 print(f"   ➡️ Continuing at: PAYMENT")
 
                 keyboard = PaymentKeyboard.create_payment_selection_keyboard()
-                await query.edit_message_text(
+                await edit_coalescer.edit(
+                    query,
                     f"✅ <b>رائع! لنكمل من حيث توقفنا</b>\n\n"
                     f"📱 الواتساب: {whatsapp}\n\n"
                     f"💳 اختر طريقة الدفع:",
@@ -253,7 +255,8 @@ class RegistrationHandlers:
                 clear_bucket(context, "reg")
 
                 keyboard = PlatformKeyboard.create_platform_selection_keyboard()
-                await query.edit_message_text(
+                await edit_coalescer.edit(
+                    query,
                     "🔄 <b>لنبدأ من جديد للتأكد من صحة البيانات</b>",
                     reply_markup=keyboard,
                     parse_mode="HTML",
@@ -321,10 +324,10 @@ class RegistrationHandlers:
         keyboard = [
             [
                 InlineKeyboardButton(
-                    "✅ متابعة من حيث توقفت", callback_data="reg_continue"
+                    "✅ متابعة من حيث توقفت", callback_data=callback_data("reg", "continue")
                 )
             ],
-            [InlineKeyboardButton("🔄 البدء من جديد", callback_data="reg_restart")],
+            [InlineKeyboardButton("🔄 البدء من جديد", callback_data=callback_data("reg", "restart"))],
         ]
 
         await update.message.reply_text(
@@ -346,10 +349,15 @@ class RegistrationHandlers:
         MessageTagger.mark_as_handled(context)
 
         query = update.callback_query
-        await query.answer()
+        await edit_coalescer.answer(query)
 
         user_id = query.from_user.id
-        platform = query.data.replace("platform_", "")
+        if not context.args:
+            # زر بدون منصة (reg:platform) - الضغطة أُجيبت والحالة كما هي
+            from .states import REG_PLATFORM
+
+            return REG_PLATFORM
+        platform = context.args[0]
 
         print(f"\n{'='*80}")
         print(f"🎮 [PLATFORM] User {user_id}: {platform}")
@@ -357,12 +365,13 @@ class RegistrationHandlers:
 
         bucket(context, "reg")["platform"] = platform
 
-        UserOperations.save_user_step(
+        await users.save_user_step(
             user_id, "entering_whatsapp", {"platform": platform}
         )
 
         platform_name = PlatformKeyboard.get_platform_name(platform)
-        await query.edit_message_text(
+        await edit_coalescer.edit(
+            query,
             WelcomeMessages.get_platform_selected_message(platform_name),
             parse_mode="HTML",
         )
@@ -405,10 +414,11 @@ class RegistrationHandlers:
 
         bucket(context, "reg")["whatsapp"] = validation["cleaned"]
 
-        platform = bucket(context, "reg").get(
-            "platform"
-        ) or UserOperations.get_user_data(user_id).get("platform")
-        UserOperations.save_user_step(
+        platform = bucket(context, "reg").get("platform")
+        if not platform:
+            stored = await users.get_user_data(user_id)
+            platform = stored.get("platform") if stored else None
+        await users.save_user_step(
             user_id,
             "choosing_payment",
             {"platform": platform, "whatsapp": validation["cleaned"]},
@@ -435,10 +445,15 @@ class RegistrationHandlers:
         MessageTagger.mark_as_handled(context)
 
         query = update.callback_query
-        await query.answer()
+        await edit_coalescer.answer(query)
 
         user_id = query.from_user.id
-        payment_key = query.data.replace("payment_", "")
+        if not context.args:
+            # زر بدون طريقة دفع (reg:payment) - الضغطة أُجيبت والحالة كما هي
+            from .states import REG_PAYMENT
+
+            return REG_PAYMENT
+        payment_key = context.args[0]
         payment_name = PaymentKeyboard.get_payment_display_name(payment_key)
 
         print(f"\n{'='*80}")
@@ -447,8 +462,8 @@ class RegistrationHandlers:
 
         bucket(context, "reg")["payment_method"] = payment_key
 
-        user_data = UserOperations.get_user_data(user_id)
-        UserOperations.save_user_step(
+        user_data = await users.get_user_data(user_id)
+        await users.save_user_step(
             user_id,
             "entering_payment_details",
             {
@@ -459,7 +474,8 @@ class RegistrationHandlers:
         )
 
         instruction = PaymentValidator.get_payment_instructions(payment_key)
-        await query.edit_message_text(
+        await edit_coalescer.edit(
+            query,
             WelcomeMessages.get_payment_method_selected_message(
                 payment_name, instruction
             ),
@@ -504,7 +520,7 @@ class RegistrationHandlers:
 
             return REG_PAYMENT
 
-        user_data = UserOperations.get_user_data(user_id)
+        user_data = await users.get_user_data(user_id)
         validation = PaymentValidator.validate_payment_details(
             user_data["payment_method"], details
         )
@@ -525,7 +541,7 @@ class RegistrationHandlers:
 
         print(f"   ✅ Validation OK - completing registration")
 
-        UserOperations.save_user_step(
+        await users.save_user_step(
             user_id,
             "completed",
             {
@@ -557,7 +573,7 @@ class RegistrationHandlers:
         )
         await update.message.reply_text(final_summary, parse_mode="HTML")
 
-        StatisticsOperations.update_daily_metric("completed_registrations")
+        await stats.update_daily_metric("completed_registrations")
         log_user_action(user_id, "Registration completed")
 
         print(f"🎉 [PAYMENT-TXT] Registration completed!")
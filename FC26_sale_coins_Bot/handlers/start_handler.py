@@ -7,7 +7,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from utils.logger import log_user_action, log_registration_step, logger
 from utils.locks import user_lock_manager, is_rate_limited
-from database.operations import UserOperations
+from database.async_gateway import users
 from messages.welcome_messages import WelcomeMessages
 from messages.error_messages import ErrorMessages
 from keyboards.platform_keyboard import PlatformKeyboard
@@ -43,7 +43,7 @@ class StartHandler:
         user_id = update.effective_user.id
         
         # Check if user exists and their current step
-        user_data = UserOperations.get_user_data(user_id)
+        user_data = await users.get_user_data(user_id)
         
         if user_data and user_data["registration_step"] != "start":
             # User exists and has started registration - continue from where they left
@@ -74,7 +74,7 @@ class StartHandler:
             )
             
             # Save user step
-            UserOperations.save_user_step(user_id, "choosing_platform")
+            await users.save_user_step(user_id, "choosing_platform")
             
             log_registration_step(user_id, "choosing_platform", True)
             log_user_action(user_id, "Shown platform selection", f"Message ID: {message.message_id}")
@@ -6,6 +6,7 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from typing import List, Dict
 from config import PAYMENT_METHODS
+from core.callback_router import callback_data
 
 class PaymentKeyboard:
     """Payment method selection keyboards"""
@@ -19,7 +20,7 @@ class PaymentKeyboard:
             keyboard.append([
                 InlineKeyboardButton(
                     payment_name,
-                    callback_data=f"payment_{payment_key}"
+                    callback_data=callback_data("reg", "payment", payment_key)
                 )
             ])
         
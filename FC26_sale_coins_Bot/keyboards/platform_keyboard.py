@@ -6,6 +6,7 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from typing import List, Dict
 from config import GAMING_PLATFORMS
+from core.callback_router import callback_data
 
 class PlatformKeyboard:
     """Gaming platform selection keyboards"""
@@ -19,7 +20,7 @@ class PlatformKeyboard:
             keyboard.append([
                 InlineKeyboardButton(
                     platform_info["name"],
-                    callback_data=f"platform_{platform_key}"
+                    callback_data=callback_data("reg", "platform", platform_key)
                 )
             ])
         
@@ -48,7 +49,7 @@ class PlatformKeyboard:
                 InlineKeyboardButton("ℹ️ معلومات المنصة", callback_data=f"platform_info_{platform_key}")
             ],
             [
-                InlineKeyboardButton("✅ اختيار هذه المنصة", callback_data=f"platform_{platform_key}"),
+                InlineKeyboardButton("✅ اختيار هذه المنصة", callback_data=callback_data("reg", "platform", platform_key)),
                 InlineKeyboardButton("🔙 العودة", callback_data="platform_selection")
             ]
         ]
@@ -3,19 +3,33 @@
 # ║              بوت FC26 - الملف الرئيسي (منسق فقط) 🔥                    ║
 # ╚══════════════════════════════════════════════════════════════════════════╝
 
+import time
+
+_IMPORTS_STARTED = time.perf_counter()
+
 import asyncio
 import platform as sys_platform
 
+from config import WEBHOOK_CONFIG
+from core.bootstrap import bootstrap, startup_timer
 from core.bot_app import FC26BotApp
-from database.models import DatabaseModels
+from core.callback_router import callback_router
+from core.webhook_server import run_webhook
 from handlers.commands.basic_commands import get_command_handlers
 from handlers.recovery.global_router import get_recovery_handler
 from handlers.registration.conversation import get_registration_handler
 from services.admin.admin_conversation_handler import AdminConversation
+from services.admin.price_management import register_price_book_check
+from services.admin.restore_command import AdminRestore
 from services.sell_coins.sell_conversation_handler import SellCoinsConversation
 from utils.backup_job import register_backup_job
+from utils.locks import register_lock_maintenance, register_rate_limiter
 from utils.logger import fc26_logger
 from utils.session_monitor import register_monitoring
+from utils.session_ttl import register_session_ttl
+
+startup_timer.mark_start(_IMPORTS_STARTED)
+startup_timer.add("imports", time.perf_counter() - _IMPORTS_STARTED)
 
 
 def setup_handlers(app):
@@ -27,6 +41,10 @@ def setup_handlers(app):
     print("🎯 [SYSTEM] REGISTERING HANDLERS")
     print("=" * 80)
 
+    # 0️⃣ RATE LIMIT (group -1 - قبل كل الـ handlers، لكل أنواع التحديثات)
+    print("\n🚦 [RATE-LIMIT] Registering...")
+    register_rate_limiter(app)
+
     # 1️⃣ REGISTRATION
     print("\n🧠 [REGISTRATION] Registering...")
     app.add_handler(get_registration_handler())
@@ -44,6 +62,8 @@ def setup_handlers(app):
     print("\n🔧 [ADMIN] Registering...")
     try:
         app.add_handler(AdminConversation.get_conversation_handler())
+        for handler in AdminRestore.get_handlers():
+            app.add_handler(handler)
         print("   ✅ Done")
     except Exception as e:
         print(f"   ❌ Failed: {e}")
@@ -59,6 +79,10 @@ def setup_handlers(app):
     app.add_handler(get_recovery_handler(), group=99)
     print("   ✅ Done")
 
+    # 6️⃣ CALLBACK ROUTES - لا يبدأ البوت بمسارات متعارضة
+    print("\n🧭 [ROUTER] Checking callback routes...")
+    callback_router.check_collisions(app)
+
     print("\n" + "=" * 80)
     print("✅ [SYSTEM] ALL HANDLERS REGISTERED")
     print("=" * 80 + "\n")
@@ -74,22 +98,27 @@ def main():
         except:
             pass
 
-    # تهيئة قاعدة البيانات
+    # تهيئة قواعد البيانات (الجداول + الترحيلات + دفتر الأسعار) - مرة واحدة
     fc26_logger.get_logger().info("💾 Initializing database...")
-    if not DatabaseModels.create_all_tables():
+    if not bootstrap():
         print("❌ Database initialization failed!")
         return
 
     # إنشاء تطبيق البوت (مع Persistence)
-    bot_app = FC26BotApp()
-    app = bot_app.create_application()
+    with startup_timer.phase("application build"):
+        bot_app = FC26BotApp()
+        app = bot_app.create_application()
 
     # تسجيل الـ handlers
-    setup_handlers(app)
+    with startup_timer.phase("handler registration"):
+        setup_handlers(app)
 
-    # 🔥 تسجيل وظائف الصيانة (النسخ الاحتياطي والمراقبة)
-    register_backup_job(app)
-    register_monitoring(app)
+        # 🔥 تسجيل وظائف الصيانة (النسخ الاحتياطي والمراقبة)
+        register_backup_job(app)
+        register_monitoring(app)
+        register_session_ttl(app)
+        register_lock_maintenance(app)
+        register_price_book_check(app)
 
     # طباعة البانر
     fc26_logger.log_bot_start()
@@ -112,9 +141,12 @@ def main():
     """
     )
 
-    # تشغيل البوت
+    # تشغيل البوت (polling أو webhook حسب WEBHOOK_CONFIG)
     try:
-        app.run_polling(drop_pending_updates=True)
+        if WEBHOOK_CONFIG["enabled"]:
+            run_webhook(app)
+        else:
+            app.run_polling(drop_pending_updates=True)
     except KeyboardInterrupt:
         print("🔴 Bot stopped by user")
     except Exception as e:
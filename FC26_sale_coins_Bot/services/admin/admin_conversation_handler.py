@@ -12,7 +12,6 @@
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
-    CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
     ConversationHandler,
@@ -20,7 +19,10 @@ from telegram.ext import (
     filters,
 )
 
-from database.admin_operations import AdminOperations
+from config import SESSION_TTL_CONFIG
+from core.callback_router import callback_data, callback_router, parse_callback_data
+from database.async_gateway import admin
+from utils.edit_coalescer import edit_coalescer
 from utils.message_tagger import MessageTagger
 from utils.session_bucket import bucket, clear_bucket
 
@@ -53,13 +55,13 @@ class AdminConversation:
             await update.message.reply_text("❌ غير مصرح لك بالوصول لهذه الخدمة!")
             return ConversationHandler.END
 
-        AdminOperations.log_admin_action(user_id, "ADMIN_LOGIN", "Accessed via /admin")
+        await admin.log_admin_action(user_id, "ADMIN_LOGIN", "Accessed via /admin")
         print(f"✅ [ADMIN] Admin {user_id} logged in")
 
         keyboard = [
-            [InlineKeyboardButton("💰 إدارة الأسعار", callback_data="admin_prices")],
-            [InlineKeyboardButton("📊 الإحصائيات", callback_data="admin_stats")],
-            [InlineKeyboardButton("❌ خروج", callback_data="admin_exit")],
+            [InlineKeyboardButton("💰 إدارة الأسعار", callback_data=callback_data("admin", "prices"))],
+            [InlineKeyboardButton("📊 الإحصائيات", callback_data=callback_data("admin", "stats"))],
+            [InlineKeyboardButton("❌ خروج", callback_data=callback_data("admin", "exit"))],
         ]
 
         await update.message.reply_text(
@@ -76,40 +78,41 @@ class AdminConversation:
         MessageTagger.mark_as_handled(context)
 
         query = update.callback_query
-        await query.answer()
+        await edit_coalescer.answer(query)
 
         user_id = query.from_user.id
+        _, action, _ = parse_callback_data(query.data)
 
-        if query.data == "admin_exit":
-            await query.edit_message_text("👋 تم الخروج من لوحة الأدمن")
+        if action == "exit":
+            await edit_coalescer.edit(query, "👋 تم الخروج من لوحة الأدمن")
             return ConversationHandler.END
 
-        if query.data == "admin_prices":
+        if action == "prices":
             print(f"💰 [ADMIN] {user_id} accessing price management")
-            AdminOperations.log_admin_action(user_id, "ACCESSED_PRICE_MANAGEMENT")
+            await admin.log_admin_action(user_id, "ACCESSED_PRICE_MANAGEMENT")
 
             keyboard = [
                 [
                     InlineKeyboardButton(
-                        "🎮 PlayStation", callback_data="admin_platform_playstation"
+                        "🎮 PlayStation", callback_data=callback_data("admin", "platform", "playstation")
                     )
                 ],
-                [InlineKeyboardButton("🎮 Xbox", callback_data="admin_platform_xbox")],
-                [InlineKeyboardButton("🖥️ PC", callback_data="admin_platform_pc")],
-                [InlineKeyboardButton("🔙 رجوع", callback_data="admin_back_main")],
+                [InlineKeyboardButton("🎮 Xbox", callback_data=callback_data("admin", "platform", "xbox"))],
+                [InlineKeyboardButton("🖥️ PC", callback_data=callback_data("admin", "platform", "pc"))],
+                [InlineKeyboardButton("🔙 رجوع", callback_data=callback_data("admin", "back_main"))],
             ]
 
-            await query.edit_message_text(
-                "💰 <b>إدارة الأسعار</b>\n\n🎮 اختر المنصة:",
+            await edit_coalescer.edit(
+                query, "💰 <b>إدارة الأسعار</b>\n\n🎮 اختر المنصة:",
                 reply_markup=InlineKeyboardMarkup(keyboard),
                 parse_mode="HTML",
             )
 
             return ADMIN_PLATFORM
 
-        if query.data == "admin_stats":
-            await query.edit_message_text(
-                "📊 <b>الإحصائيات</b>\n\nقريباً...",
+        if action == "stats":
+            await edit_coalescer.edit(
+                query, "📊 <b>الإحصائيات</b>\n\nقريباً...",
                 parse_mode="HTML",
             )
             return ConversationHandler.END
@@ -124,21 +127,23 @@ class AdminConversation:
         MessageTagger.mark_as_handled(context)
 
         query = update.callback_query
-        await query.answer()
+        await edit_coalescer.answer(query)
 
-        if query.data == "admin_back_main":
+        _, action, _ = parse_callback_data(query.data)
+
+        if action == "back_main":
             keyboard = [
                 [
                     InlineKeyboardButton(
-                        "💰 إدارة الأسعار", callback_data="admin_prices"
+                        "💰 إدارة الأسعار", callback_data=callback_data("admin", "prices")
                     )
                 ],
-                [InlineKeyboardButton("📊 الإحصائيات", callback_data="admin_stats")],
-                [InlineKeyboardButton("❌ خروج", callback_data="admin_exit")],
+                [InlineKeyboardButton("📊 الإحصائيات", callback_data=callback_data("admin", "stats"))],
+                [InlineKeyboardButton("❌ خروج", callback_data=callback_data("admin", "exit"))],
             ]
 
-            await query.edit_message_text(
-                "👑 <b>لوحة الأدمن</b>\n\nاختر الخدمة:",
+            await edit_coalescer.edit(
+                query, "👑 <b>لوحة الأدمن</b>\n\nاختر الخدمة:",
                 reply_markup=InlineKeyboardMarkup(keyboard),
                 parse_mode="HTML",
             )
@@ -146,12 +151,15 @@ class AdminConversation:
             return ADMIN_MAIN
 
         user_id = query.from_user.id
-        platform = query.data.replace("admin_platform_", "")
+        if not context.args:
+            # زر بدون منصة (admin:platform) - الضغطة أُجيبت والحالة كما هي
+            return ADMIN_PLATFORM
+        platform = context.args[0]
 
         print(f"🎮 [ADMIN] {user_id} selected platform: {platform}")
 
-        normal_price = PriceManagement.get_current_price(platform, "normal")
-        instant_price = PriceManagement.get_current_price(platform, "instant")
+        normal_price = await PriceManagement.get_current_price(platform, "normal")
+        instant_price = await PriceManagement.get_current_price(platform, "instant")
 
         platform_name = {
             "playstation": "🎮 PlayStation",
@@ -163,20 +171,20 @@ class AdminConversation:
             [
                 InlineKeyboardButton(
                     f"📅 عادي - {normal_price:,} ج.م" if normal_price else "📅 عادي",
-                    callback_data=f"admin_edit_{platform}_normal",
+                    callback_data=callback_data("admin", "edit", platform, "normal"),
                 )
             ],
             [
                 InlineKeyboardButton(
                     f"⚡ فوري - {instant_price:,} ج.م" if instant_price else "⚡ فوري",
-                    callback_data=f"admin_edit_{platform}_instant",
+                    callback_data=callback_data("admin", "edit", platform, "instant"),
                 )
             ],
-            [InlineKeyboardButton("🔙 رجوع", callback_data="admin_back_platforms")],
+            [InlineKeyboardButton("🔙 رجوع", callback_data=callback_data("admin", "back_platforms"))],
         ]
 
-        await query.edit_message_text(
-            f"💰 <b>أسعار {platform_name}</b>\n\nاختر نوع التحويل:",
+        await edit_coalescer.edit(
+            query, f"💰 <b>أسعار {platform_name}</b>\n\nاختر نوع التحويل:",
             reply_markup=InlineKeyboardMarkup(keyboard),
             parse_mode="HTML",
         )
@@ -191,22 +199,24 @@ class AdminConversation:
         MessageTagger.mark_as_handled(context)
 
         query = update.callback_query
-        await query.answer()
+        await edit_coalescer.answer(query)
+
+        _, action, _ = parse_callback_data(query.data)
 
-        if query.data == "admin_back_platforms":
+        if action == "back_platforms":
             keyboard = [
                 [
                     InlineKeyboardButton(
-                        "🎮 PlayStation", callback_data="admin_platform_playstation"
+                        "🎮 PlayStation", callback_data=callback_data("admin", "platform", "playstation")
                     )
                 ],
-                [InlineKeyboardButton("🎮 Xbox", callback_data="admin_platform_xbox")],
-                [InlineKeyboardButton("🖥️ PC", callback_data="admin_platform_pc")],
-                [InlineKeyboardButton("🔙 رجوع", callback_data="admin_back_main")],
+                [InlineKeyboardButton("🎮 Xbox", callback_data=callback_data("admin", "platform", "xbox"))],
+                [InlineKeyboardButton("🖥️ PC", callback_data=callback_data("admin", "platform", "pc"))],
+                [InlineKeyboardButton("🔙 رجوع", callback_data=callback_data("admin", "back_main"))],
             ]
 
-            await query.edit_message_text(
-                "💰 <b>إدارة الأسعار</b>\n\n🎮 اختر المنصة:",
+            await edit_coalescer.edit(
+                query, "💰 <b>إدارة الأسعار</b>\n\n🎮 اختر المنصة:",
                 reply_markup=InlineKeyboardMarkup(keyboard),
                 parse_mode="HTML",
             )
@@ -215,18 +225,16 @@ class AdminConversation:
 
         user_id = query.from_user.id
 
-        parts = query.data.split("_")
-        if len(parts) >= 4:
-            platform = parts[2]
-            transfer_type = parts[3]
+        if len(context.args) >= 2:
+            platform, transfer_type = context.args[:2]
 
             print(f"⚡ [ADMIN] {user_id} editing {platform} {transfer_type}")
 
-            current_price = PriceManagement.get_current_price(platform, transfer_type)
+            current_price = await PriceManagement.get_current_price(platform, transfer_type)
 
             if current_price is None:
-                await query.edit_message_text(
-                    "❌ خطأ في جلب السعر الحالي",
+                await edit_coalescer.edit(
+                    query, "❌ خطأ في جلب السعر الحالي",
                     parse_mode="HTML",
                 )
                 return ConversationHandler.END
@@ -237,7 +245,7 @@ class AdminConversation:
             admin_bucket["type"] = transfer_type
             admin_bucket["current_price"] = current_price
 
-            AdminOperations.log_admin_action(
+            await admin.log_admin_action(
                 user_id,
                 "STARTED_PRICE_EDIT",
                 f"{platform} {transfer_type} - Current: {current_price}",
@@ -251,7 +259,8 @@ class AdminConversation:
 
             transfer_name = "فوري" if transfer_type == "instant" else "عادي"
 
-            await query.edit_message_text(
+            await edit_coalescer.edit(
+                query,
                 f"💰 <b>تعديل سعر {platform_name} - {transfer_name}</b>\n\n"
                 f"💵 السعر الحالي: {current_price:,} ج.م\n\n"
                 f"📝 أدخل السعر الجديد:\n"
@@ -332,6 +341,12 @@ class AdminConversation:
             parse_mode="HTML",
         )
 
+        # 📢 إشعار المستخدمين بالسعر الجديد (في الخلفية)
+        await PriceManagement.notify_price_change(
+            context.bot, platform, transfer_type, old_price, new_price,
+            user_id, update.effective_chat.id,
+        )
+
         # 🔥 مسح bucket فقط
         clear_bucket(context, "admin")
         print(f"✅ [ADMIN] Price updated successfully")
@@ -352,7 +367,7 @@ class AdminConversation:
 
         # 🔥 مسح bucket فقط
         clear_bucket(context, "admin")
-        AdminOperations.log_admin_action(user_id, "CANCELLED_OPERATION")
+        await admin.log_admin_action(user_id, "CANCELLED_OPERATION")
 
         return ConversationHandler.END
 
@@ -363,20 +378,28 @@ class AdminConversation:
             entry_points=[CommandHandler("admin", AdminConversation.start_admin)],
             states={
                 ADMIN_MAIN: [
-                    CallbackQueryHandler(
-                        AdminConversation.handle_main_menu,
-                        pattern="^admin_prices$|^admin_stats$|^admin_exit$",
-                    )
+                    callback_router.handler("admin.main", {
+                        "admin:prices": AdminConversation.handle_main_menu,
+                        "admin:stats": AdminConversation.handle_main_menu,
+                        "admin:exit": AdminConversation.handle_main_menu,
+                    }, legacy={
+                        "admin_prices": "admin:prices",
+                        "admin_stats": "admin:stats",
+                        "admin_exit": "admin:exit",
+                    })
                 ],
                 ADMIN_PLATFORM: [
-                    CallbackQueryHandler(
-                        AdminConversation.handle_platform_selection,
-                        pattern="^admin_platform_|^admin_back_main$",
-                    ),
-                    CallbackQueryHandler(
-                        AdminConversation.handle_transfer_type_selection,
-                        pattern="^admin_edit_|^admin_back_platforms$",
-                    ),
+                    callback_router.handler("admin.platform", {
+                        "admin:platform": AdminConversation.handle_platform_selection,
+                        "admin:back_main": AdminConversation.handle_platform_selection,
+                        "admin:edit": AdminConversation.handle_transfer_type_selection,
+                        "admin:back_platforms": AdminConversation.handle_transfer_type_selection,
+                    }, legacy={
+                        r"admin_platform_(\w+)": r"admin:platform:\1",
+                        r"admin_edit_(\w+)_(normal|instant)": r"admin:edit:\1:\2",
+                        "admin_back_main": "admin:back_main",
+                        "admin_back_platforms": "admin:back_platforms",
+                    })
                 ],
                 ADMIN_PRICE_INPUT: [
                     MessageHandler(
@@ -388,5 +411,6 @@ class AdminConversation:
             fallbacks=[CommandHandler("cancel", AdminConversation.cancel)],
             name="admin_conversation",
             persistent=True,  # 🔥 تفعيل Persistence
+            conversation_timeout=SESSION_TTL_CONFIG["idle_ttl_seconds"],  # ⏳ إنهاء المحادثة الخاملة
             block=True,
         )
@@ -20,7 +20,9 @@ from telegram.ext import (
 # إضافة مسار المشروع للاستيراد
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from database.admin_operations import AdminOperations
+from core.bootstrap import bootstrap
+from database.async_gateway import admin
+from utils.edit_coalescer import edit_coalescer
 
 from .admin_keyboards import AdminKeyboards
 from .admin_messages import AdminMessages
@@ -78,8 +80,8 @@ class AdminHandler:
         """تهيئة معالج الادارة"""
         self.user_sessions = {}  # جلسات تعديل الأسعار
 
-        # تهيئة قاعدة البيانات
-        AdminOperations.init_admin_db()
+        # تهيئة قاعدة البيانات (لا شيء إذا تمت في main)
+        bootstrap()
 
         # 🔥 إنشاء الفلتر الذكي
         self.smart_filter = AdminPriceEditFilter(
@@ -187,7 +189,7 @@ class AdminHandler:
         print(f"✅ [ADMIN] Admin {user_id} successfully logged in")
 
         # تسجيل دخول الادمن
-        AdminOperations.log_admin_action(
+        await admin.log_admin_action(
             user_id, "ADMIN_LOGIN", f"Accessed via /admin command"
         )
 
@@ -235,12 +237,12 @@ class AdminHandler:
         )
         print(f"📞 [ADMIN] Callback data: {query.data}")
 
-        await query.answer()
+        await edit_coalescer.answer(query)
         print(f"✅ [ADMIN] Callback answered for user {user_id}")
 
         if not self.is_admin(user_id):
-            await query.edit_message_text(
-                AdminMessages.get_unauthorized_message(),
+            await edit_coalescer.edit(
+                query, AdminMessages.get_unauthorized_message(),
                 reply_markup=AdminKeyboards.get_unauthorized_keyboard(),
                 parse_mode="HTML",
             )
@@ -249,7 +251,7 @@ class AdminHandler:
         message = AdminMessages.get_main_admin_message(user_id)
         keyboard = AdminKeyboards.get_main_admin_keyboard()
 
-        await query.edit_message_text(message, reply_markup=keyboard, parse_mode="HTML")
+        await edit_coalescer.edit(query, message, reply_markup=keyboard, parse_mode="HTML")
 
     async def handle_price_management(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -264,19 +266,19 @@ class AdminHandler:
         )
         print(f"📞 [ADMIN] Callback data: {query.data}")
 
-        await query.answer()
+        await edit_coalescer.answer(query)
         print(f"✅ [ADMIN] Callback answered for user {user_id}")
 
         if not self.is_admin(user_id):
-            await query.edit_message_text(AdminMessages.get_unauthorized_message())
+            await edit_coalescer.edit(query, AdminMessages.get_unauthorized_message())
             return
 
-        AdminOperations.log_admin_action(user_id, "ACCESSED_PRICE_MANAGEMENT")
+        await admin.log_admin_action(user_id, "ACCESSED_PRICE_MANAGEMENT")
 
         message = AdminMessages.get_price_management_message()
         keyboard = AdminKeyboards.get_price_management_keyboard()
 
-        await query.edit_message_text(message, reply_markup=keyboard, parse_mode="HTML")
+        await edit_coalescer.edit(query, message, reply_markup=keyboard, parse_mode="HTML")
 
     async def handle_view_prices(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -286,7 +288,7 @@ class AdminHandler:
         user_id = query.from_user.id
         username = query.from_user.username or "Unknown"
 
-        await query.answer()
+        await edit_coalescer.answer(query)
 
         print(f"\n📊 [ADMIN] View prices requested by {user_id} (@{username})")
 
@@ -310,7 +312,7 @@ class AdminHandler:
         )
         print(f"📞 [ADMIN] Callback data: {query.data}")
 
-        await query.answer()
+        await edit_coalescer.answer(query)
         print(f"✅ [ADMIN] Callback answered for user {user_id}")
 
         if not self.is_admin(user_id):
@@ -320,7 +322,7 @@ class AdminHandler:
         platform = query.data.split("_")[-1]  # admin_edit_playstation -> playstation
         print(f"🔧 [ADMIN] Extracted platform: {platform}")
 
-        AdminOperations.log_admin_action(
+        await admin.log_admin_action(
             user_id, "SELECTED_PLATFORM_EDIT", f"Platform: {platform}"
         )
         print(f"📝 [ADMIN] Action logged for platform selection: {platform}")
@@ -330,8 +332,8 @@ class AdminHandler:
         print(f"📋 [ADMIN] Message and keyboard prepared for platform: {platform}")
 
         try:
-            await query.edit_message_text(
-                message, reply_markup=keyboard, parse_mode="HTML"
+            await edit_coalescer.edit(
+                query, message, reply_markup=keyboard, parse_mode="HTML"
             )
             print(
                 f"✅ [ADMIN] Platform edit interface sent successfully for {platform}"
@@ -347,7 +349,7 @@ class AdminHandler:
         user_id = query.from_user.id
         username = query.from_user.username or "Unknown"
 
-        await query.answer()
+        await edit_coalescer.answer(query)
 
         print(f"\n⚡ [ADMIN] Transfer type edit requested by {user_id} (@{username})")
 
@@ -381,14 +383,14 @@ class AdminHandler:
             return
 
         # جلب السعر الحالي
-        current_price = PriceManagement.get_current_price(platform, transfer_type)
+        current_price = await PriceManagement.get_current_price(platform, transfer_type)
 
         if current_price is None:
             print(
                 f"❌ [ADMIN] Failed to get current price for {platform} {transfer_type}"
             )
-            await query.edit_message_text(
-                AdminMessages.get_error_message("database_error"), parse_mode="HTML"
+            await edit_coalescer.edit(
+                query, AdminMessages.get_error_message("database_error"), parse_mode="HTML"
             )
             return
 
@@ -409,7 +411,7 @@ class AdminHandler:
         )
         print(f"🔑 [ADMIN] Active sessions now: {list(self.user_sessions.keys())}")
 
-        AdminOperations.log_admin_action(
+        await admin.log_admin_action(
             user_id,
             "STARTED_PRICE_EDIT",
             f"Platform: {platform}, Type: {transfer_type}, Current: {current_price}",
@@ -421,8 +423,8 @@ class AdminHandler:
         keyboard = AdminKeyboards.get_price_edit_keyboard(platform, transfer_type)
 
         try:
-            await query.edit_message_text(
-                message, reply_markup=keyboard, parse_mode="HTML"
+            await edit_coalescer.edit(
+                query, message, reply_markup=keyboard, parse_mode="HTML"
             )
             print(f"✅ [ADMIN] Price edit prompt sent to admin {user_id}")
         except Exception as e:
@@ -439,17 +441,17 @@ class AdminHandler:
         print(f"\n📊 [ADMIN] Logs callback received from user {user_id} (@{username})")
         print(f"📞 [ADMIN] Callback data: {query.data}")
 
-        await query.answer()
+        await edit_coalescer.answer(query)
         print(f"✅ [ADMIN] Callback answered for user {user_id}")
 
         if not self.is_admin(user_id):
             return
 
-        logs = AdminOperations.get_admin_logs(50)
+        logs = await admin.get_admin_logs(50)
         message = AdminMessages.get_admin_logs_message(logs)
         keyboard = AdminKeyboards.get_admin_logs_keyboard()
 
-        await query.edit_message_text(message, reply_markup=keyboard, parse_mode="HTML")
+        await edit_coalescer.edit(query, message, reply_markup=keyboard, parse_mode="HTML")
 
     async def handle_admin_stats(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -462,15 +464,15 @@ class AdminHandler:
         print(f"\n📈 [ADMIN] Stats callback received from user {user_id} (@{username})")
         print(f"📞 [ADMIN] Callback data: {query.data}")
 
-        await query.answer()
+        await edit_coalescer.answer(query)
         print(f"✅ [ADMIN] Callback answered for user {user_id}")
 
         if not self.is_admin(user_id):
             return
 
         # رسالة مؤقتة - يمكن تطويرها لاحقاً
-        await query.edit_message_text(
-            "📊 <b>الإحصائيات</b>\n\n🚧 هذه الميزة قيد التطوير...\n\nستكون متاحة قريباً!",
+        await edit_coalescer.edit(
+            query, "📊 <b>الإحصائيات</b>\n\n🚧 هذه الميزة قيد التطوير...\n\nستكون متاحة قريباً!",
             reply_markup=AdminKeyboards.get_main_admin_keyboard(),
             parse_mode="HTML",
         )
@@ -489,12 +491,13 @@ class AdminHandler:
         print(f"🔍 [ADMIN] Callback data: '{query.data}'")
         print(f"⚠️ [ADMIN] This callback was not handled by any specific pattern!")
 
-        await query.answer()
+        await edit_coalescer.answer(query)
 
         # إذا كان admin، أرسل رسالة توضيحية
         if self.is_admin(user_id):
             print(f"🛠️ [ADMIN] Sending debug message to admin about unknown callback")
-            await query.edit_message_text(
+            await edit_coalescer.edit(
+                query,
                 f"🐛 <b>Debug Info</b>\n\n"
                 f"❓ Unknown callback received: <code>{query.data}</code>\n\n"
                 f"This helps debug admin system issues!",
@@ -586,6 +589,12 @@ class AdminHandler:
         except Exception as e:
             print(f"❌ [ADMIN] Failed to send success message: {e}")
 
+        # 📢 إشعار المستخدمين بالسعر الجديد (في الخلفية)
+        await PriceManagement.notify_price_change(
+            context.bot, platform, transfer_type, old_price, new_price,
+            user_id, update.effective_chat.id,
+        )
+
         # مسح الجلسة
         del self.user_sessions[user_id]
         print(f"🧹 [ADMIN] Session cleared for admin {user_id}")
@@ -604,11 +613,11 @@ class AdminHandler:
 
     async def _show_current_prices(self, update: Update, user_id: int):
         """عرض الأسعار الحالية (للأوامر)"""
-        prices = PriceManagement.get_all_current_prices()
+        prices = await PriceManagement.get_all_current_prices()
         message = AdminMessages.get_current_prices_message(prices)
         keyboard = AdminKeyboards.get_view_prices_keyboard()
 
-        AdminOperations.log_admin_action(user_id, "VIEWED_PRICES")
+        await admin.log_admin_action(user_id, "VIEWED_PRICES")
 
         await update.message.reply_text(
             message, reply_markup=keyboard, parse_mode="HTML"
@@ -619,21 +628,22 @@ class AdminHandler:
         print(f"📋 [ADMIN] Fetching current prices for admin {user_id}")
 
         try:
-            prices = PriceManagement.get_all_current_prices()
+            prices = await PriceManagement.get_all_current_prices()
             print(f"💰 [ADMIN] Retrieved {len(prices)} price entries from database")
 
             message = AdminMessages.get_current_prices_message(prices)
             keyboard = AdminKeyboards.get_view_prices_keyboard()
 
-            AdminOperations.log_admin_action(user_id, "VIEWED_PRICES")
+            await admin.log_admin_action(user_id, "VIEWED_PRICES")
 
-            await query.edit_message_text(
-                message, reply_markup=keyboard, parse_mode="HTML"
+            await edit_coalescer.edit(
+                query, message, reply_markup=keyboard, parse_mode="HTML"
             )
             print(f"✅ [ADMIN] Prices successfully displayed to admin {user_id}")
 
         except Exception as e:
             print(f"❌ [ADMIN] Error displaying prices to admin {user_id}: {e}")
-            await query.edit_message_text(
+            await edit_coalescer.edit(
+                query,
                 "❌ حدث خطأ في عرض الأسعار. يرجى المحاولة مرة أخرى.", parse_mode="HTML"
             )
@@ -12,6 +12,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from database.admin_operations import AdminOperations
+from config import PRICE_BOOK_CONFIG
+from database.async_gateway import admin
 
 class PriceManagement:
     """معالج إدارة الأسعار"""
@@ -50,9 +52,10 @@ class PriceManagement:
         return True, price, "سعر صحيح"
     
     @classmethod
-    def get_current_price(cls, platform: str, transfer_type: str) -> Optional[int]:
-        """جلب السعر الحالي"""
-        return AdminOperations.get_price(platform, transfer_type, cls.DEFAULT_AMOUNT)
+    async def get_current_price(cls, platform: str, transfer_type: str) -> Optional[int]:
+        """جلب السعر الحالي من دفتر الأسعار"""
+        await AdminOperations.ensure_price_book()
+        return AdminOperations.get_cached_price(platform, transfer_type, cls.DEFAULT_AMOUNT)
     
     @classmethod
     async def update_price(cls, platform: str, transfer_type: str, new_price: int, admin_id: int) -> bool:
@@ -62,9 +65,23 @@ class PriceManagement:
         )
     
     @classmethod
-    def get_all_current_prices(cls):
-        """جلب جميع الأسعار الحالية"""
-        return AdminOperations.get_all_prices()
+    async def notify_price_change(cls, bot, platform: str, transfer_type: str, old_price: Optional[int],
+                                  new_price: int, admin_id: int, chat_id: int) -> None:
+        """
+        إشعار كل المستخدمين المسجلين بالسعر الجديد (إرسال جماعي في الخلفية + تقدم للأدمن).
+        التعديلات المتتالية تُدمج في إشعار واحد، والتراجع لآخر سعر معلن لا يُرسل
+        """
+        if old_price is None or old_price == new_price:
+            return
+        # استيراد متأخر: محرك الإرسال يعتمد على core.send_scheduler
+        from services.broadcast import price_notices
+
+        price_notices.add(bot, platform, transfer_type, old_price, new_price, admin_id, chat_id)
+    
+    @classmethod
+    async def get_all_current_prices(cls):
+        """جلب جميع الأسعار الحالية - عبر خيط قاعدة البيانات"""
+        return await admin.get_all_prices()
     
     @classmethod
     def calculate_price_difference(cls, old_price: int, new_price: int) -> dict:
@@ -112,7 +129,7 @@ class PriceManagement:
     @classmethod
     def export_prices_data(cls) -> dict:
         """تصدير بيانات الأسعار"""
-        prices = cls.get_all_current_prices()
+        prices = AdminOperations.get_all_prices()
         
         export_data = {
             'export_time': AdminOperations.get_current_timestamp(),
@@ -132,4 +149,27 @@ class PriceManagement:
             
             export_data['platforms'][platform][price['transfer_type']] = price['price']
         
-        return export_data
\ No newline at end of file
+        return export_data
+
+
+async def verify_price_book_job(context):
+    """مقارنة دفتر الأسعار مع قاعدة البيانات (تعديل يدوي للجدول مثلاً) وإعادة تحميله عند الاختلاف"""
+    try:
+        result = await admin.verify_price_book()
+    except Exception as e:
+        print(f"   ❌ [PRICE-BOOK] Verification failed: {e}")
+        return
+    if not result['consistent']:
+        print(f"   ⚠️ [PRICE-BOOK] {len(result['mismatches'])} mismatches - reloaded as v{result['version']}")
+
+
+def register_price_book_check(app):
+    """تسجيل فحص دفتر الأسعار الدوري في الجدول الزمني"""
+    interval = PRICE_BOOK_CONFIG['verify_interval_seconds']
+    app.job_queue.run_repeating(
+        verify_price_book_job,
+        interval=interval,
+        first=interval,
+        name="price_book_verify",
+    )
+    print(f"   ✅ Price book check scheduled: Every {interval // 60} minutes")
@@ -0,0 +1,124 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              ♻️ ADMIN - RESTORE COMMAND                                  ║
+# ║                   أمر /restore للأدمن                                   ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+أمر الاستعادة للأدمن
+- /restore               عرض آخر النسخ الاحتياطية
+- /restore <id>          تحقق كامل + تجهيز (يُطبق عند إعادة التشغيل)
+- /restore cancel        إلغاء الاستعادة المجهزة
+
+الاستبدال نفسه لا يتم والبوت يعمل (قواعد البيانات مفتوحة) - يتم في
+core/bootstrap.py عند الإقلاع التالي قبل فتح أي ملف.
+"""
+
+import asyncio
+import html
+
+from telegram import Update
+from telegram.ext import CommandHandler, ContextTypes
+
+from database.async_gateway import admin
+from utils.backup_engine import BackupError, backup_engine
+from utils.message_tagger import MessageTagger
+from utils.restore import RestoreError, cancel_pending_restore, get_pending_restore, stage_restore
+
+from .admin_conversation_handler import AdminConversation
+
+# عدد النسخ المعروضة في القائمة
+LIST_LIMIT = 10
+
+
+class AdminRestore:
+    """أمر /restore"""
+
+    @staticmethod
+    async def handle_restore(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """أمر /restore"""
+        MessageTagger.mark_as_handled(context)
+
+        user_id = update.effective_user.id
+        print(f"\n♻️ [ADMIN-RESTORE] /restore from user {user_id} args={context.args}")
+
+        if user_id != AdminConversation.ADMIN_ID:
+            print(f"❌ [ADMIN-RESTORE] Unauthorized access by {user_id}")
+            await update.message.reply_text("❌ غير مصرح لك بالوصول لهذه الخدمة!")
+            return
+
+        if not context.args:
+            await AdminRestore._send_list(update)
+            return
+
+        if context.args[0] == "cancel":
+            cancelled = await asyncio.to_thread(cancel_pending_restore)
+            await admin.log_admin_action(user_id, "RESTORE_CANCELLED")
+            await update.message.reply_text(
+                "✅ تم إلغاء الاستعادة المجهزة" if cancelled else "ℹ️ لا توجد استعادة مجهزة"
+            )
+            return
+
+        snapshot_id = context.args[0]
+        snapshots = await asyncio.to_thread(backup_engine.list_snapshots)
+        if snapshot_id not in {snapshot["id"] for snapshot in snapshots}:
+            print(f"   ❌ [ADMIN-RESTORE] Unknown snapshot id {snapshot_id!r}")
+            await update.message.reply_text(
+                f"❌ لا توجد نسخة بالرقم <code>{html.escape(snapshot_id)}</code>\n\n"
+                "📋 القائمة: /restore",
+                parse_mode="HTML",
+            )
+            return
+
+        await update.message.reply_text(
+            f"⏳ جاري التحقق من النسخة <code>{html.escape(snapshot_id)}</code>...", parse_mode="HTML"
+        )
+
+        try:
+            # إعادة البناء + sha256 + integrity_check في خيط منفصل
+            report = await asyncio.to_thread(stage_restore, snapshot_id)
+        except (BackupError, RestoreError) as e:
+            print(f"   ❌ [ADMIN-RESTORE] {e}")
+            await update.message.reply_text(f"❌ فشل التحقق - لم يتغير شيء\n\n{e}")
+            return
+
+        await admin.log_admin_action(user_id, "RESTORE_STAGED", snapshot_id)
+
+        lines = [
+            f"✅ <b>النسخة {html.escape(snapshot_id)} سليمة وجاهزة</b>",
+            f"📅 تاريخ النسخة: {report['created_at']}",
+            "",
+        ]
+        for name, entry in report["files"].items():
+            lines.append(
+                f"• {name}: {entry['size'] / (1024 * 1024):.2f} MB "
+                f"({entry['rebuild_ms']:.0f} + {entry['integrity_ms']:.0f} ms)"
+            )
+        lines += [
+            "",
+            f"⏱️ زمن التجهيز: {report['stage_ms'] / 1000:.1f} ث ({report['throughput_mb_s']} MB/s)",
+            "",
+            "🔄 أعد تشغيل البوت لتطبيق الاستعادة (الاستبدال يتم عند الإقلاع)",
+            "❌ للإلغاء: /restore cancel",
+        ]
+        await update.message.reply_text("\n".join(lines), parse_mode="HTML")
+
+    @staticmethod
+    async def _send_list(update: Update):
+        snapshots = (await asyncio.to_thread(backup_engine.list_snapshots))[:LIST_LIMIT]
+        pending = await asyncio.to_thread(get_pending_restore)
+
+        if not snapshots:
+            await update.message.reply_text("ℹ️ لا توجد نسخ احتياطية بعد")
+            return
+
+        lines = ["♻️ <b>النسخ الاحتياطية</b>", ""]
+        for snapshot in snapshots:
+            marker = " ⏳" if pending and pending["snapshot_id"] == snapshot["id"] else ""
+            lines.append(f"• <code>{snapshot['id']}</code> - {snapshot['size_mb']} MB{marker}")
+        lines += ["", "للاستعادة: /restore &lt;id&gt;"]
+        await update.message.reply_text("\n".join(lines), parse_mode="HTML")
+
+    @staticmethod
+    def get_handlers():
+        """handlers أمر الاستعادة"""
+        return [CommandHandler("restore", AdminRestore.handle_restore)]
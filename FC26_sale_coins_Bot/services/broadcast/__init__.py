@@ -0,0 +1,33 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              📢 FC26 BROADCAST SERVICE - خدمة الإرسال الجماعي            ║
+# ║                     Resumable Broadcast Package                         ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+# Import only when telegram is available
+def _import_telegram_components():
+    """Import telegram-dependent components"""
+    try:
+        from .broadcast_engine import BroadcastEngine, broadcast_engine
+        from .price_notices import PriceNoticeBatcher, price_notices
+        return BroadcastEngine, broadcast_engine, PriceNoticeBatcher, price_notices
+    except ImportError:
+        return None, None, None, None
+
+# Always available imports (no telegram dependency)
+from .broadcast_messages import BroadcastMessages
+
+# Conditional imports
+BroadcastEngine, broadcast_engine, PriceNoticeBatcher, price_notices = _import_telegram_components()
+
+__all__ = [
+    'BroadcastMessages'
+]
+
+# Add telegram-dependent components if available
+if BroadcastEngine is not None:
+    __all__.extend([
+        'BroadcastEngine',
+        'broadcast_engine',
+        'PriceNoticeBatcher',
+        'price_notices'
+    ])
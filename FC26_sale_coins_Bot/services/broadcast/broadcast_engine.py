@@ -0,0 +1,425 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              📢 BROADCAST ENGINE - محرك الإرسال الجماعي                  ║
+# ║          دفعات محدودة السرعة + نقاط حفظ + استكمال بعد إعادة التشغيل     ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+إرسال رسالة لكل المستخدمين المسجلين (مثلاً إشعار تغيير السعر)
+
+- المستلمون يُقرأون دفعة دفعة بـ keyset (telegram_id > آخر مستلم) - لا
+  تحميل لكل الجدول في الذاكرة ولا OFFSET
+- كل رسالة بأولوية Priority.BULK عبر core/send_scheduler.py: السرعة محدودة
+  بـ bulk_rate والردود التفاعلية تسبق دائماً
+- بعد كل دفعة: حفظ المؤشر والعدادات في جدول broadcasts (نفس الـ transaction
+  مع تعليم من حظر البوت) - إعادة التشغيل تكمل من آخر نقطة حفظ
+- Forbidden = المستخدم حظر البوت: يُعلم users.blocked_at ولا يُرسل له مجدداً
+- رسالة تقدم حية للأدمن: المرسل / المحظور / الفاشل + رسالة/ث + الوقت المتبقي
+
+الاستخدام:
+    from services.broadcast import broadcast_engine
+    await broadcast_engine.start(context.bot, "price_change", text, admin_id, chat_id)
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Set
+
+from telegram.error import Forbidden, TelegramError
+
+from config import BROADCAST_CONFIG
+from core.send_scheduler import Priority
+from database.async_gateway import broadcasts
+from services.broadcast.broadcast_messages import BroadcastMessages
+
+logger = logging.getLogger(__name__)
+
+SENT, BLOCKED, FAILED = "sent", "blocked", "failed"
+
+
+class _BroadcastJob:
+    """حالة إرسال جماعي واحد أثناء التشغيل"""
+
+    def __init__(self, row: Dict):
+        self.id = row["id"]
+        self.text = row["text"]
+        self.total = row["total"]
+        self.cursor = row["last_telegram_id"]
+        self.sent = row["sent"]
+        self.failed = row["failed"]
+        self.blocked = row["blocked"]
+        self.progress_chat_id = row["progress_chat_id"]
+        self.progress_message_id = row["progress_message_id"]
+
+        # السرعة تُحسب لهذا التشغيل فقط (الاستكمال يبدأ من عدادات محفوظة)
+        self.started = time.monotonic()
+        self.processed_at_start = self.processed
+        self.last_report = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+    def progress(self, status: str) -> Dict:
+        elapsed = time.monotonic() - self.started
+        done_now = self.processed - self.processed_at_start
+        rate = done_now / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total - self.processed, 0)
+        if status != "running" or not remaining:
+            eta = 0.0
+        else:
+            eta = remaining / rate if rate > 0 else None
+        return {
+            "id": self.id,
+            "status": status,
+            "total": max(self.total, self.processed),
+            "processed": self.processed,
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "rate": rate,
+            "eta": eta,
+            "elapsed": elapsed,
+        }
+
+
+class BroadcastEngine:
+    """إرسال جماعي محدود السرعة وقابل للاستكمال"""
+
+    def __init__(self, batch_size: int = 100, progress_interval: float = 3,
+                 db_retries: int = 3, db_retry_delay: float = 1.0):
+        self.batch_size = batch_size
+        self.progress_interval = progress_interval
+        self.db_retries = db_retries
+        self.db_retry_delay = db_retry_delay
+        self._jobs: Dict[int, _BroadcastJob] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # البدء والاستكمال
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def start(self, bot, kind: str, text: str, created_by: int,
+                    progress_chat_id: Optional[int] = None) -> Optional[int]:
+        """إنشاء إرسال جماعي جديد وتشغيله في الخلفية - يرجع رقمه"""
+        row = await broadcasts.create_broadcast(kind, text, created_by)
+        if row is None:
+            return None
+
+        job = _BroadcastJob(row)
+        print(f"📢 [BROADCAST] #{job.id} ({kind}) started by {created_by} for {job.total} users")
+
+        if progress_chat_id is not None:
+            try:
+                message = await bot.send_message(
+                    progress_chat_id,
+                    BroadcastMessages.get_progress_message(job.progress("running")),
+                    parse_mode="HTML",
+                )
+                job.progress_chat_id = progress_chat_id
+                job.progress_message_id = message.message_id
+                await broadcasts.set_progress_message(job.id, progress_chat_id, message.message_id)
+            except TelegramError as e:
+                logger.warning(f"Broadcast {job.id}: progress message failed: {e}")
+
+        self._spawn(bot, job)
+        return job.id
+
+    async def resume_pending(self, bot) -> int:
+        """استكمال الإرسالات التي قطعها إيقاف البوت"""
+        rows = await broadcasts.get_unfinished()
+        for row in rows:
+            if row["id"] in self._jobs:
+                continue
+            job = _BroadcastJob(row)
+            print(
+                f"📢 [BROADCAST] Resuming #{job.id} after user {job.cursor} "
+                f"({job.processed}/{job.total} done)"
+            )
+            self._spawn(bot, job)
+        return len(rows)
+
+    def _spawn(self, bot, job: _BroadcastJob):
+        self._jobs[job.id] = job
+        task = asyncio.create_task(self._run(bot, job), name=f"broadcast-{job.id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الإرسال
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def _run(self, bot, job: _BroadcastJob):
+        try:
+            while True:
+                page = await self._db_call(
+                    "recipients page", broadcasts.get_recipients_page, job.cursor, self.batch_size
+                )
+                if not page:
+                    break
+                await self._send_batch(bot, job, page)
+                await self._report(bot, job, "running")
+
+            await broadcasts.finish(job.id)
+            await self._report(bot, job, "done", force=True)
+            print(
+                f"   ✅ [BROADCAST] #{job.id} done: {job.sent} sent, "
+                f"{job.blocked} blocked, {job.failed} failed"
+            )
+        except asyncio.CancelledError:
+            await self._report(bot, job, "stopped", force=True)
+            raise
+        except Exception as e:
+            # يبقى running - يُستكمل من آخر نقطة حفظ مع الإقلاع التالي
+            logger.error(f"❌ Broadcast {job.id} stopped: {e}")
+        finally:
+            self._jobs.pop(job.id, None)
+
+    async def _send_batch(self, bot, job: _BroadcastJob, page: List[int]):
+        """دفعة واحدة ثم نقطة حفظ - الإلغاء يحفظ ما اكتمل من أولها"""
+        results: Dict[int, str] = {}
+
+        async def one(user_id: int):
+            results[user_id] = await self._send_one(bot, user_id, job.text)
+
+        try:
+            # الجدولة تحدد السرعة - الدفعة كلها تنتظر دورها هناك
+            await asyncio.gather(*(one(user_id) for user_id in page))
+        except asyncio.CancelledError:
+            # المؤشر يتقدم فقط على الجزء المكتمل المتصل من أول الدفعة
+            done = []
+            for user_id in page:
+                if user_id not in results:
+                    break
+                done.append(user_id)
+            if done:
+                self._count(job, done, results)
+                await self._checkpoint(job, done, results, attempts=1)
+            raise
+
+        self._count(job, page, results)
+        await self._checkpoint(job, page, results)
+
+    @staticmethod
+    async def _send_one(bot, user_id: int, text: str) -> str:
+        try:
+            await bot.send_message(user_id, text, parse_mode="HTML", rate_limit_args=Priority.BULK)
+            return SENT
+        except Forbidden:
+            return BLOCKED
+        except TelegramError as e:
+            logger.warning(f"Broadcast to {user_id} failed: {e}")
+            return FAILED
+
+    @staticmethod
+    def _count(job: _BroadcastJob, user_ids: List[int], results: Dict[int, str]):
+        for user_id in user_ids:
+            status = results[user_id]
+            if status == SENT:
+                job.sent += 1
+            elif status == BLOCKED:
+                job.blocked += 1
+            else:
+                job.failed += 1
+        job.cursor = user_ids[-1]
+
+    async def _checkpoint(self, job: _BroadcastJob, user_ids: List[int], results: Dict[int, str],
+                          attempts: Optional[int] = None):
+        """حفظ المؤشر - الفشل يوقف الإرسال حتى لا تتراكم دفعات غير محفوظة تُعاد بعد الإقلاع"""
+        blocked_ids = [user_id for user_id in user_ids if results[user_id] == BLOCKED]
+        await self._db_call(
+            "checkpoint", broadcasts.checkpoint,
+            job.id, job.cursor, job.sent, job.failed, job.blocked, blocked_ids,
+            attempts=attempts,
+        )
+
+    async def _db_call(self, label: str, call, *args, attempts: Optional[int] = None):
+        """
+        نداء قاعدة بيانات مع إعادة المحاولة - None / False = خطأ (قائمة فارغة نتيجة صحيحة).
+        بعد آخر محاولة يرفع RuntimeError فيبقى الإرسال running ويُستكمل لاحقاً
+        بدل أن يُغلق كـ done أو يتقدم بلا نقطة حفظ
+        """
+        attempts = attempts or self.db_retries
+        for attempt in range(attempts):
+            result = await call(*args)
+            if result is not None and result is not False:
+                return result
+            if attempt + 1 < attempts:
+                await asyncio.sleep(self.db_retry_delay * 2 ** attempt)
+        raise RuntimeError(f"{label} failed {attempts} times")
+
+    async def _report(self, bot, job: _BroadcastJob, status: str, force: bool = False):
+        """تعديل رسالة التقدم - مرة كل progress_interval ثانية على الأكثر"""
+        if job.progress_message_id is None:
+            return
+        now = time.monotonic()
+        if not force and now - job.last_report < self.progress_interval:
+            return
+        job.last_report = now
+        try:
+            await bot.edit_message_text(
+                BroadcastMessages.get_progress_message(job.progress(status)),
+                chat_id=job.progress_chat_id,
+                message_id=job.progress_message_id,
+                parse_mode="HTML",
+            )
+        except TelegramError as e:
+            # "message is not modified" أو رسالة محذوفة - الإرسال يستمر
+            logger.debug(f"Broadcast {job.id}: progress edit skipped: {e}")
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الإيقاف والإحصائيات
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def shutdown(self):
+        """إيقاف الإرسالات الجارية بعد حفظ ما اكتمل (قبل إغلاق اتصال البوت)"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict:
+        """الإرسالات الجارية وتقدمها"""
+        return {job_id: job.progress("running") for job_id, job in self._jobs.items()}
+
+
+# Global instance
+broadcast_engine = BroadcastEngine(
+    batch_size=BROADCAST_CONFIG["batch_size"],
+    progress_interval=BROADCAST_CONFIG["progress_interval"],
+    db_retries=BROADCAST_CONFIG["db_retries"],
+    db_retry_delay=BROADCAST_CONFIG["db_retry_delay"],
+)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 SELF-TEST (للتطوير فقط) - python -m services.broadcast.broadcast_engine
+# ═══════════════════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    from types import SimpleNamespace
+
+    from core.send_scheduler import SendScheduler
+    from database.connection import ConnectionPool, db
+    from database.migrations import MAIN_MIGRATIONS, MigrationRunner
+    from database.models import DatabaseModels
+    from database.operations import BroadcastOperations
+
+    USERS = 1200
+    BLOCKED_SHARE = 0.05
+    API_MS = 30
+
+    class FakeBot:
+        """Bot API وهمي: زمن ثابت + Forbidden لنسبة من المستخدمين"""
+
+        def __init__(self, scheduler: SendScheduler, blocked: Set[int]):
+            self.rate_limiter = scheduler
+            self.blocked = blocked
+            self.delivered: List[int] = []
+            self.edits = 0
+
+        async def _call(self, endpoint: str, data: Dict, rate_limit_args=None):
+            async def request(*_):
+                await asyncio.sleep(API_MS / 1000)
+                if data["chat_id"] in self.blocked:
+                    raise Forbidden("Forbidden: bot was blocked by the user")
+                return SimpleNamespace(message_id=1)
+
+            return await self.rate_limiter.process_request(
+                request, (), {}, endpoint, data, rate_limit_args
+            )
+
+        async def send_message(self, chat_id: int, text: str, parse_mode=None, rate_limit_args=None):
+            result = await self._call("sendMessage", {"chat_id": chat_id}, rate_limit_args)
+            if chat_id != ADMIN_CHAT:
+                self.delivered.append(chat_id)
+            return result
+
+        async def edit_message_text(self, text: str, chat_id: int, message_id: int, parse_mode=None):
+            self.edits += 1
+            return await self._call("editMessageText", {"chat_id": chat_id})
+
+    ADMIN_CHAT = 1
+
+    async def run_phase(engine: BroadcastEngine, bot: FakeBot, seconds: Optional[float]):
+        await bot.rate_limiter.initialize()
+        if seconds is None:
+            await engine.resume_pending(bot)
+            while engine._tasks:
+                await asyncio.sleep(0.1)
+        else:
+            await engine.start(bot, "price_change", "test", ADMIN_CHAT, ADMIN_CHAT)
+            await asyncio.sleep(seconds)
+            await engine.shutdown()
+        await bot.rate_limiter.shutdown()
+
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        # قاعدة بيانات مؤقتة - القاعدة الحقيقية لا تُلمس
+        db.pool = ConnectionPool(os.path.join(tmp, "bench.db"))
+        DatabaseModels.create_all_tables()
+        with db.get_connection() as conn:
+            MigrationRunner(conn, MAIN_MIGRATIONS, "bench").apply()
+
+        rng = random.Random(7)
+        user_ids = rng.sample(range(10**6, 10**9), USERS)
+        blocked = set(rng.sample(user_ids, int(USERS * BLOCKED_SHARE)))
+        with db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO users (telegram_id, registration_step) VALUES (?, ?)",
+                ((user_id, "completed" if i % 10 else "whatsapp_entered") for i, user_id in enumerate(user_ids)),
+            )
+        recipients = [user_id for i, user_id in enumerate(user_ids) if i % 10]
+        expected = sorted(user_id for user_id in recipients if user_id not in blocked)
+
+        print(f"🧪 Broadcast: {len(recipients)} recipients ({len(recipients) - len(expected)} blocked the bot), "
+              f"{API_MS} ms per API call\n")
+
+        engine = BroadcastEngine(batch_size=100, progress_interval=1)
+        scheduler = SendScheduler()
+        first = FakeBot(scheduler, blocked)
+        start = time.perf_counter()
+        asyncio.run(run_phase(engine, first, seconds=12))
+        row = BroadcastOperations.get_unfinished()[0]
+        print(f"⏸️ Stopped after 12s: cursor {row['last_telegram_id']}, "
+              f"{row['sent'] + row['blocked'] + row['failed']}/{row['total']} checkpointed")
+
+        second = FakeBot(SendScheduler(), blocked)
+        asyncio.run(run_phase(engine, second, seconds=None))
+        elapsed = time.perf_counter() - start
+
+        final = BroadcastOperations.get_broadcast(row["id"])
+        delivered = first.delivered + second.delivered
+        marked = db.execute_query("SELECT COUNT(*) FROM users WHERE blocked_at IS NOT NULL")[0][0]
+        duplicates = len(delivered) - len(set(delivered))
+
+        print(f"▶️ Resumed and finished: status {final['status']}")
+        print(f"   Sent {final['sent']}, blocked {final['blocked']}, failed {final['failed']} in {elapsed:.1f}s "
+              f"({len(delivered) / elapsed:.1f} msg/s)")
+        print(f"   Every recipient reached: {'✅' if sorted(set(delivered)) == expected else '❌'}")
+        print(f"   Re-sent after restart: {duplicates}")
+        print(f"   Users marked blocked: {marked} (expected {len(recipients) - len(expected)})")
+        print(f"   Progress edits: {first.edits + second.edits}")
+
+        # انقطاع قاعدة البيانات: صفحة المستلمين ترجع None - لا يُغلق كـ done
+        async def db_outage():
+            original = broadcasts.get_recipients_page
+            broadcasts.get_recipients_page = lambda *args: asyncio.sleep(0, result=None)
+            try:
+                outage_engine = BroadcastEngine(db_retries=2, db_retry_delay=0.01)
+                broadcast_id = await outage_engine.start(FakeBot(SendScheduler(), blocked), "price_change", "x", ADMIN_CHAT)
+                while outage_engine._tasks:
+                    await asyncio.sleep(0.01)
+                return broadcast_id
+            finally:
+                broadcasts.get_recipients_page = original
+
+        outage_id = asyncio.run(db_outage())
+        print(f"   DB error while paging: status {BroadcastOperations.get_broadcast(outage_id)['status']} "
+              f"(expected running)")
+
+        db.pool.close_all()
@@ -0,0 +1,107 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              📢 BROADCAST MESSAGES - رسائل الإرسال الجماعي               ║
+# ║                  Price Change Notice & Admin Progress                   ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+from typing import Dict, List, Optional, Tuple
+
+_PLATFORM_NAMES = {
+    'playstation': '🎮 PlayStation',
+    'xbox': '🎮 Xbox',
+    'pc': '🖥️ PC'
+}
+
+_TRANSFER_NAMES = {
+    'normal': '📅 عادي',
+    'instant': '⚡️ فوري'
+}
+
+
+class BroadcastMessages:
+    """رسائل الإرسال الجماعي"""
+
+    @staticmethod
+    def get_price_change_notice(platform: str, transfer_type: str, old_price: int, new_price: int) -> str:
+        """إشعار المستخدمين بتغيير سعر"""
+        platform_name = _PLATFORM_NAMES.get(platform, platform)
+        transfer_name = _TRANSFER_NAMES.get(transfer_type, transfer_type)
+        trend = "📈 ارتفع" if new_price > old_price else "📉 انخفض"
+
+        return f"""📢 <b>تحديث الأسعار</b>
+
+{trend} سعر بيع الكوينز:
+
+🎮 <b>المنصة:</b> {platform_name}
+⏰ <b>نوع التحويل:</b> {transfer_name}
+💎 <b>الكمية:</b> 1,000,000 كوين
+
+💰 <b>السعر القديم:</b> <s>{old_price:,} ج.م</s>
+💰 <b>السعر الجديد:</b> <code>{new_price:,} ج.م</code>
+
+💸 للبيع الآن: /sell"""
+
+    @staticmethod
+    def get_price_changes_notice(changes: List[Tuple[str, str, int, int]]) -> str:
+        """إشعار واحد بعدة أسعار تغيرت - changes: (platform, transfer_type, old, new)"""
+        if len(changes) == 1:
+            return BroadcastMessages.get_price_change_notice(*changes[0])
+
+        lines = []
+        for platform, transfer_type, old_price, new_price in changes:
+            trend = "📈" if new_price > old_price else "📉"
+            lines.append(
+                f"{trend} {_PLATFORM_NAMES.get(platform, platform)} - {_TRANSFER_NAMES.get(transfer_type, transfer_type)}: "
+                f"<s>{old_price:,}</s> ← <code>{new_price:,} ج.م</code>"
+            )
+        prices = "\n".join(lines)
+
+        return f"""📢 <b>تحديث الأسعار</b>
+
+💎 سعر بيع 1,000,000 كوين:
+
+{prices}
+
+💸 للبيع الآن: /sell"""
+
+    @staticmethod
+    def _format_duration(seconds: Optional[float]) -> str:
+        if seconds is None:
+            return "—"
+        seconds = int(seconds)
+        if seconds < 60:
+            return f"{seconds} ث"
+        minutes, seconds = divmod(seconds, 60)
+        if minutes < 60:
+            return f"{minutes} د {seconds} ث"
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours} س {minutes} د"
+
+    @staticmethod
+    def get_progress_message(progress: Dict) -> str:
+        """رسالة التقدم الحية للأدمن (تُعدل أثناء الإرسال)"""
+        total = progress['total']
+        processed = progress['processed']
+        percent = min(processed / total * 100, 100) if total else 100
+        filled = int(percent // 10)
+        bar = "▓" * filled + "░" * (10 - filled)
+
+        status_titles = {
+            'running': '⏳ جاري الإرسال...',
+            'done': '✅ اكتمل الإرسال',
+            'stopped': '⏸️ توقف مؤقتاً - سيكمل بعد إعادة التشغيل',
+        }
+        title = status_titles.get(progress['status'], progress['status'])
+
+        return f"""📢 <b>إرسال جماعي #{progress['id']}</b>
+{title}
+
+{bar} {percent:.0f}%
+👥 <b>المستلمون:</b> {processed:,} / {total:,}
+
+✅ <b>تم الإرسال:</b> {progress['sent']:,}
+🚫 <b>حظروا البوت:</b> {progress['blocked']:,}
+❌ <b>فشل:</b> {progress['failed']:,}
+
+⚡ <b>السرعة:</b> {progress['rate']:.1f} رسالة/ث
+⏱️ <b>الوقت المتبقي:</b> {BroadcastMessages._format_duration(progress['eta'])}
+🕐 <b>المدة:</b> {BroadcastMessages._format_duration(progress['elapsed'])}"""
@@ -0,0 +1,160 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║              🏷️ PRICE NOTICES - تجميع إشعارات تغيير الأسعار              ║
+# ║          عدة تعديلات متتالية من الأدمن = إرسال جماعي واحد فقط            ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+تجميع إشعارات تغيير السعر قبل إرسالها لكل المستخدمين
+
+- كل تعديل سعر يبدأ (أو يعيد) مؤقتاً قصيراً (price_notice_delay)، وعند
+  انتهائه يُرسل إشعار واحد فيه كل الأسعار التي تغيرت
+  → الأدمن يعدل الأسعار الستة في جلسة واحدة = رسالة واحدة لكل مستخدم
+- السعر الذي رجع لآخر قيمة أُعلنت (تعديل ثم تراجع) لا يُرسل إطلاقاً
+- عند إيقاف البوت يُبدأ الإرسال المعلق فوراً (يُحفظ ويُستكمل بعد الإقلاع)
+
+الاستخدام:
+    from services.broadcast import price_notices
+    price_notices.add(context.bot, platform, transfer_type, old_price, new_price, admin_id, chat_id)
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config import BROADCAST_CONFIG
+from services.broadcast.broadcast_engine import BroadcastEngine, broadcast_engine
+from services.broadcast.broadcast_messages import BroadcastMessages
+
+logger = logging.getLogger(__name__)
+
+PriceKey = Tuple[str, str]  # (platform, transfer_type)
+
+
+class PriceNoticeBatcher:
+    """تأجيل ودمج إشعارات تغيير الأسعار في إرسال جماعي واحد"""
+
+    def __init__(self, engine: BroadcastEngine, delay: float = 60):
+        self.engine = engine
+        self.delay = delay
+        # السعر قبل أول تعديل في الدفعة + أحدث سعر
+        self._pending: Dict[PriceKey, List[int]] = {}
+        # آخر سعر وصل للمستخدمين (في الذاكرة - بعد إعادة التشغيل يبدأ من old_price)
+        self._announced: Dict[PriceKey, int] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._target = None  # (bot, admin_id, chat_id) من آخر تعديل
+
+        # إحصائيات
+        self.broadcasts = 0
+        self.merged = 0
+        self.reverted = 0
+
+    def add(self, bot, platform: str, transfer_type: str, old_price: int, new_price: int,
+            admin_id: int, chat_id: Optional[int] = None):
+        """تسجيل تغيير سعر وإعادة ضبط المؤقت"""
+        key = (platform, transfer_type)
+        if key in self._pending:
+            self._pending[key][1] = new_price
+            self.merged += 1
+        else:
+            self._pending[key] = [self._announced.get(key, old_price), new_price]
+        self._target = (bot, admin_id, chat_id)
+
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.create_task(self._flush_later(), name="price-notices")
+        print(f"   🏷️ [PRICE-NOTICE] {platform} {transfer_type} queued - broadcast in {self.delay:.0f}s")
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> Optional[int]:
+        """بدء إرسال جماعي واحد بكل الأسعار المتغيرة - يرجع رقمه (أو None)"""
+        pending, self._pending = self._pending, {}
+        changes = []
+        for (platform, transfer_type), (announced, latest) in pending.items():
+            if announced == latest:
+                self.reverted += 1
+                continue
+            changes.append((platform, transfer_type, announced, latest))
+        if not changes:
+            return None
+
+        bot, admin_id, chat_id = self._target
+        text = BroadcastMessages.get_price_changes_notice(changes)
+        broadcast_id = await self.engine.start(bot, "price_change", text, admin_id, chat_id)
+        if broadcast_id is None:
+            logger.error(f"❌ Price notice not started ({len(changes)} changes)")
+            return None
+
+        for platform, transfer_type, _, latest in changes:
+            self._announced[(platform, transfer_type)] = latest
+        self.broadcasts += 1
+        return broadcast_id
+
+    async def shutdown(self):
+        """بدء الإرسال المعلق فوراً (قبل إيقاف محرك الإرسال)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            await self.flush()
+
+    def get_stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "broadcasts": self.broadcasts,
+            "merged": self.merged,
+            "reverted": self.reverted,
+        }
+
+
+# Global instance
+price_notices = PriceNoticeBatcher(
+    broadcast_engine,
+    delay=BROADCAST_CONFIG["price_notice_delay"],
+)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 SELF-TEST (للتطوير فقط) - python -m services.broadcast.price_notices
+# ═══════════════════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+
+    class FakeEngine:
+        def __init__(self):
+            self.texts: List[str] = []
+
+        async def start(self, bot, kind, text, created_by, progress_chat_id=None):
+            self.texts.append(text)
+            return len(self.texts)
+
+    async def main():
+        engine = FakeEngine()
+        notices = PriceNoticeBatcher(engine, delay=0.05)
+
+        # الأدمن يعدل الأسعار الستة في جلسة واحدة
+        for platform in ("playstation", "xbox", "pc"):
+            for transfer_type in ("normal", "instant"):
+                notices.add(None, platform, transfer_type, 5000, 5100, 1, 1)
+        await asyncio.sleep(0.1)
+        assert len(engine.texts) == 1, engine.texts
+        print(f"✅ 6 edits in one sitting -> {len(engine.texts)} broadcast")
+
+        # تعديل ثم تراجع لنفس القيمة المعلنة - لا شيء يُرسل
+        notices.add(None, "pc", "normal", 5100, 5300, 1, 1)
+        notices.add(None, "pc", "normal", 5300, 5100, 1, 1)
+        await asyncio.sleep(0.1)
+        assert len(engine.texts) == 1
+        print("✅ Edit + revert -> no broadcast")
+
+        # تراجع عن سعر معلن سابقاً = تغيير حقيقي
+        notices.add(None, "pc", "normal", 5100, 5000, 1, 1)
+        await notices.shutdown()
+        assert len(engine.texts) == 2 and "5,000" in engine.texts[-1]
+        print("✅ Shutdown flushes the pending notice")
+        print(f"📊 {notices.get_stats()}")
+
+    asyncio.run(main())
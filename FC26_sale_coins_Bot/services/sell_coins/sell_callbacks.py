@@ -6,14 +6,17 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
+from utils.edit_coalescer import edit_coalescer
+
 
 async def handle_sell_callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """معالج أزرار البيع"""
     query = update.callback_query
-    await query.answer()
+    await edit_coalescer.answer(query)
 
     if query.data == "contact_support":
-        await query.edit_message_text(
+        await edit_coalescer.edit(
+            query,
             "📞 **التواصل مع الدعم**\n\n"
             "🔥 **للمعاملات السريعة:**\n"
             "واتساب الدعم: `01094591331`\n\n"
@@ -32,7 +35,8 @@ async def handle_sell_callbacks(update: Update, context: ContextTypes.DEFAULT_TY
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
+        await edit_coalescer.edit(
+            query,
             "🏠 **القائمة الرئيسية - FC 26**\n\n"
             "مرحباً بك في بوت FC 26\n"
             "اختر الخدمة المطلوبة:",
@@ -48,7 +52,8 @@ async def handle_sell_callbacks(update: Update, context: ContextTypes.DEFAULT_TY
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
 
-        await query.edit_message_text(
+        await edit_coalescer.edit(
+            query,
             "💰 **بيع الكوينز - FC 26**\n\n"
             "🔥 **خدماتنا:**\n"
             "• بيع كوينز FC 26 بأفضل الأسعار\n"
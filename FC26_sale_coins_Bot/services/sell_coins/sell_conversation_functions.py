@@ -183,7 +183,7 @@ async def sell_amount_entered(update: Update, context: ContextTypes.DEFAULT_TYPE
     price = SellConversationHandler.calculate_price(amount, transfer_type)
 
     # عرض ملخص البيع
-    summary = _create_sale_summary(user_id, amount, transfer_type, platform, price)
+    summary = await _create_sale_summary(user_id, amount, transfer_type, platform, price)
     await update.message.reply_text(summary, parse_mode="Markdown")
 
     # مسح بيانات المحادثة وإنهاء المحادثة
@@ -191,14 +191,16 @@ async def sell_amount_entered(update: Update, context: ContextTypes.DEFAULT_TYPE
     return ConversationHandler.END
 
 
-def _create_sale_summary(user_id, amount, transfer_type, platform, price):
+async def _create_sale_summary(user_id, amount, transfer_type, platform, price):
     """إنشاء ملخص البيع"""
     formatted_amount = SellConversationHandler.format_amount(amount)
     type_name = SellConversationHandler.get_transfer_type_name(transfer_type)
     platform_name = SellConversationHandler.get_platform_name(platform)
 
     # جلب سعر المليون كمرجع للمستخدم - مع fallback للأسعار الافتراضية
-    million_price = CoinSellPricing.get_price(platform, 1000000, transfer_type)
+    million_price = await CoinSellPricing.get_price_async(
+        platform, 1000000, transfer_type
+    )
 
     # إذا لم يتم العثور على السعر، استخدم الأسعار الافتراضية المباشرة
     if million_price is None:
@@ -12,7 +12,6 @@
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
-    CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
     ConversationHandler,
@@ -20,7 +19,10 @@ from telegram.ext import (
     filters,
 )
 
-from database.operations import UserOperations
+from config import SESSION_TTL_CONFIG
+from core.callback_router import callback_data, callback_router, parse_callback_data
+from database.async_gateway import orders, users
+from utils.edit_coalescer import edit_coalescer
 from utils.logger import log_user_action
 from utils.message_tagger import MessageTagger
 from utils.session_bucket import bucket, clear_bucket
@@ -48,7 +50,7 @@ class SellCoinsConversation:
         print(f"\n💰 [SELL] Service started for user {user_id}")
 
         # التحقق من التسجيل
-        user_data = UserOperations.get_user_data(user_id)
+        user_data = await users.get_user_data(user_id)
         if not user_data or user_data.get("registration_step") != "completed":
             await update.message.reply_text(
                 "❌ <b>يجب إكمال التسجيل أولاً!</b>\n\n🚀 /start للتسجيل",
@@ -60,12 +62,12 @@ class SellCoinsConversation:
         keyboard = [
             [
                 InlineKeyboardButton(
-                    "🎮 PlayStation", callback_data="sell_platform_playstation"
+                    "🎮 PlayStation", callback_data=callback_data("sell", "platform", "playstation")
                 )
             ],
-            [InlineKeyboardButton("🎮 Xbox", callback_data="sell_platform_xbox")],
-            [InlineKeyboardButton("🖥️ PC", callback_data="sell_platform_pc")],
-            [InlineKeyboardButton("❌ إلغاء", callback_data="sell_cancel")],
+            [InlineKeyboardButton("🎮 Xbox", callback_data=callback_data("sell", "platform", "xbox"))],
+            [InlineKeyboardButton("🖥️ PC", callback_data=callback_data("sell", "platform", "pc"))],
+            [InlineKeyboardButton("❌ إلغاء", callback_data=callback_data("sell", "cancel"))],
         ]
 
         await update.message.reply_text(
@@ -82,14 +84,19 @@ class SellCoinsConversation:
         MessageTagger.mark_as_handled(context)
 
         query = update.callback_query
-        await query.answer()
+        await edit_coalescer.answer(query)
 
-        if query.data == "sell_cancel":
-            await query.edit_message_text("❌ تم إلغاء عملية البيع")
+        _, action, _ = parse_callback_data(query.data)
+
+        if action == "cancel":
+            await edit_coalescer.edit(query, "❌ تم إلغاء عملية البيع")
             return ConversationHandler.END
 
         user_id = query.from_user.id
-        platform = query.data.replace("sell_platform_", "")
+        if not context.args:
+            # زر بدون منصة (sell:platform) - الضغطة أُجيبت والحالة كما هي
+            return SELL_PLATFORM
+        platform = context.args[0]
 
         print(f"🎮 [SELL] User {user_id} selected platform: {platform}")
 
@@ -97,12 +104,13 @@ class SellCoinsConversation:
         bucket(context, "sell")["platform"] = platform
         log_user_action(user_id, f"Selected platform: {platform}")
 
-        # عرض أنواع التحويل مع الأسعار
-        transfer_message = CoinSellPricing.get_platform_pricing_message(platform)
+        # جلب أسعار 1M (رحلة واحدة لخيط قاعدة البيانات)
+        prices = await CoinSellPricing.get_transfer_prices_async(platform, 1000000)
+        normal_price = prices["normal"]
+        instant_price = prices["instant"]
 
-        # جلب أسعار 1M
-        normal_price = CoinSellPricing.get_price(platform, 1000000, "normal")
-        instant_price = CoinSellPricing.get_price(platform, 1000000, "instant")
+        # عرض أنواع التحويل مع الأسعار
+        transfer_message = CoinSellPricing.get_platform_pricing_message(platform, prices)
 
         normal_formatted = f"{normal_price:,} ج.م" if normal_price else "غير متاح"
         instant_formatted = f"{instant_price:,} ج.م" if instant_price else "غير متاح"
@@ -111,19 +119,20 @@ class SellCoinsConversation:
             [
                 InlineKeyboardButton(
                     f"📅 تحويل عادي - {normal_formatted}",
-                    callback_data=f"sell_type_normal",
+                    callback_data=callback_data("sell", "type", "normal"),
                 )
             ],
             [
                 InlineKeyboardButton(
                     f"⚡ تحويل فوري - {instant_formatted}",
-                    callback_data=f"sell_type_instant",
+                    callback_data=callback_data("sell", "type", "instant"),
                 )
             ],
-            [InlineKeyboardButton("🔙 رجوع", callback_data="sell_back")],
+            [InlineKeyboardButton("🔙 رجوع", callback_data=callback_data("sell", "back"))],
         ]
 
-        await query.edit_message_text(
+        await edit_coalescer.edit(
+            query,
             transfer_message,
             reply_markup=InlineKeyboardMarkup(keyboard),
             parse_mode="Markdown",
@@ -137,21 +146,24 @@ class SellCoinsConversation:
         MessageTagger.mark_as_handled(context)
 
         query = update.callback_query
-        await query.answer()
+        await edit_coalescer.answer(query)
 
-        if query.data == "sell_back":
+        _, action, _ = parse_callback_data(query.data)
+
+        if action == "back":
             keyboard = [
                 [
                     InlineKeyboardButton(
-                        "🎮 PlayStation", callback_data="sell_platform_playstation"
+                        "🎮 PlayStation", callback_data=callback_data("sell", "platform", "playstation")
                     )
                 ],
-                [InlineKeyboardButton("🎮 Xbox", callback_data="sell_platform_xbox")],
-                [InlineKeyboardButton("🖥️ PC", callback_data="sell_platform_pc")],
-                [InlineKeyboardButton("❌ إلغاء", callback_data="sell_cancel")],
+                [InlineKeyboardButton("🎮 Xbox", callback_data=callback_data("sell", "platform", "xbox"))],
+                [InlineKeyboardButton("🖥️ PC", callback_data=callback_data("sell", "platform", "pc"))],
+                [InlineKeyboardButton("❌ إلغاء", callback_data=callback_data("sell", "cancel"))],
             ]
 
-            await query.edit_message_text(
+            await edit_coalescer.edit(
+                query,
                 "💰 <b>بيع الكوينز</b>\n\n🎮 اختر منصتك:",
                 reply_markup=InlineKeyboardMarkup(keyboard),
                 parse_mode="HTML",
@@ -159,7 +171,10 @@ class SellCoinsConversation:
             return SELL_PLATFORM
 
         user_id = query.from_user.id
-        transfer_type = query.data.replace("sell_type_", "")
+        if not context.args:
+            # زر بدون نوع تحويل (sell:type) - الضغطة أُجيبت والحالة كما هي
+            return SELL_TYPE
+        transfer_type = context.args[0]
 
         # 🔥 استخدام bucket
         sell_bucket = bucket(context, "sell")
@@ -181,7 +196,8 @@ class SellCoinsConversation:
 
         transfer_name = "⚡ فوري" if transfer_type == "instant" else "📅 عادي"
 
-        await query.edit_message_text(
+        await edit_coalescer.edit(
+            query,
             f"✅ **تم اختيار {platform_name} - {transfer_name}**\n\n"
             f"💰 **أدخل كمية الكوينز للبيع:**\n\n"
             f"📝 **قواعد الإدخال:**\n"
@@ -260,7 +276,9 @@ class SellCoinsConversation:
 
         transfer_name = "⚡ فوري" if transfer_type == "instant" else "📅 عادي"
 
-        million_price = CoinSellPricing.get_price(platform, 1000000, transfer_type)
+        million_price = await CoinSellPricing.get_price_async(
+            platform, 1000000, transfer_type
+        )
         if million_price is None:
             default_prices = {
                 "normal": {"playstation": 5600, "xbox": 5600, "pc": 6100},
@@ -268,6 +286,17 @@ class SellCoinsConversation:
             }
             million_price = default_prices.get(transfer_type, {}).get(platform, 5600)
 
+        # حفظ الطلب في سجل الطلبات قبل التأكيد (commit فعلي - لا يضيع الطلب بعد إبلاغ المستخدم)
+        order_id = await orders.create_order(
+            user_id, platform, transfer_type, amount, price
+        )
+        if order_id is None:
+            await update.message.reply_text(
+                "❌ حدث خطأ أثناء حفظ الطلب، يرجى المحاولة مرة أخرى."
+            )
+            return SELL_AMOUNT
+        print(f"🧾 [SELL] Order {order_id} recorded for user {user_id}")
+
         await update.message.reply_text(
             f"🎉 **تم تأكيد طلب البيع بنجاح!**\n\n"
             f"📊 **تفاصيل الطلب:**\n"
@@ -281,7 +310,7 @@ class SellCoinsConversation:
             f"2️⃣ تسليم الكوينز للممثل\n"
             f"3️⃣ استلام المبلغ حسب نوع التحويل\n\n"
             f"✅ **تم حفظ طلبك في النظام**\n"
-            f"🆔 **رقم الطلب:** #{user_id}{amount}\n\n"
+            f"🆔 **رقم الطلب:** #{order_id}\n\n"
             f"💬 **للاستفسار:** /sell\n"
             f"🏠 **القائمة الرئيسية:** /start",
             parse_mode="Markdown",
@@ -289,7 +318,7 @@ class SellCoinsConversation:
 
         log_user_action(
             user_id,
-            f"Completed sell order: {amount} coins, {transfer_type}, {price} EGP",
+            f"Completed sell order {order_id}: {amount} coins, {transfer_type}, {price} EGP",
         )
 
         # 🔥 مسح bucket فقط
@@ -334,16 +363,22 @@ class SellCoinsConversation:
             entry_points=[CommandHandler("sell", SellCoinsConversation.start_sell)],
             states={
                 SELL_PLATFORM: [
-                    CallbackQueryHandler(
-                        SellCoinsConversation.choose_platform,
-                        pattern="^sell_platform_|^sell_cancel$",
-                    )
+                    callback_router.handler("sell.platform", {
+                        "sell:platform": SellCoinsConversation.choose_platform,
+                        "sell:cancel": SellCoinsConversation.choose_platform,
+                    }, legacy={
+                        r"sell_platform_(\w+)": r"sell:platform:\1",
+                        r"sell_cancel": "sell:cancel",
+                    })
                 ],
                 SELL_TYPE: [
-                    CallbackQueryHandler(
-                        SellCoinsConversation.choose_type,
-                        pattern="^sell_type_|^sell_back$",
-                    )
+                    callback_router.handler("sell.type", {
+                        "sell:type": SellCoinsConversation.choose_type,
+                        "sell:back": SellCoinsConversation.choose_type,
+                    }, legacy={
+                        r"sell_type_(normal|instant)": r"sell:type:\1",
+                        r"sell_back": "sell:back",
+                    })
                 ],
                 SELL_AMOUNT: [
                     MessageHandler(
@@ -355,5 +390,6 @@ class SellCoinsConversation:
             fallbacks=[CommandHandler("cancel", SellCoinsConversation.cancel)],
             name="sell_coins_conversation",
             persistent=True,  # 🔥 تفعيل Persistence
+            conversation_timeout=SESSION_TTL_CONFIG["idle_ttl_seconds"],  # ⏳ إنهاء المحادثة الخاملة
             block=True,
         )
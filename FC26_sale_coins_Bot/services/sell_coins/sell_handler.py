@@ -16,7 +16,7 @@ from telegram.ext import (
     filters,
 )
 
-from database.operations import UserOperations
+from database.async_gateway import users
 
 # استيراد الأدوات المساعدة من البوت الرئيسي
 from utils.logger import log_user_action
@@ -113,7 +113,7 @@ class SellCoinsHandler:
         log_user_action(user_id, "Started coin selling service")
 
         # التحقق من تسجيل المستخدم
-        user_data = UserOperations.get_user_data(user_id)
+        user_data = await users.get_user_data(user_id)
         if not user_data:
             await update.message.reply_text(
                 "❌ <b>يجب التسجيل أولاً!</b>\n\n🚀 استخدم /start للتسجيل قبل بيع الكوينز",
@@ -160,12 +160,13 @@ class SellCoinsHandler:
 
         log_user_action(user_id, f"Selected platform: {platform}")
 
-        # عرض رسالة الأسعار البسيطة
-        transfer_message = CoinSellPricing.get_platform_pricing_message(platform)
+        # جلب أسعار 1M للأزرار (رحلة واحدة لخيط قاعدة البيانات)
+        prices = await CoinSellPricing.get_transfer_prices_async(platform, 1000000)
+        normal_price = prices["normal"]
+        instant_price = prices["instant"]
 
-        # جلب أسعار 1M للأزرار
-        normal_price = CoinSellPricing.get_price(platform, 1000000, "normal")
-        instant_price = CoinSellPricing.get_price(platform, 1000000, "instant")
+        # عرض رسالة الأسعار البسيطة
+        transfer_message = CoinSellPricing.get_platform_pricing_message(platform, prices)
 
         normal_formatted = f"{normal_price:,} ج.م" if normal_price else "غير متاح"
         instant_formatted = f"{instant_price:,} ج.م" if instant_price else "غير متاح"
@@ -386,7 +387,9 @@ class SellCoinsHandler:
         transfer_name = "⚡ فوري" if transfer_type == "instant" else "📅 عادي"
 
         # جلب سعر المليون كمرجع للمستخدم
-        million_price = CoinSellPricing.get_price(platform, 1000000, transfer_type)
+        million_price = await CoinSellPricing.get_price_async(
+            platform, 1000000, transfer_type
+        )
 
         # إذا لم يتم العثور على السعر، استخدم الأسعار الافتراضية المباشرة
         if million_price is None:
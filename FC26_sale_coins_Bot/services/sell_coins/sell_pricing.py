@@ -60,10 +60,10 @@ class CoinSellPricing:
     def get_price(cls, platform: str, coins: int, transfer_type: str = "normal") -> Optional[int]:
         """جلب السعر من قاعدة البيانات أولاً، ثم الكود كاحتياطي"""
         
-        # محاولة جلب السعر من قاعدة البيانات الذكية أولاً
+        # محاولة جلب السعر من دفتر الأسعار (نسخة من قاعدة البيانات في الذاكرة)
         if DATABASE_AVAILABLE:
             try:
-                db_price = AdminOperations.get_price(platform, transfer_type, coins)
+                db_price = AdminOperations.get_cached_price(platform, transfer_type, coins)
                 if db_price is not None:
                     return db_price
             except Exception:
@@ -77,6 +77,12 @@ class CoinSellPricing:
         
         return price_table[platform].get(coins)
     
+    @classmethod
+    async def get_price_async(cls, platform: str, coins: int, transfer_type: str = "normal") -> Optional[int]:
+        """نسخة غير متزامنة من get_price - القراءة من دفتر الأسعار لا تحجب الـ event loop"""
+        await cls._ensure_price_book()
+        return cls.get_price(platform, coins, transfer_type)
+    
     @classmethod
     def get_transfer_prices(cls, platform: str, coins: int) -> Dict[str, Optional[int]]:
         """جلب أسعار التحويل العادي والفوري لكمية معينة"""
@@ -85,6 +91,21 @@ class CoinSellPricing:
             "instant": cls.get_price(platform, coins, "instant")
         }
     
+    @classmethod
+    async def get_transfer_prices_async(cls, platform: str, coins: int) -> Dict[str, Optional[int]]:
+        """جلب السعرين (عادي/فوري) من دفتر الأسعار - بدون I/O"""
+        await cls._ensure_price_book()
+        return cls.get_transfer_prices(platform, coins)
+    
+    @classmethod
+    async def _ensure_price_book(cls):
+        """تحميل دفتر الأسعار (إن لم يكن محملاً) على خيط قاعدة الادمن بدل الـ event loop"""
+        if DATABASE_AVAILABLE:
+            try:
+                await AdminOperations.ensure_price_book()
+            except Exception:
+                pass  # get_price يرجع للأسعار الافتراضية
+    
     @classmethod
     def calculate_custom_price(cls, platform: str, coins: int) -> Optional[int]:
         """حساب السعر لكمية مخصصة من الكوينز"""
@@ -209,16 +230,21 @@ class CoinSellPricing:
         return comparison
     
     @classmethod
-    def get_platform_pricing_message(cls, platform: str) -> str:
-        """رسالة أسعار مختصرة - 1M فقط - تجلب الأسعار من قاعدة البيانات"""
+    def get_platform_pricing_message(cls, platform: str, prices: Optional[Dict[str, Optional[int]]] = None) -> str:
+        """رسالة أسعار مختصرة - 1M فقط - تجلب الأسعار من قاعدة البيانات
+        
+        prices: أسعار 1M المجلوبة مسبقاً (من get_transfer_prices_async) لتجنب استعلام ثاني
+        """
         if platform not in cls.NORMAL_PRICES:
             return "❌ منصة غير مدعومة"
         
         platform_name = cls.get_platform_display_name(platform)
         
         # جلب الأسعار من قاعدة البيانات (نفس طريقة الأزرار)
-        normal_price_1m = cls.get_price(platform, 1000000, "normal")
-        instant_price_1m = cls.get_price(platform, 1000000, "instant")
+        if prices is None:
+            prices = cls.get_transfer_prices(platform, 1000000)
+        normal_price_1m = prices["normal"]
+        instant_price_1m = prices["instant"]
         
         normal_formatted = f"{normal_price_1m:,} ج.م" if normal_price_1m else "غير متاح"
         instant_formatted = f"{instant_price_1m:,} ج.م" if instant_price_1m else "غير متاح"
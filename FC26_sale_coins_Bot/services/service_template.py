@@ -26,7 +26,7 @@ from telegram.ext import (
     filters,
 )
 
-from database.operations import UserOperations
+from database.async_gateway import users
 from utils.logger import log_user_action
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -65,7 +65,7 @@ class BuyCoinsService:
         log_user_action(user_id, "Started buy coins service")
 
         # التحقق من التسجيل (اختياري)
-        user_data = UserOperations.get_user_data(user_id)
+        user_data = await users.get_user_data(user_id)
         if not user_data or user_data.get("registration_step") != "completed":
             await update.message.reply_text(
                 "❌ <b>يجب إكمال التسجيل أولاً!</b>\n\n🚀 /start للتسجيل",
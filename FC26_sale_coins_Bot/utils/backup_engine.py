@@ -0,0 +1,459 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║                    🗄️ BACKUP ENGINE                                      ║
+# ║          نسخ احتياطي تزايدي مضغوط لقواعد البيانات والجلسات              ║
+# ║            SQLite online backup + chunk dedup (sha256) + zlib           ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+🗄️ محرك النسخ الاحتياطي
+
+ما يتم نسخه:
+------------
+- sessions.db      (PERSISTENCE_CONFIG['path'])
+- fc26_bot.db      (DATABASE_CONFIG)
+- fc26_admin.db    (AdminOperations.DB_NAME)
+
+كيف:
+-----
+1. نسخة متسقة من كل قاعدة عبر SQLite online backup API (على خطوات -
+   الكتابة في البوت تستمر بين الخطوات) إلى ملف مؤقت في staging/
+2. تقسيم النسخة لقطع ثابتة الحجم (chunk_size_kb) وحساب sha256 لكل قطعة
+3. القطعة الموجودة مسبقاً لا تُكتب مرة أخرى (dedup) - الجديدة تُضغط بـ zlib
+4. manifest (JSON) لكل snapshot: قائمة القطع لكل ملف + sha256 للملف كاملاً
+5. الاحتفاظ بآخر max_backups snapshots وحذف القطع التي لم يعد يستخدمها أحد
+
+التخزين:
+--------
+data/backups/
+    chunks/ab/ab12...      قطعة (zlib إذا compress) باسم sha256 للمحتوى الأصلي
+    manifests/<id>.json    وصف الـ snapshot
+    staging/               ملفات مؤقتة أثناء النسخ
+
+⚠️ run() عملية متزامنة ثقيلة - تُستدعى من خيط منفصل (asyncio.to_thread)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import BACKUP_CONFIG, DATABASE_CONFIG, PERSISTENCE_CONFIG
+
+MB = 1024 * 1024
+MANIFEST_VERSION = 1
+
+# أرقام الـ snapshots (20260101-120000 أو 20260101-120000-2) - أي شيء آخر
+# (مثل ../) قد يُستخدم كمسار داخل manifests/ و restore/
+SNAPSHOT_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+class BackupError(Exception):
+    """نسخة احتياطية ناقصة أو تالفة"""
+
+
+class BackupEngine:
+    """نسخ احتياطي تزايدي بقطع مشتركة بين الـ snapshots"""
+
+    def __init__(
+        self,
+        root: str = "data/backups",
+        chunk_size: int = 64 * 1024,
+        compress: bool = True,
+        max_backups: int = 10,
+        pages_per_step: int = 256,
+    ):
+        self.root = Path(root)
+        self.chunks_dir = self.root / "chunks"
+        self.manifests_dir = self.root / "manifests"
+        self.staging_dir = self.root / "staging"
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self.max_backups = max_backups
+        self.pages_per_step = pages_per_step
+
+        # نسخة واحدة في نفس الوقت (الحذف في نهاية run لا يتقاطع مع كتابة قطع)
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._last_report: Optional[dict] = None
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 📍 المصادر
+    # ═══════════════════════════════════════════════════════════════════════
+
+    @staticmethod
+    def sources() -> Dict[str, Path]:
+        """اسم الملف داخل الـ snapshot → مساره الحقيقي"""
+        from database.admin_operations import AdminOperations
+
+        return {
+            "sessions.db": Path(PERSISTENCE_CONFIG["path"]),
+            "fc26_bot.db": Path(DATABASE_CONFIG["path"]) / DATABASE_CONFIG["name"],
+            "fc26_admin.db": Path(AdminOperations.DB_NAME),
+        }
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 🧩 القطع
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _chunk_path(self, digest: str, codec: str) -> Path:
+        suffix = ".z" if codec == "zlib" else ""
+        return self.chunks_dir / digest[:2] / f"{digest}{suffix}"
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _online_copy(self, source: Path, target: Path) -> float:
+        """نسخة متسقة من قاعدة SQLite حية - يعيد الزمن بالثواني"""
+        start = time.perf_counter()
+        if target.exists():
+            target.unlink()
+        src = sqlite3.connect(str(source))
+        dst = sqlite3.connect(str(target))
+        try:
+            src.backup(dst, pages=self.pages_per_step)
+        finally:
+            dst.close()
+            src.close()
+        return time.perf_counter() - start
+
+    def _store_file(self, staged: Path, stats: dict) -> dict:
+        """تقسيم الملف لقطع وكتابة الجديد منها فقط"""
+        codec = "zlib" if self.compress else "raw"
+        whole = hashlib.sha256()
+        chunks: List[str] = []
+        size = 0
+
+        with open(staged, "rb") as f:
+            while True:
+                block = f.read(self.chunk_size)
+                if not block:
+                    break
+                size += len(block)
+                whole.update(block)
+                digest = hashlib.sha256(block).hexdigest()
+                chunks.append(digest)
+
+                path = self._chunk_path(digest, codec)
+                if path.exists():
+                    stats["chunks_reused"] += 1
+                    stats["dedup_bytes"] += len(block)
+                    continue
+
+                data = zlib.compress(block, 6) if self.compress else block
+                self._atomic_write(path, data)
+                stats["chunks_written"] += 1
+                stats["bytes_written"] += len(data)
+
+        stats["source_bytes"] += size
+        return {
+            "size": size,
+            "sha256": whole.hexdigest(),
+            "codec": codec,
+            "chunk_size": self.chunk_size,
+            "chunks": chunks,
+        }
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 💾 تشغيل النسخ
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _new_snapshot_id(self) -> str:
+        base = datetime.now().strftime("%Y%m%d-%H%M%S")
+        snapshot_id, n = base, 1
+        while (self.manifests_dir / f"{snapshot_id}.json").exists():
+            n += 1
+            snapshot_id = f"{base}-{n}"
+        return snapshot_id
+
+    def run(self) -> dict:
+        """
+        إنشاء snapshot جديد (متزامن - يُستدعى خارج الـ event loop)
+
+        Returns:
+            dict: تقرير (الأحجام، القطع المكتوبة/المعاد استخدامها، السرعة، التوفير)
+        """
+        with self._lock:
+            start = time.perf_counter()
+            snapshot_id = self._new_snapshot_id()
+            self.staging_dir.mkdir(parents=True, exist_ok=True)
+
+            stats = {
+                "source_bytes": 0,
+                "bytes_written": 0,
+                "dedup_bytes": 0,
+                "chunks_written": 0,
+                "chunks_reused": 0,
+                "copy_ms": 0.0,
+            }
+            files = {}
+            missing = []
+
+            for name, source in self.sources().items():
+                if not source.exists():
+                    missing.append(name)
+                    continue
+                staged = self.staging_dir / name
+                try:
+                    stats["copy_ms"] += self._online_copy(source, staged) * 1000
+                    files[name] = dict(self._store_file(staged, stats), source=str(source))
+                finally:
+                    if staged.exists():
+                        staged.unlink()
+
+            if not files:
+                raise BackupError("No source database found to back up")
+
+            manifest = {
+                "version": MANIFEST_VERSION,
+                "id": snapshot_id,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "files": files,
+            }
+            self._atomic_write(
+                self.manifests_dir / f"{snapshot_id}.json",
+                json.dumps(manifest, separators=(",", ":")).encode("utf-8"),
+            )
+
+            removed_snapshots, removed_chunks, freed = self._apply_retention()
+
+            elapsed = time.perf_counter() - start
+            report = dict(
+                stats,
+                snapshot_id=snapshot_id,
+                files=len(files),
+                missing=missing,
+                copy_ms=round(stats["copy_ms"], 1),
+                ms=round(elapsed * 1000, 1),
+                throughput_mb_s=round(stats["source_bytes"] / MB / elapsed, 1) if elapsed else 0.0,
+                saved_bytes=stats["source_bytes"] - stats["bytes_written"],
+                removed_snapshots=removed_snapshots,
+                removed_chunks=removed_chunks,
+                freed_bytes=freed,
+            )
+            self._runs += 1
+            self._last_report = report
+            return report
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 🧹 الاحتفاظ
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def _load_manifests(self) -> List[dict]:
+        manifests = []
+        for path in self.manifests_dir.glob("*.json"):
+            try:
+                manifests.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError) as e:
+                print(f"   ⚠️ [BACKUP-ENGINE] Unreadable manifest {path.name}: {e}")
+        return sorted(manifests, key=lambda m: (m["created_at"], m["id"]), reverse=True)
+
+    def _apply_retention(self):
+        """حذف الـ snapshots الزائدة عن max_backups والقطع غير المستخدمة"""
+        manifests = self._load_manifests()
+        keep, drop = manifests[:self.max_backups], manifests[self.max_backups:]
+
+        for manifest in drop:
+            (self.manifests_dir / f"{manifest['id']}.json").unlink(missing_ok=True)
+
+        referenced = {
+            self._chunk_path(digest, entry["codec"]).name
+            for manifest in keep
+            for entry in manifest["files"].values()
+            for digest in entry["chunks"]
+        }
+
+        removed_chunks = freed = 0
+        if self.chunks_dir.exists():
+            for path in self.chunks_dir.glob("*/*"):
+                # قطع غير مستخدمة أو ملفات مؤقتة من تشغيل توقف في المنتصف
+                if path.name not in referenced:
+                    freed += path.stat().st_size
+                    path.unlink()
+                    removed_chunks += 1
+        return len(drop), removed_chunks, freed
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # 📂 القراءة (للاستعادة والفحص)
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def list_snapshots(self) -> List[dict]:
+        """الـ snapshots الموجودة (الأحدث أولاً)"""
+        return [
+            {
+                "id": manifest["id"],
+                "created_at": manifest["created_at"],
+                "files": {name: entry["size"] for name, entry in manifest["files"].items()},
+                "size_mb": round(sum(e["size"] for e in manifest["files"].values()) / MB, 2),
+            }
+            for manifest in self._load_manifests()
+        ]
+
+    @staticmethod
+    def check_snapshot_id(snapshot_id: str) -> None:
+        """رفض أي رقم snapshot ليس بالصيغة المعروفة قبل استخدامه كمسار"""
+        if not SNAPSHOT_ID_PATTERN.fullmatch(snapshot_id or ""):
+            raise BackupError(f"Invalid snapshot id: {snapshot_id!r}")
+
+    def get_manifest(self, snapshot_id: str) -> dict:
+        self.check_snapshot_id(snapshot_id)
+        path = self.manifests_dir / f"{snapshot_id}.json"
+        if not path.exists():
+            raise BackupError(f"Snapshot not found: {snapshot_id}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def materialize(self, snapshot_id: str, name: str, target: Path) -> dict:
+        """
+        إعادة بناء ملف من القطع مع التحقق من sha256 لكل قطعة وللملف كاملاً
+
+        Raises:
+            BackupError: قطعة مفقودة أو تالفة
+        """
+        entry = self.get_manifest(snapshot_id)["files"].get(name)
+        if entry is None:
+            raise BackupError(f"{name} is not part of snapshot {snapshot_id}")
+
+        whole = hashlib.sha256()
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+
+        with open(tmp, "wb") as out:
+            for digest in entry["chunks"]:
+                path = self._chunk_path(digest, entry["codec"])
+                try:
+                    data = path.read_bytes()
+                    block = zlib.decompress(data) if entry["codec"] == "zlib" else data
+                except (OSError, zlib.error) as e:
+                    tmp.unlink(missing_ok=True)
+                    raise BackupError(f"Chunk {digest[:12]} of {name} unreadable: {e}")
+                if hashlib.sha256(block).hexdigest() != digest:
+                    tmp.unlink(missing_ok=True)
+                    raise BackupError(f"Chunk {digest[:12]} of {name} is corrupted")
+                whole.update(block)
+                out.write(block)
+
+        if whole.hexdigest() != entry["sha256"]:
+            tmp.unlink(missing_ok=True)
+            raise BackupError(f"{name} checksum mismatch in snapshot {snapshot_id}")
+
+        os.replace(tmp, target)
+        return {"name": name, "size": entry["size"], "sha256": entry["sha256"]}
+
+    def get_stats(self) -> dict:
+        chunk_bytes = chunk_count = 0
+        if self.chunks_dir.exists():
+            for path in self.chunks_dir.glob("*/*"):
+                chunk_bytes += path.stat().st_size
+                chunk_count += 1
+        return {
+            "root": str(self.root),
+            "runs": self._runs,
+            "snapshots": len(list(self.manifests_dir.glob("*.json"))) if self.manifests_dir.exists() else 0,
+            "chunks": chunk_count,
+            "stored_mb": round(chunk_bytes / MB, 2),
+            "last_run": dict(self._last_report) if self._last_report else None,
+        }
+
+
+def print_backup_report(report: dict):
+    """طباعة تقرير تشغيل واحد"""
+    source_mb = report["source_bytes"] / MB
+    written_mb = report["bytes_written"] / MB
+    saved_pct = report["saved_bytes"] / report["source_bytes"] * 100 if report["source_bytes"] else 0.0
+
+    print(f"   ✅ [BACKUP-ENGINE] Snapshot {report['snapshot_id']}: {report['files']} files, {source_mb:.2f} MB")
+    print(
+        f"   🧩 [BACKUP-ENGINE] Chunks: {report['chunks_written']} new, "
+        f"{report['chunks_reused']} reused ({report['dedup_bytes'] / MB:.2f} MB deduplicated)"
+    )
+    print(f"   💾 [BACKUP-ENGINE] Written: {written_mb:.2f} MB (saved {saved_pct:.0f}%)")
+    print(
+        f"   ⚡ [BACKUP-ENGINE] {report['ms']:.0f} ms total, {report['copy_ms']:.0f} ms online copy, "
+        f"{report['throughput_mb_s']} MB/s"
+    )
+    if report["removed_snapshots"] or report["removed_chunks"]:
+        print(
+            f"   🧹 [BACKUP-ENGINE] Retention: -{report['removed_snapshots']} snapshots, "
+            f"-{report['removed_chunks']} chunks ({report['freed_bytes'] / MB:.2f} MB freed)"
+        )
+    for name in report["missing"]:
+        print(f"   ⚠️ [BACKUP-ENGINE] Skipped (not found): {name}")
+
+
+# Global engine
+backup_engine = BackupEngine(
+    root=BACKUP_CONFIG.get("path", "data/backups"),
+    chunk_size=BACKUP_CONFIG.get("chunk_size_kb", 64) * 1024,
+    compress=BACKUP_CONFIG.get("compress", True),
+    max_backups=BACKUP_CONFIG.get("max_backups", 10),
+    pages_per_step=BACKUP_CONFIG.get("pages_per_step", 256),
+)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📊 BENCHMARK (للتطوير فقط)
+# ═══════════════════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    work = Path(tempfile.mkdtemp(prefix="fc26_backup_"))
+    source = work / "bench.db"
+
+    # قاعدة تجريبية ~40 MB
+    conn = sqlite3.connect(str(source))
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, data BLOB)")
+    conn.executemany(
+        "INSERT INTO t VALUES (?, ?)",
+        ((i, os.urandom(200) + b"x" * 200) for i in range(100_000)),
+    )
+    conn.commit()
+
+    engine = BackupEngine(root=str(work / "backups"), max_backups=3)
+    engine.sources = lambda: {"bench.db": source}
+
+    print("🧪 Run 1 (full):")
+    print_backup_report(engine.run())
+
+    # نمط الجلسات الحقيقي: صفوف جديدة في النهاية + تعديل عدد قليل من الصفوف
+    conn.executemany(
+        "INSERT INTO t VALUES (?, ?)",
+        ((i, os.urandom(400)) for i in range(100_000, 101_000)),
+    )
+    conn.executemany(
+        "UPDATE t SET data = ? WHERE id = ?",
+        ((os.urandom(400), random.randrange(100_000)) for _ in range(50)),
+    )
+    conn.commit()
+    print("\n🧪 Run 2 (+1% rows appended, 50 rows updated):")
+    print_backup_report(engine.run())
+
+    print("\n🧪 Run 3 (unchanged):")
+    print_backup_report(engine.run())
+
+    for _ in range(2):
+        engine.run()
+    print(f"\n📂 Snapshots kept: {[s['id'] for s in engine.list_snapshots()]}")
+
+    restored = work / "restored.db"
+    engine.materialize(engine.list_snapshots()[0]["id"], "bench.db", restored)
+    check = sqlite3.connect(str(restored))
+    assert check.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert check.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 101_000
+    check.close()
+    conn.close()
+    print("✅ Restore verified (integrity_check ok)")
+    print(f"📊 {engine.get_stats()}")
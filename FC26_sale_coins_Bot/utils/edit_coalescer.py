@@ -0,0 +1,352 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║                    ✏️ EDIT COALESCER                                     ║
+# ║          دمج تعديلات الرسالة الواحدة + تجاهل التعديلات المطابقة         ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+✏️ دمج تعديلات شاشات الأزرار (edit_message_text)
+
+المشكلة:
+--------
+كل ضغطة زر = edit_message_text. الضغط المزدوج يرسل نفس التعديل مرتين
+(طلب API ضائع + خطأ "message is not modified")، والتنقل السريع بين الشاشات
+يرسل تعديلات لن يراها المستخدم أصلاً.
+
+الحل (لكل رسالة: chat_id + message_id):
+----------------------------------------
+- الرد على الـ callback فوراً (answer) - مرة واحدة لكل ضغطة
+- التعديل الأول يُرسل فوراً (بدون تأخير للضغطة العادية)
+- خلال debounce_ms بعده: التعديلات الجديدة تحل محل بعضها ويُرسل آخرها فقط
+  في نهاية النافذة (لا ينتظرها الـ handler)
+- تعديل مطابق (hash النص + الأزرار + parse_mode) لآخر ما أُرسل خلال
+  noop_window_ms (نافذة الضغط المزدوج فقط) لا يُرسل - بعدها قد تكون الرسالة
+  عُدلت من مكان آخر، فالتعديل يُرسل دائماً ولا يبقى المستخدم على شاشة خاطئة
+- مقياس: طلبات API الموفرة (saved_api_calls)
+
+الاستخدام:
+----------
+    from utils.edit_coalescer import edit_coalescer
+
+    await edit_coalescer.answer(query)
+    await edit_coalescer.edit(query, text, reply_markup=keyboard, parse_mode="HTML")
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from telegram.error import BadRequest, TelegramError
+
+from config import EDIT_COALESCER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# حد جدول الـ callbacks المُجاب عليها (الأقدم يُحذف)
+_ANSWERED_MAX = 10000
+
+
+class _MessageState:
+    """آخر محتوى أُرسل لرسالة + التعديل المنتظر نهاية النافذة"""
+
+    __slots__ = ("sent_hash", "sent_at", "pending", "busy")
+
+    def __init__(self):
+        self.sent_hash: Optional[int] = None
+        self.sent_at = 0.0
+        self.pending: Optional[Tuple] = None
+        # تعديل جارٍ أو نافذة دمج مفتوحة
+        self.busy = False
+
+
+class EditCoalescer:
+    """دمج تعديلات الرسالة الواحدة وتجاهل المطابق منها"""
+
+    def __init__(self, debounce_ms: float = 300, noop_window_ms: float = 500, max_messages: int = 10000):
+        self.debounce = debounce_ms / 1000
+        self.noop_window = noop_window_ms / 1000
+        self.max_messages = max_messages
+
+        self._states: "OrderedDict[Hashable, _MessageState]" = OrderedDict()
+        self._answered: "OrderedDict[str, None]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.requested = 0
+        self.sent = 0
+        self.skipped_noop = 0
+        self.coalesced = 0
+        self.not_modified = 0
+        self.answered = 0
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الرد على الضغطة
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def answer(self, query, *args, **kwargs) -> bool:
+        """answer() مرة واحدة لكل callback - الاستدعاء الثاني لا يرسل شيئاً"""
+        if query.id in self._answered:
+            return False
+        self._answered[query.id] = None
+        if len(self._answered) > _ANSWERED_MAX:
+            self._answered.popitem(last=False)
+        try:
+            await query.answer(*args, **kwargs)
+            self.answered += 1
+            return True
+        except TelegramError as e:
+            # callback قديم (انتهت صلاحيته) - لا يمنع التعديل
+            logger.debug(f"Callback answer failed: {e}")
+            return False
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # التعديل
+    # ═══════════════════════════════════════════════════════════════════════
+
+    @staticmethod
+    def _key(query) -> Optional[Hashable]:
+        if query.message is not None:
+            return (query.message.chat_id, query.message.message_id)
+        return query.inline_message_id
+
+    @staticmethod
+    def _hash(text: str, reply_markup, parse_mode) -> int:
+        markup = reply_markup.to_json() if reply_markup is not None else None
+        return hash((text, markup, parse_mode))
+
+    def _state(self, key: Hashable) -> _MessageState:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _MessageState()
+            if len(self._states) > self.max_messages:
+                oldest_key, oldest = next(iter(self._states.items()))
+                if not oldest.busy:
+                    del self._states[oldest_key]
+        else:
+            self._states.move_to_end(key)
+        return state
+
+    async def edit(self, query, text: str, reply_markup=None, parse_mode: Optional[str] = None,
+                   **kwargs) -> Optional[Any]:
+        """
+        تعديل رسالة الـ callback عبر الدمج
+
+        Returns:
+            Message المعدلة إذا أُرسل التعديل الآن، وإلا None
+            (مطابق لآخر مرسل، أو مؤجل لنهاية نافذة الدمج)
+        """
+        self.requested += 1
+        await self.answer(query)
+
+        key = self._key(query)
+        if key is None:
+            return await self._send(query, text, reply_markup, parse_mode, kwargs)
+
+        content_hash = self._hash(text, reply_markup, parse_mode)
+        state = self._state(key)
+
+        if state.busy:
+            # نافذة مفتوحة - يحل محل المنتظر ويُرسل في نهايتها
+            if state.pending is not None:
+                self.coalesced += 1
+            state.pending = (query, text, reply_markup, parse_mode, kwargs, content_hash)
+            return None
+
+        if state.sent_hash == content_hash and time.monotonic() - state.sent_at < self.noop_window:
+            self.skipped_noop += 1
+            return None
+
+        state.busy = True
+        try:
+            message = await self._send(query, text, reply_markup, parse_mode, kwargs)
+            state.sent_hash, state.sent_at = content_hash, time.monotonic()
+            return message
+        finally:
+            task = asyncio.create_task(self._trail(state))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, query, text: str, reply_markup, parse_mode, kwargs: Dict) -> Optional[Any]:
+        try:
+            message = await query.edit_message_text(
+                text, reply_markup=reply_markup, parse_mode=parse_mode, **kwargs
+            )
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+            self.not_modified += 1
+            return None
+        self.sent += 1
+        return message
+
+    async def _trail(self, state: _MessageState):
+        """نافذة الدمج: إرسال آخر تعديل وصل خلالها، حتى تمر نافذة بدون جديد"""
+        try:
+            while True:
+                await asyncio.sleep(self.debounce)
+                pending, state.pending = state.pending, None
+                if pending is None:
+                    break
+                query, text, reply_markup, parse_mode, kwargs, content_hash = pending
+                if content_hash == state.sent_hash and time.monotonic() - state.sent_at < self.noop_window:
+                    self.skipped_noop += 1
+                    continue
+                try:
+                    await self._send(query, text, reply_markup, parse_mode, kwargs)
+                    state.sent_hash, state.sent_at = content_hash, time.monotonic()
+                except TelegramError as e:
+                    logger.warning(f"Coalesced edit failed: {e}")
+        finally:
+            state.busy = False
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الإيقاف والإحصائيات
+    # ═══════════════════════════════════════════════════════════════════════
+
+    async def shutdown(self):
+        """إلغاء نوافذ الدمج المفتوحة (قبل إغلاق اتصال البوت)"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict:
+        """طلبات التعديل مقابل ما أُرسل فعلاً"""
+        saved = self.skipped_noop + self.coalesced
+        return {
+            "requested": self.requested,
+            "sent": self.sent,
+            "skipped_noop": self.skipped_noop,
+            "coalesced": self.coalesced,
+            "not_modified": self.not_modified,
+            "saved_api_calls": saved,
+            "saved_ratio": round(saved / self.requested, 3) if self.requested else 0.0,
+            "answered": self.answered,
+            "tracked_messages": len(self._states),
+        }
+
+
+# Global instance
+edit_coalescer = EditCoalescer(
+    debounce_ms=EDIT_COALESCER_CONFIG["debounce_ms"],
+    noop_window_ms=EDIT_COALESCER_CONFIG["noop_window_ms"],
+    max_messages=EDIT_COALESCER_CONFIG["max_messages"],
+)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 BENCHMARK (للتطوير فقط) - python -m utils.edit_coalescer
+# ═══════════════════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    import random
+    from types import SimpleNamespace
+
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+    USERS = 300
+    API_MS = 40
+    SCREENS = {
+        name: (f"screen {name}", InlineKeyboardMarkup([[InlineKeyboardButton(name, callback_data=name)]]))
+        for name in ("main_menu", "sell_coins_menu", "contact_support", "admin_view_prices")
+    }
+
+    class FakeQuery:
+        """CallbackQuery وهمي: Bot API يرفض التعديل المطابق كما يفعل Telegram"""
+
+        calls = 0
+        errors = 0
+        shown: Dict[int, str] = {}
+
+        def __init__(self, user_id: int, seq: int):
+            self.id = f"{user_id}:{seq}"
+            self.message = SimpleNamespace(chat_id=user_id, message_id=1)
+            self.inline_message_id = None
+
+        async def answer(self, *args, **kwargs):
+            pass
+
+        async def edit_message_text(self, text, reply_markup=None, parse_mode=None):
+            FakeQuery.calls += 1
+            await asyncio.sleep(API_MS / 1000)
+            if FakeQuery.shown.get(self.message.chat_id) == text:
+                FakeQuery.errors += 1
+                raise BadRequest("Message is not modified")
+            FakeQuery.shown[self.message.chat_id] = text
+            return True
+
+    def taps_for(rng: random.Random):
+        """(شاشة، فاصل قبل الضغطة التالية) - ضغط مزدوج + تنقل سريع + ضغطات عادية"""
+        taps = []
+        for _ in range(6):
+            screen = rng.choice(list(SCREENS))
+            kind = rng.random()
+            if kind < 0.4:
+                taps += [(screen, 0.05), (screen, 1.0)]                    # ضغط مزدوج
+            elif kind < 0.7:
+                taps += [(rng.choice(list(SCREENS)), 0.08) for _ in range(3)] + [(screen, 1.0)]  # تنقل سريع
+            else:
+                taps.append((screen, 1.0))                                  # ضغطة عادية
+        return taps
+
+    async def run(label: str, coalescer: Optional[EditCoalescer]):
+        FakeQuery.calls = FakeQuery.errors = 0
+        FakeQuery.shown = {}
+        requested = 0
+
+        async def user(user_id: int):
+            nonlocal requested
+            rng = random.Random(user_id)
+            # handlers نفس المستخدم بالترتيب (core/update_processor.py)
+            for seq, (screen, gap) in enumerate(taps_for(rng)):
+                text, markup = SCREENS[screen]
+                query = FakeQuery(user_id, seq)
+                requested += 1
+                if coalescer is None:
+                    await query.answer()
+                    try:
+                        await query.edit_message_text(text, reply_markup=markup, parse_mode="HTML")
+                    except BadRequest:
+                        pass
+                else:
+                    await coalescer.edit(query, text, reply_markup=markup, parse_mode="HTML")
+                await asyncio.sleep(gap)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(user_id) for user_id in range(USERS)))
+        if coalescer is not None:
+            while coalescer._tasks:
+                await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+
+        final_ok = all(FakeQuery.shown.get(u) == SCREENS[taps_for(random.Random(u))[-1][0]][0] for u in range(USERS))
+        print(f"📊 {label}")
+        print(f"   Edits requested: {requested}, API calls: {FakeQuery.calls}, "
+              f"'not modified' errors: {FakeQuery.errors} ({elapsed:.2f}s)")
+        print(f"   Final screen correct for every user: {'✅' if final_ok else '❌'}")
+        if coalescer is not None:
+            stats = coalescer.get_stats()
+            print(f"   Saved API calls: {stats['saved_api_calls']} ({stats['saved_ratio']:.0%}) - "
+                  f"{stats['skipped_noop']} identical, {stats['coalesced']} coalesced")
+        print()
+        return FakeQuery.calls
+
+    print(f"🧪 Edit coalescer: {USERS} users, double taps + rapid navigation, {API_MS} ms per edit\n")
+    raw = asyncio.run(run("Direct edit_message_text", None))
+    coalesced = asyncio.run(run("EditCoalescer", EditCoalescer(debounce_ms=300)))
+    print(f"✅ API calls: {raw} → {coalesced} ({(1 - coalesced / raw):.0%} fewer)")
+
+    async def edited_elsewhere():
+        """A → تعديل مباشر B من مكان آخر → A مجدداً بعد نافذة الضغط المزدوج: يجب أن يُرسل"""
+        FakeQuery.shown = {}
+        coalescer = EditCoalescer(debounce_ms=300)
+        text, markup = SCREENS["main_menu"]
+        await coalescer.edit(FakeQuery(0, 0), text, reply_markup=markup)
+        await FakeQuery(0, 1).edit_message_text("other screen")
+        await asyncio.sleep(1.0)
+        await coalescer.edit(FakeQuery(0, 2), text, reply_markup=markup)
+        return FakeQuery.shown[0] == text
+
+    print(f"✅ Edit back to a screen after an outside edit is sent: "
+          f"{'✅' if asyncio.run(edited_elsewhere()) else '❌'}")
@@ -0,0 +1,65 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║                    📈 METRICS - مقاييس الأداء                            ║
+# ║              Histogram بحدود ثابتة (زمن الانتظار / الاستجابة)           ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+📈 أدوات قياس خفيفة (بدون مكتبات خارجية)
+
+Histogram:
+- حدود ثابتة بالمللي ثانية - observe() عملية O(log buckets) بدون تخزين القيم
+- p50 / p95 / p99 تقديرية (الحد الأعلى للـ bucket)
+- snapshot() dict جاهز للطباعة أو الإرسال للأدمن
+"""
+
+import bisect
+from typing import Dict, Iterable, Optional
+
+# حدود افتراضية بالمللي ثانية
+DEFAULT_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    """توزيع قيم (مللي ثانية) على buckets ثابتة"""
+
+    def __init__(self, bounds: Iterable[float] = DEFAULT_BOUNDS_MS):
+        self.bounds = tuple(sorted(bounds))
+        self.reset()
+
+    def reset(self):
+        # آخر bucket = أكبر من كل الحدود
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """الحد الأعلى للـ bucket الذي يحتوي النسبة q (0-1)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            cumulative += n
+            if cumulative >= rank and n:
+                return self.bounds[i] if i < len(self.bounds) else round(self.max, 2)
+        return round(self.max, 2)
+
+    def snapshot(self) -> Dict:
+        labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 2) if self.count else 0.0,
+            "max": round(self.max, 2),
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
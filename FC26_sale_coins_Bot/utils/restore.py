@@ -0,0 +1,334 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║                    ♻️ RESTORE SYSTEM                                     ║
+# ║              استعادة قواعد البيانات والجلسات من نسخة احتياطية            ║
+# ║            تحقق كامل (sha256 + integrity_check) قبل أي استبدال          ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+♻️ نظام الاستعادة
+
+المراحل:
+--------
+1. stage:  إعادة بناء ملفات الـ snapshot قطعة بقطعة في data/restore/<id>/
+           مع التحقق من sha256 لكل قطعة وللملف كاملاً ثم PRAGMA integrity_check
+           → كتابة pending.json (الملفات جاهزة ولم يُلمس شيء بعد)
+2. apply:  (والبوت متوقف) نقل الملفات الحالية إلى data/restore/rollback/
+           ثم استبدالها بالملفات المجهزة (os.replace) - إذا فشل أي ملف يتم
+           إرجاع كل ما استُبدل. كل الملفات من نفس الـ snapshot = نفس اللحظة.
+
+طرق الاستخدام:
+--------------
+- الأمر /restore للأدمن: stage فقط، والتطبيق تلقائياً عند الإقلاع التالي
+  (core/bootstrap.py يستدعي apply_pending_restore قبل فتح قواعد البيانات)
+- سطر الأوامر (والبوت متوقف):
+      python -m utils.restore list
+      python -m utils.restore verify <snapshot_id>
+      python -m utils.restore stage  <snapshot_id> [--only sessions.db ...]
+      python -m utils.restore apply  [<snapshot_id>] [--only ...]
+
+كل مرحلة تطبع زمنها - زمن الاستعادة هو زمن التعافي بعد نشر سيء.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from config import BACKUP_CONFIG
+from utils.backup_engine import MB, BackupError, backup_engine
+
+RESTORE_DIR = Path(BACKUP_CONFIG.get("restore_path", "data/restore"))
+PENDING_FILE = RESTORE_DIR / "pending.json"
+ROLLBACK_DIR = RESTORE_DIR / "rollback"
+
+
+class RestoreError(Exception):
+    """فشل التحقق أو الاستبدال"""
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _integrity_check(path: Path) -> List[str]:
+    """PRAGMA integrity_check - قائمة فارغة = سليم"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    return [] if rows == ["ok"] else rows
+
+
+def _companions(path: Path) -> List[Path]:
+    """ملفات WAL / SHM الخاصة بقاعدة بيانات"""
+    return [path.with_name(path.name + suffix) for suffix in ("-wal", "-shm")]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 1️⃣ التجهيز والتحقق
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def _build(snapshot_id: str, only: Optional[Iterable[str]], stage_dir: Path) -> dict:
+    """إعادة بناء + تحقق كل ملفات الـ snapshot داخل stage_dir"""
+    manifest = backup_engine.get_manifest(snapshot_id)
+    names = list(only) if only else list(manifest["files"])
+    unknown = [name for name in names if name not in manifest["files"]]
+    if unknown:
+        raise RestoreError(f"Not in snapshot {snapshot_id}: {', '.join(unknown)}")
+
+    sources = backup_engine.sources()
+    stage_dir.mkdir(parents=True, exist_ok=True)
+    report = {"snapshot_id": snapshot_id, "created_at": manifest["created_at"], "files": {}}
+    total = time.perf_counter()
+
+    for name in names:
+        staged = stage_dir / name
+        entry = {"staged": str(staged), "target": str(sources.get(name, manifest["files"][name]["source"]))}
+
+        # إعادة البناء قطعة بقطعة (sha256 لكل قطعة + للملف كاملاً)
+        start = time.perf_counter()
+        try:
+            result = backup_engine.materialize(snapshot_id, name, staged)
+        except BackupError as e:
+            raise RestoreError(str(e)) from e
+        entry.update(size=result["size"], sha256=result["sha256"], rebuild_ms=_ms(start))
+
+        start = time.perf_counter()
+        problems = _integrity_check(staged)
+        entry["integrity_ms"] = _ms(start)
+        if problems:
+            raise RestoreError(f"{name}: integrity_check failed: {'; '.join(problems[:3])}")
+
+        report["files"][name] = entry
+        print(
+            f"   ✅ [RESTORE] {name}: {result['size'] / MB:.2f} MB rebuilt in {entry['rebuild_ms']:.0f} ms, "
+            f"integrity ok in {entry['integrity_ms']:.0f} ms"
+        )
+
+    report["partial"] = bool(only) and set(names) != set(manifest["files"])
+    report["stage_ms"] = _ms(total)
+    size = sum(entry["size"] for entry in report["files"].values())
+    report["throughput_mb_s"] = round(size / MB / (report["stage_ms"] / 1000), 1) if report["stage_ms"] else 0.0
+    return report
+
+
+def verify_snapshot(snapshot_id: str) -> dict:
+    """
+    التحقق من snapshot بالكامل بدون تجهيزه للاستعادة
+
+    Raises:
+        RestoreError: قطعة مفقودة/تالفة أو قاعدة فاشلة في integrity_check
+    """
+    backup_engine.check_snapshot_id(snapshot_id)
+    stage_dir = RESTORE_DIR / f".verify-{snapshot_id}"
+    try:
+        return _build(snapshot_id, None, stage_dir)
+    finally:
+        shutil.rmtree(stage_dir, ignore_errors=True)
+
+
+def stage_restore(snapshot_id: str, only: Optional[Iterable[str]] = None) -> dict:
+    """
+    تجهيز استعادة (بدون لمس الملفات الحالية)
+
+    Args:
+        snapshot_id: رقم الـ snapshot
+        only: ملفات محددة فقط (الافتراضي: كل الملفات = نفس اللحظة الزمنية)
+
+    Returns:
+        dict: تقرير التجهيز (الأحجام والأزمنة) - محفوظ أيضاً في pending.json
+    """
+    # رقم غير صالح يُرفض قبل إلغاء الاستعادة المجهزة حالياً
+    backup_engine.check_snapshot_id(snapshot_id)
+    cancel_pending_restore()
+    report = _build(snapshot_id, only, RESTORE_DIR / snapshot_id)
+    report["staged_at"] = datetime.now().isoformat(timespec="seconds")
+
+    tmp = PENDING_FILE.with_name(PENDING_FILE.name + ".tmp")
+    tmp.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, PENDING_FILE)
+
+    print(f"   📦 [RESTORE] Snapshot {snapshot_id} staged in {report['stage_ms']:.0f} ms")
+    if report["partial"]:
+        print(f"   ⚠️ [RESTORE] Partial restore: {', '.join(report['files'])} only")
+    return report
+
+
+def get_pending_restore() -> Optional[dict]:
+    try:
+        return json.loads(PENDING_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def cancel_pending_restore() -> bool:
+    """إلغاء استعادة مجهزة وحذف ملفاتها"""
+    pending = get_pending_restore()
+    PENDING_FILE.unlink(missing_ok=True)
+    if pending is None:
+        return False
+    shutil.rmtree(RESTORE_DIR / pending["snapshot_id"], ignore_errors=True)
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 2️⃣ الاستبدال
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def apply_pending_restore() -> Optional[dict]:
+    """
+    تطبيق الاستعادة المجهزة (البوت متوقف / قبل فتح أي قاعدة بيانات)
+
+    Returns:
+        dict: تقرير التطبيق، أو None إذا لا توجد استعادة مجهزة
+
+    Raises:
+        RestoreError: ملف مجهز تغير/اختفى، أو فشل الاستبدال (بعد إرجاع كل شيء)
+    """
+    pending = get_pending_restore()
+    if pending is None:
+        return None
+
+    total = time.perf_counter()
+    snapshot_id = pending["snapshot_id"]
+    print(f"\n♻️ [RESTORE] Applying snapshot {snapshot_id} ({pending['created_at']})...")
+
+    # التأكد أن الملفات المجهزة لم تتغير منذ التحقق
+    start = time.perf_counter()
+    for name, entry in pending["files"].items():
+        staged = Path(entry["staged"])
+        if not staged.exists() or _sha256(staged) != entry["sha256"]:
+            raise RestoreError(f"Staged {name} is missing or changed - stage the snapshot again")
+    recheck_ms = _ms(start)
+
+    # نسخة الإرجاع: الملفات الحالية تُنقل (لا تُنسخ) - آخر نسخة إرجاع فقط
+    shutil.rmtree(ROLLBACK_DIR, ignore_errors=True)
+    ROLLBACK_DIR.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    moved = []  # (original, rollback)
+    swapped = []  # targets already replaced
+    try:
+        for name, entry in pending["files"].items():
+            target = Path(entry["target"])
+            target.parent.mkdir(parents=True, exist_ok=True)
+            for path in [target] + _companions(target):
+                if path.exists():
+                    rollback = ROLLBACK_DIR / path.name
+                    os.replace(path, rollback)
+                    moved.append((path, rollback))
+            os.replace(entry["staged"], target)
+            swapped.append(target)
+    except OSError as e:
+        # إرجاع كل شيء كما كان
+        for target in swapped:
+            target.unlink(missing_ok=True)
+        for original, rollback in reversed(moved):
+            os.replace(rollback, original)
+        raise RestoreError(f"Swap failed, previous files put back: {e}") from e
+    swap_ms = _ms(start)
+
+    PENDING_FILE.unlink(missing_ok=True)
+    shutil.rmtree(RESTORE_DIR / snapshot_id, ignore_errors=True)
+
+    report = {
+        "snapshot_id": snapshot_id,
+        "files": list(pending["files"]),
+        "stage_ms": pending["stage_ms"],
+        "recheck_ms": recheck_ms,
+        "swap_ms": swap_ms,
+        "apply_ms": _ms(total),
+        "rollback_dir": str(ROLLBACK_DIR),
+    }
+    print(f"   ✅ [RESTORE] Restored: {', '.join(report['files'])}")
+    print(
+        f"   ⏱️ [RESTORE] Verify {recheck_ms:.0f} ms + swap {swap_ms:.1f} ms "
+        f"(staged earlier in {pending['stage_ms']:.0f} ms)"
+    )
+    print(f"   💾 [RESTORE] Previous files kept in {ROLLBACK_DIR}")
+    return report
+
+
+def restore_now(snapshot_id: str, only: Optional[Iterable[str]] = None) -> dict:
+    """
+    تجهيز + تطبيق مباشرة (للاستخدام من سطر الأوامر والبوت متوقف)
+
+    Returns:
+        dict: تقرير كامل مع زمن الاستعادة الإجمالي (restore_ms)
+    """
+    start = time.perf_counter()
+    stage_restore(snapshot_id, only)
+    report = apply_pending_restore()
+    report["restore_ms"] = _ms(start)
+    print(f"   🏁 [RESTORE] Total restore time: {report['restore_ms']:.0f} ms")
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🖥️ CLI
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m utils.restore", description="FC26 backup restore")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="list snapshots")
+    verify = sub.add_parser("verify", help="rebuild and check a snapshot without staging it")
+    verify.add_argument("snapshot_id")
+    stage = sub.add_parser("stage", help="verify and stage a snapshot (applied on next bot start)")
+    stage.add_argument("snapshot_id")
+    stage.add_argument("--only", nargs="+", metavar="FILE")
+    apply = sub.add_parser("apply", help="apply the staged restore, or stage+apply SNAPSHOT_ID (bot stopped)")
+    apply.add_argument("snapshot_id", nargs="?")
+    apply.add_argument("--only", nargs="+", metavar="FILE")
+    sub.add_parser("cancel", help="drop the staged restore")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "list":
+            pending = get_pending_restore()
+            for snapshot in backup_engine.list_snapshots():
+                marker = "  ⏳ staged" if pending and pending["snapshot_id"] == snapshot["id"] else ""
+                files = ", ".join(snapshot["files"])
+                print(f"{snapshot['id']}  {snapshot['created_at']}  {snapshot['size_mb']:>8} MB  [{files}]{marker}")
+        elif args.command == "verify":
+            report = verify_snapshot(args.snapshot_id)
+            print(f"✅ Snapshot {args.snapshot_id} verified in {report['stage_ms']:.0f} ms "
+                  f"({report['throughput_mb_s']} MB/s)")
+        elif args.command == "stage":
+            stage_restore(args.snapshot_id, args.only)
+            print("✅ Staged - it is applied on the next bot start (or run: python -m utils.restore apply)")
+        elif args.command == "apply":
+            if args.snapshot_id:
+                restore_now(args.snapshot_id, args.only)
+            elif apply_pending_restore() is None:
+                print("⚠️ Nothing staged")
+                return 1
+        elif args.command == "cancel":
+            print("✅ Staged restore cancelled" if cancel_pending_restore() else "⚠️ Nothing staged")
+    except (BackupError, RestoreError) as e:
+        print(f"❌ {e}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
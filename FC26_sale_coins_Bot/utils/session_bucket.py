@@ -28,10 +28,20 @@
 ✅ إنهاء محادثة لا يؤثر على محادثة أخرى
 ✅ أمان أعلى للبيانات
 ✅ متوافق مع Persistence
+✅ تسجيل آخر استخدام لكل مساحة (لحذف المساحات المهجورة - utils/session_ttl.py)
+✅ مساحات reg / sell / admin سجلات مضغوطة (utils/session_records.py) بنفس واجهة الـ dict
 """
 
+import time
 
-def bucket(context, name: str) -> dict:
+from utils.session_records import RECORD_TYPES, BucketRecord, new_bucket
+
+# مفتاح أوقات آخر استخدام داخل context.user_data
+# (للمساحات غير المعروفة فقط - السجلات تحفظ وقتها بداخلها)
+TOUCHED_KEY = '_bucket_touched'
+
+
+def bucket(context, name: str):
     """
     الحصول على مساحة عمل معزولة داخل context.user_data
 
@@ -40,7 +50,8 @@ def bucket(context, name: str) -> dict:
         name: اسم المساحة (مثل 'reg', 'sell', 'admin')
 
     Returns:
-        dict: قاموس خاص بهذه المساحة فقط
+        مساحة خاصة بهذه الخدمة فقط: سجل مضغوط (RegBucket / SellBucket /
+        AdminBucket) للخدمات المعروفة أو dict لغيرها - نفس الواجهة في الحالتين
 
     Example:
         # في handlers التسجيل:
@@ -52,20 +63,35 @@ def bucket(context, name: str) -> dict:
         # لا يتداخلان!
     """
     # إنشاء المساحة الرئيسية إذا لم تكن موجودة
-    if '_buckets' not in context.user_data:
-        context.user_data['_buckets'] = {}
+    buckets = context.user_data.get('_buckets')
+    if buckets is None:
+        buckets = context.user_data['_buckets'] = {}
+
+    current = buckets.get(name)
+    if current is None:
+        # إنشاء المساحة الفرعية إذا لم تكن موجودة
+        current = buckets[name] = new_bucket(name)
+    elif name in RECORD_TYPES and not isinstance(current, BucketRecord):
+        # dict قديم من الجلسات المحفوظة - تحويله لسجل مضغوط مرة واحدة
+        current = buckets[name] = new_bucket(name, current)
 
-    # إنشاء المساحة الفرعية إذا لم تكن موجودة
-    if name not in context.user_data['_buckets']:
-        context.user_data['_buckets'][name] = {}
+    # تسجيل آخر استخدام
+    if isinstance(current, BucketRecord):
+        current.touched = time.time()
+        _drop_touched(context.user_data, name)
+    else:
+        context.user_data.setdefault(TOUCHED_KEY, {})[name] = time.time()
 
-    return context.user_data['_buckets'][name]
+    return current
 
 
 def clear_bucket(context, name: str) -> None:
     """
     مسح مساحة عمل محددة فقط (بدون التأثير على المساحات الأخرى)
 
+    المساحة تُحذف بالكامل (وليس تفريغها فقط) حتى لا تبقى قواميس فارغة
+    محفوظة في الجلسات للأبد
+
     Args:
         context: telegram.ext.ContextTypes.DEFAULT_TYPE
         name: اسم المساحة المراد مسحها
@@ -77,10 +103,34 @@ def clear_bucket(context, name: str) -> None:
         # بيانات البيع تبقى كما هي!
         bucket(context, 'sell').get('amount')  # ✅ موجودة
     """
-    if '_buckets' in context.user_data:
-        if name in context.user_data['_buckets']:
-            context.user_data['_buckets'][name].clear()
-            print(f"   🧹 [BUCKET] Cleared bucket: {name}")
+    remove_bucket(context.user_data, name)
+    print(f"   🧹 [BUCKET] Cleared bucket: {name}")
+
+
+def remove_bucket(user_data: dict, name: str) -> None:
+    """
+    حذف مساحة ووقت استخدامها، وحذف القواميس الرئيسية إذا أصبحت فارغة
+
+    Args:
+        user_data: context.user_data (أو application.user_data[user_id])
+        name: اسم المساحة
+    """
+    buckets = user_data.get('_buckets')
+    if buckets is not None:
+        buckets.pop(name, None)
+        if not buckets:
+            del user_data['_buckets']
+
+    _drop_touched(user_data, name)
+
+
+def _drop_touched(user_data: dict, name: str) -> None:
+    """حذف وقت استخدام مساحة من _bucket_touched (وحذف القاموس إذا أصبح فارغاً)"""
+    touched = user_data.get(TOUCHED_KEY)
+    if touched is not None:
+        touched.pop(name, None)
+        if not touched:
+            del user_data[TOUCHED_KEY]
 
 
 def get_all_buckets(context) -> dict:
@@ -139,7 +189,7 @@ if __name__ == "__main__":
     print("Test 2: Data isolation...")
     clear_bucket(context, 'reg')
 
-    assert 'platform' not in bucket(context, 'reg')
+    assert 'reg' not in context.user_data['_buckets']  # حُذفت بالكامل
     assert bucket(context, 'sell')['amount'] == 5000  # لم تتأثر!
     print("✅ Passed\n")
 
@@ -149,5 +199,26 @@ if __name__ == "__main__":
     assert has_bucket(context, 'reg') == False
     print("✅ Passed\n")
 
+    # اختبار 4: لا تبقى قواميس فارغة
+    print("Test 4: Empty containers removed...")
+    clear_bucket(context, 'sell')
+    assert '_buckets' not in context.user_data
+    assert TOUCHED_KEY not in context.user_data
+    print("✅ Passed\n")
+
+    # اختبار 5: السجلات المضغوطة ونقل البيانات القديمة
+    print("Test 5: Typed records & legacy dict migration...")
+    from utils.session_records import RegBucket, SellBucket
+
+    assert isinstance(bucket(context, 'sell'), SellBucket)
+    assert TOUCHED_KEY not in context.user_data  # الوقت داخل السجل
+    context.user_data['_buckets']['reg'] = {'platform': 'pc', 'whatsapp': '0100'}
+    context.user_data[TOUCHED_KEY] = {'reg': 1.0}
+    reg = bucket(context, 'reg')
+    assert isinstance(reg, RegBucket) and reg['platform'] == 'pc'
+    assert TOUCHED_KEY not in context.user_data
+    assert isinstance(bucket(context, 'other'), dict)
+    print("✅ Passed\n")
+
     print("🎉 All tests passed!")
     print("\n📝 Session Bucket System is ready for production!")
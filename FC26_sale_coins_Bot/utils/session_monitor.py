@@ -9,19 +9,248 @@
 
 الهدف:
 -------
-فحص دوري لملف الجلسات لاكتشاف المشاكل مبكراً.
+فحص دوري لملف الجلسات لاكتشاف المشاكل مبكراً - بدون فتح الجلسات نفسها.
 
 الميزات:
 --------
-✅ فحص وجود الملف
-✅ فحص حجم الملف (تحذير إذا تجاوز 50 MB)
-✅ تقدير عدد الجلسات النشطة
-✅ تحذيرات في الـ logs
-✅ فحص كل 6 ساعات
+✅ قراءة الملف الجانبي فقط (sessions.meta.json) - يكتبه SQLitePersistence مع كل flush
+✅ فحص حجم الملف (تحذير فوق 50 MB، حرج فوق 100 MB)
+✅ عدد المستخدمين والمحادثات وآخر flush
+✅ معدل النمو وتوقع متى سيتم تجاوز الحدود
+✅ فحص عميق (قراءة كل الصفوف) في process منفصل بقراءة متدفقة - لا يحجب البوت
+✅ فحص كل 6 ساعات (SESSION_MONITOR_CONFIG)
 """
 
+import asyncio
+import heapq
+import json
+import multiprocessing
 import pickle
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import List, Optional
+
+from config import PERSISTENCE_CONFIG, SESSION_MONITOR_CONFIG, SESSION_TTL_CONFIG
+
+MB = 1024 * 1024
+
+# عدد الفحوصات منذ البدء (لتحديد موعد الفحص العميق)
+_checks = 0
+_deep_pool: Optional[ProcessPoolExecutor] = None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🗒️ الملف الجانبي
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def _session_file_size(session_file: Path) -> int:
+    """حجم قاعدة الجلسات مع ملف الـ WAL"""
+    size = session_file.stat().st_size
+    wal = session_file.with_name(session_file.name + "-wal")
+    if wal.exists():
+        size += wal.stat().st_size
+    return size
+
+
+def read_sidecar(meta_path: Optional[str] = None) -> Optional[dict]:
+    """
+    قراءة الملف الجانبي (بضعة KB فقط)
+
+    Returns:
+        dict أو None إذا لم يُكتب بعد / تالف
+    """
+    path = Path(meta_path or PERSISTENCE_CONFIG["meta_path"])
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+# أقل مدة تغطيها العينات قبل حساب معدل النمو (تجنب توقعات مضللة بعد البدء مباشرة)
+MIN_GROWTH_SPAN_SECONDS = 30 * 60
+
+
+def _slope_per_hour(samples: List[list], index: int) -> Optional[float]:
+    """ميل خط الانحدار (least squares) لعمود من العينات - وحدة/ساعة"""
+    if len(samples) < 2 or samples[-1][0] - samples[0][0] < MIN_GROWTH_SPAN_SECONDS:
+        return None
+    xs = [sample[0] / 3600 for sample in samples]
+    ys = [sample[index] for sample in samples]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+
+def project_growth(meta: dict) -> dict:
+    """
+    معدل النمو وتوقع تجاوز الحدود من عينات الملف الجانبي
+
+    Returns:
+        dict: bytes_per_hour, users_per_hour وعدد الساعات المتبقية لكل حد
+              (None = لا يوجد نمو أو بيانات غير كافية)
+    """
+    history = meta.get("history") or []
+    # آخر 24 ساعة فقط حتى يعكس المعدل الوضع الحالي
+    if history:
+        history = [s for s in history if s[0] >= history[-1][0] - 24 * 3600]
+
+    bytes_rate = _slope_per_hour(history, 1)
+    users_rate = _slope_per_hour(history, 2)
+
+    def hours_until(limit: float, current: float, rate: Optional[float]) -> Optional[float]:
+        if current >= limit:
+            return 0.0
+        if not rate or rate <= 0:
+            return None
+        return max(round((limit - current) / rate, 1), 0.1)
+
+    file_bytes = meta.get("file_bytes", 0)
+    users = meta.get("tables", {}).get("user_data", {}).get("rows", 0)
+
+    return {
+        "samples": len(history),
+        "bytes_per_hour": round(bytes_rate) if bytes_rate is not None else None,
+        "users_per_hour": round(users_rate, 2) if users_rate is not None else None,
+        "hours_to_warning": hours_until(SESSION_MONITOR_CONFIG["warning_mb"] * MB, file_bytes, bytes_rate),
+        "hours_to_critical": hours_until(SESSION_MONITOR_CONFIG["critical_mb"] * MB, file_bytes, bytes_rate),
+        "hours_to_max_users": hours_until(SESSION_MONITOR_CONFIG["max_users"], users, users_rate),
+    }
+
+
+def _format_eta(hours: Optional[float]) -> str:
+    if hours is None:
+        return "not growing"
+    if hours == 0:
+        return "already exceeded"
+    if hours < 48:
+        return f"~{hours:.0f} h"
+    return f"~{hours / 24:.0f} days"
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🔬 الفحص العميق (في process منفصل)
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def deep_inspect(session_file: str, idle_ttl: float) -> dict:
+    """
+    قراءة متدفقة لكل صفوف الجلسات (صف بصف - بدون تحميل الملف في الذاكرة)
+
+    تعمل داخل process منفصل: فك الـ pickle لا يحجب البوت ولا يضاعف ذاكرته.
+
+    Returns:
+        dict: أعداد وأحجام، أكبر الجلسات، المساحات المستخدمة، الجلسات الخاملة
+    """
+    # فك سجلات المساحات يحتاج تسجيل رقم الامتداد في هذا الـ process
+    import utils.session_records  # noqa: F401
+
+    start = time.perf_counter()
+    cutoff = time.time() - idle_ttl
+    report = {
+        "users": 0,
+        "user_bytes": 0,
+        "idle_users": 0,
+        "decode_errors": 0,
+        "largest": [],
+        "buckets": {},
+        "conversations": {},
+    }
+
+    conn = sqlite3.connect(f"file:{session_file}?mode=ro", uri=True)
+    try:
+        largest = []  # min-heap بأكبر 5 جلسات
+        for user_id, blob, updated_at in conn.execute(
+            "SELECT user_id, data, updated_at FROM user_data"
+        ):
+            report["users"] += 1
+            report["user_bytes"] += len(blob)
+            if updated_at < cutoff:
+                report["idle_users"] += 1
+
+            if len(largest) < 5:
+                heapq.heappush(largest, (len(blob), user_id))
+            elif len(blob) > largest[0][0]:
+                heapq.heapreplace(largest, (len(blob), user_id))
+
+            try:
+                data = pickle.loads(blob)
+            except Exception:
+                report["decode_errors"] += 1
+                continue
+            for name in (data.get("_buckets") or {}):
+                report["buckets"][name] = report["buckets"].get(name, 0) + 1
+
+        report["largest"] = [
+            {"user_id": user_id, "bytes": size}
+            for size, user_id in sorted(largest, reverse=True)[:5]
+        ]
+
+        for name, count in conn.execute("SELECT name, COUNT(*) FROM conversations GROUP BY name"):
+            report["conversations"][name] = count
+    finally:
+        conn.close()
+
+    report["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return report
+
+
+def _get_deep_pool() -> ProcessPoolExecutor:
+    global _deep_pool
+    if _deep_pool is None:
+        # spawn: البوت فيه خيوط (قاعدة البيانات، الكتابة المؤجلة) - fork غير آمن معها
+        _deep_pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _deep_pool
+
+
+async def run_deep_inspection() -> Optional[dict]:
+    """تشغيل الفحص العميق في process منفصل (مع مهلة)"""
+    session_file = Path(PERSISTENCE_CONFIG["path"])
+    if not session_file.exists():
+        return None
+
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(
+        loop.run_in_executor(
+            _get_deep_pool(),
+            deep_inspect,
+            str(session_file),
+            SESSION_TTL_CONFIG["idle_ttl_seconds"],
+        ),
+        timeout=SESSION_MONITOR_CONFIG["deep_inspect_timeout"],
+    )
+
+
+def shutdown_monitor():
+    """إغلاق process الفحص العميق (عند إيقاف البوت)"""
+    global _deep_pool
+    if _deep_pool is not None:
+        _deep_pool.shutdown(wait=False, cancel_futures=True)
+        _deep_pool = None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📊 الفحص الدوري
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def _print_deep_report(report: dict):
+    print(f"   🔬 [SESSION-MONITOR] Deep inspection ({report['ms']} ms, worker process):")
+    print(f"      👥 Users: {report['users']} ({report['user_bytes'] / MB:.2f} MB)")
+    print(f"      💤 Idle beyond TTL: {report['idle_users']}")
+    print(f"      🗂️ Buckets: {report['buckets'] or 'none'}")
+    print(f"      💬 Conversations: {report['conversations'] or 'none'}")
+    for item in report["largest"]:
+        print(f"      📦 User {item['user_id']}: {item['bytes'] / 1024:.1f} KB")
+    if report["decode_errors"]:
+        print(f"      ❌ Undecodable sessions: {report['decode_errors']}")
 
 
 async def session_health_check(context):
@@ -29,19 +258,23 @@ async def session_health_check(context):
     فحص صحة ملف الجلسات
 
     يقوم بـ:
-    1. التحقق من وجود الملف
+    1. قراءة الملف الجانبي (بدون فتح قاعدة الجلسات)
     2. فحص حجم الملف
-    3. تقدير عدد الجلسات النشطة
-    4. طباعة تقرير في الـ logs
+    3. عدد الجلسات النشطة وآخر flush
+    4. معدل النمو وتوقع تجاوز الحدود
+    5. فحص عميق في process منفصل (كل deep_inspect_every فحوصات)
 
     Args:
         context: telegram.ext.ContextTypes.DEFAULT_TYPE
     """
+    global _checks
+    _checks += 1
+
     print(f"\n{'='*80}")
     print(f"📊 [SESSION-MONITOR] Health check started...")
     print(f"{'='*80}")
 
-    session_file = Path("data/sessions.pkl")
+    session_file = Path(PERSISTENCE_CONFIG["path"])
 
     # فحص 1: وجود الملف
     if not session_file.exists():
@@ -50,48 +283,71 @@ async def session_health_check(context):
         print(f"{'='*80}\n")
         return
 
+    meta = read_sidecar()
+    if meta is None:
+        print(f"   ⚠️ [SESSION-MONITOR] Sidecar not found - waiting for first flush")
+
     # فحص 2: حجم الملف
     try:
-        size_bytes = session_file.stat().st_size
-        size_mb = size_bytes / (1024 * 1024)
-
+        size_mb = _session_file_size(session_file) / MB
         print(f"   📁 [SESSION-MONITOR] File size: {size_mb:.2f} MB")
 
-        if size_mb > 50:
-            print(f"   ⚠️ [SESSION-MONITOR] WARNING: Large session file!")
-            print(f"   💡 Consider clearing old sessions or optimizing")
-        elif size_mb > 100:
+        if size_mb > SESSION_MONITOR_CONFIG["critical_mb"]:
             print(f"   🚨 [SESSION-MONITOR] CRITICAL: Very large session file!")
             print(f"   🔧 Immediate action required")
+        elif size_mb > SESSION_MONITOR_CONFIG["warning_mb"]:
+            print(f"   ⚠️ [SESSION-MONITOR] WARNING: Large session file!")
+            print(f"   💡 Consider clearing old sessions or optimizing")
     except Exception as e:
         print(f"   ❌ [SESSION-MONITOR] Error checking file size: {e}")
 
-    # فحص 3: محتوى الملف
-    try:
-        with open(session_file, "rb") as f:
-            data = pickle.load(f)
+    # فحص 3: الأعداد من الملف الجانبي
+    if meta is not None:
+        tables = meta.get("tables", {})
+        user_count = tables.get("user_data", {}).get("rows", 0)
+        chat_count = tables.get("chat_data", {}).get("rows", 0)
+        conversation_count = tables.get("conversations", {}).get("rows", 0)
+
+        print(f"   👥 [SESSION-MONITOR] Active users: {user_count}")
+        print(f"   💬 [SESSION-MONITOR] Active chats: {chat_count}")
+        print(f"   🔄 [SESSION-MONITOR] Conversation states: {conversation_count}")
+        print(f"   🤖 [SESSION-MONITOR] Bot data: {'Yes' if tables.get('bot_state', {}).get('rows') else 'No'}")
+
+        last_flush = meta.get("last_flush")
+        if last_flush:
+            age = time.time() - last_flush["at"]
+            print(
+                f"   💾 [SESSION-MONITOR] Last flush: {age:.0f}s ago "
+                f"({last_flush['rows']} rows, {last_flush['ms']} ms)"
+            )
 
-        # تقدير عدد الجلسات
-        if isinstance(data, dict):
-            user_count = len(data.get("user_data", {}))
-            chat_count = len(data.get("chat_data", {}))
-            bot_data_exists = "bot_data" in data
+        # تحذير إذا كان العدد كبير جداً
+        if user_count > SESSION_MONITOR_CONFIG["max_users"]:
+            print(f"   ⚠️ [SESSION-MONITOR] Very high user count!")
 
-            print(f"   👥 [SESSION-MONITOR] Active users: {user_count}")
-            print(f"   💬 [SESSION-MONITOR] Active chats: {chat_count}")
+        # فحص 4: النمو
+        growth = project_growth(meta)
+        if growth["bytes_per_hour"] is not None:
             print(
-                f"   🤖 [SESSION-MONITOR] Bot data: {'Yes' if bot_data_exists else 'No'}"
+                f"   📈 [SESSION-MONITOR] Growth: {growth['bytes_per_hour'] / 1024:+.1f} KB/h, "
+                f"{growth['users_per_hour']:+.1f} users/h ({growth['samples']} samples)"
             )
-
-            # تحذير إذا كان العدد كبير جداً
-            if user_count > 10000:
-                print(f"   ⚠️ [SESSION-MONITOR] Very high user count!")
+            print(f"   ⏳ [SESSION-MONITOR] Warning size in: {_format_eta(growth['hours_to_warning'])}")
+            print(f"   ⏳ [SESSION-MONITOR] Critical size in: {_format_eta(growth['hours_to_critical'])}")
+            print(f"   ⏳ [SESSION-MONITOR] Max users in: {_format_eta(growth['hours_to_max_users'])}")
         else:
-            print(f"   ⚠️ [SESSION-MONITOR] Unexpected data format")
-
-    except Exception as e:
-        print(f"   ❌ [SESSION-MONITOR] Error reading session data: {e}")
-        print(f"   💡 File might be corrupted or locked")
+            print(f"   📈 [SESSION-MONITOR] Growth: not enough samples yet")
+
+    # فحص 5: الفحص العميق (أو إذا لم يوجد ملف جانبي)
+    every = SESSION_MONITOR_CONFIG["deep_inspect_every"]
+    if meta is None or (every and _checks % every == 0):
+        try:
+            report = await run_deep_inspection()
+            if report:
+                _print_deep_report(report)
+        except Exception as e:
+            print(f"   ❌ [SESSION-MONITOR] Deep inspection failed: {e}")
+            print(f"   💡 File might be corrupted or locked")
 
     print(f"{'='*80}")
     print(f"✅ [SESSION-MONITOR] Health check completed")
@@ -102,22 +358,22 @@ def register_monitoring(app):
     """
     تسجيل وظيفة المراقبة في الجدول الزمني
 
-    يقوم بتسجيل فحص صحة كل 6 ساعات
+    يقوم بتسجيل فحص صحة كل 6 ساعات (SESSION_MONITOR_CONFIG)
 
     Args:
         app: telegram.ext.Application
     """
     print("\n📊 [SESSION-MONITOR] Registering monitoring jobs...")
 
-    # فحص صحة كل 6 ساعات
+    interval = SESSION_MONITOR_CONFIG["interval_seconds"]
     app.job_queue.run_repeating(
         session_health_check,
-        interval=21600,  # 6 ساعات بالثواني
-        first=60,  # أول فحص بعد دقيقة من البدء
+        interval=interval,
+        first=SESSION_MONITOR_CONFIG["first_check_seconds"],
         name="session_monitoring",
     )
-    print("   ✅ Health check scheduled: Every 6 hours")
-    print("   ✅ First check: 1 minute after start")
+    print(f"   ✅ Health check scheduled: Every {interval / 3600:g} hours")
+    print(f"   ✅ First check: {SESSION_MONITOR_CONFIG['first_check_seconds']} seconds after start")
 
     print("📊 [SESSION-MONITOR] Monitoring jobs registered successfully\n")
 
@@ -129,12 +385,12 @@ def register_monitoring(app):
 
 def get_session_stats() -> dict:
     """
-    الحصول على إحصائيات الجلسات
+    الحصول على إحصائيات الجلسات (من الملف الجانبي فقط)
 
     Returns:
         dict: إحصائيات مفصلة
     """
-    session_file = Path("data/sessions.pkl")
+    session_file = Path(PERSISTENCE_CONFIG["path"])
 
     if not session_file.exists():
         return {
@@ -146,33 +402,32 @@ def get_session_stats() -> dict:
 
     stats = {
         "exists": True,
-        "size_mb": round(session_file.stat().st_size / (1024 * 1024), 2),
+        "size_mb": round(_session_file_size(session_file) / MB, 2),
     }
 
-    try:
-        with open(session_file, "rb") as f:
-            data = pickle.load(f)
-
-        if isinstance(data, dict):
-            stats["user_count"] = len(data.get("user_data", {}))
-            stats["chat_count"] = len(data.get("chat_data", {}))
-            stats["has_bot_data"] = "bot_data" in data
-        else:
-            stats["user_count"] = 0
-            stats["chat_count"] = 0
-            stats["has_bot_data"] = False
-
-    except:
+    meta = read_sidecar()
+    if meta is None:
         stats["user_count"] = 0
         stats["chat_count"] = 0
         stats["error"] = True
-
+        return stats
+
+    tables = meta.get("tables", {})
+    stats["user_count"] = tables.get("user_data", {}).get("rows", 0)
+    stats["chat_count"] = tables.get("chat_data", {}).get("rows", 0)
+    stats["conversation_count"] = tables.get("conversations", {}).get("rows", 0)
+    stats["has_bot_data"] = bool(tables.get("bot_state", {}).get("rows"))
+    stats["last_flush"] = meta.get("last_flush")
+    stats["growth"] = project_growth(meta)
     return stats
 
 
-def print_session_report():
+def print_session_report(deep: bool = False):
     """
     طباعة تقرير مفصل عن الجلسات (للاستخدام اليدوي)
+
+    Args:
+        deep: قراءة كل الصفوف أيضاً (في process منفصل)
     """
     stats = get_session_stats()
 
@@ -183,13 +438,33 @@ def print_session_report():
     if not stats["exists"]:
         print("❌ No session file found")
     else:
-        print(f"✅ File exists: data/sessions.pkl")
+        print(f"✅ File exists: {PERSISTENCE_CONFIG['path']}")
         print(f"📁 Size: {stats['size_mb']} MB")
         print(f"👥 Users: {stats.get('user_count', 'N/A')}")
         print(f"💬 Chats: {stats.get('chat_count', 'N/A')}")
         print(f"🤖 Bot Data: {'Yes' if stats.get('has_bot_data') else 'No'}")
 
+        growth = stats.get("growth")
+        if growth and growth["bytes_per_hour"] is not None:
+            print(f"📈 Growth: {growth['bytes_per_hour'] / 1024:+.1f} KB/h")
+            print(f"⏳ Critical size in: {_format_eta(growth['hours_to_critical'])}")
+
         if stats.get("error"):
-            print("⚠️ Warning: Could not read session data")
+            print("⚠️ Warning: Sidecar not found (no flush yet)")
+
+        if deep:
+            async def _run():
+                try:
+                    return await run_deep_inspection()
+                finally:
+                    shutdown_monitor()
+
+            report = asyncio.run(_run())
+            if report:
+                _print_deep_report(report)
 
     print("=" * 80 + "\n")
+
+
+if __name__ == "__main__":
+    print_session_report(deep=True)
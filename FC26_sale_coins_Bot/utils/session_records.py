@@ -0,0 +1,355 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║                    🧱 TYPED SESSION BUCKET RECORDS                       ║
+# ║               سجلات مضغوطة لمساحات العمل (reg / sell / admin)            ║
+# ║            __slots__ في الذاكرة + tuple بسيط في الـ persistence          ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+🧱 سجلات مساحات العمل المضغوطة
+
+المشكلة:
+---------
+كل مساحة عمل كانت dict عادي، يُحفظ لكل مستخدم مع أسماء المفاتيح كاملة
+('interrupted_whatsapp', 'current_price' ...) بالإضافة لقاموس أوقات
+الاستخدام (_bucket_touched). مع عشرات الآلاف من المستخدمين هذا يعني
+ذاكرة وملف جلسات أكبر بكثير من البيانات نفسها.
+
+الحل:
+-----
+✅ كلاس لكل خدمة معروفة (RegBucket, SellBucket, AdminBucket) بحقول __slots__
+✅ نفس واجهة الـ dict (get, [], pop, update, in, bool ...) - الـ handlers لا تتغير
+✅ مفاتيح غير معروفة تُحفظ في dict إضافي (_extra) - لا شيء يضيع
+✅ وقت آخر استخدام داخل السجل نفسه (بدل _bucket_touched)
+✅ __reduce__ يرجع tuple بسيط والـ pickle يكتب القيم بنفسه (كود C)
+   → الـ pickle يكتب 2 بايت (copyreg extension code) بدل اسم الدالة الكامل
+
+صيغة الحفظ:
+-----------
+_rebuild(kind, touched, mask, values, extra)
+
+- mask: بت لكل حقل موجود بترتيب FIELDS، و values قيم هذه الحقول فقط
+
+⚠️ FIELDS جزء من الصيغة: الإضافة في النهاية فقط.
+
+⚠️ المقايضة: الهدف الأصلي كان حفظاً/تحميلاً أسرع، وهذا لم يتحقق.
+السجلات أبطأ من الـ dict بحوالي 2-3 مرات في الحفظ وحوالي مرتين في التحميل
+(استدعاء __reduce__ / _rebuild بـ Python لكل سجل بدل كود C بالكامل).
+المقابل: ذاكرة أقل بحوالي الثلث وملف جلسات أصغر بحوالي 40% (100 ألف مستخدم).
+
+تشغيل القياس:
+    python -m utils.session_records
+"""
+
+import copyreg
+import pickle
+import time
+from collections.abc import MutableMapping
+from typing import Dict, Tuple
+
+# رقم الامتداد في copyreg (240-255 مخصصة للاستخدام الخاص حسب PEP 307)
+EXTENSION_CODE = 241
+
+# علامة "الحقل غير معيّن" داخل الكود فقط (لا تُحفظ)
+_UNSET = object()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧱 السجلات
+# ═══════════════════════════════════════════════════════════════════════════
+
+class BucketRecord(MutableMapping):
+    """
+    سجل مساحة عمل بحقول ثابتة (__slots__) وواجهة dict
+
+    الحقل غير المعيّن = المفتاح غير موجود (نفس سلوك الـ dict).
+    """
+
+    __slots__ = ("touched", "_extra")
+
+    KIND = 0
+    FIELDS: Tuple[str, ...] = ()
+    _FIELD_SET = frozenset()
+
+    def __init__(self, data=None, **kwargs):
+        self.touched = 0.0
+        self._extra = None
+        if data:
+            self.update(data)
+        if kwargs:
+            self.update(kwargs)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    # ─── واجهة الـ dict ───
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        else:
+            if self._extra is None:
+                raise KeyError(key)
+            del self._extra[key]
+            if not self._extra:
+                self._extra = None
+
+    def __iter__(self):
+        for name in self.FIELDS:
+            if hasattr(self, name):
+                yield name
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self):
+        count = sum(1 for name in self.FIELDS if hasattr(self, name))
+        return count + (len(self._extra) if self._extra else 0)
+
+    def __contains__(self, key):
+        if key in self._FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def get(self, key, default=None):
+        if key in self._FIELD_SET:
+            return getattr(self, key, default)
+        if self._extra is None:
+            return default
+        return self._extra.get(key, default)
+
+    def clear(self):
+        for name in self.FIELDS:
+            if hasattr(self, name):
+                delattr(self, name)
+        self._extra = None
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    # ─── الحفظ ───
+
+    def __reduce__(self):
+        mask = 0
+        bit = 1
+        values = []
+        for name in self.FIELDS:
+            value = getattr(self, name, _UNSET)
+            if value is not _UNSET:
+                mask |= bit
+                values.append(value)
+            bit <<= 1
+        return _rebuild, (self.KIND, self.touched, mask, tuple(values), self._extra)
+
+    def __reduce_ex__(self, protocol):
+        # تجاوز object.__reduce_ex__ (أبطأ) - نفس النتيجة لكل البروتوكولات
+        return self.__reduce__()
+
+
+class RegBucket(BucketRecord):
+    """مساحة التسجيل (handlers/registration)"""
+
+    KIND = 1
+    FIELDS = (
+        "platform", "whatsapp", "payment_method",
+        "interrupted_platform", "interrupted_whatsapp",
+        "interrupted_payment", "interrupted_step",
+    )
+    __slots__ = FIELDS
+
+
+class SellBucket(BucketRecord):
+    """مساحة بيع الكوينز (services/sell_coins)"""
+
+    KIND = 2
+    FIELDS = ("platform", "type", "amount")
+    __slots__ = FIELDS
+
+
+class AdminBucket(BucketRecord):
+    """مساحة لوحة الأدمن (services/admin)"""
+
+    KIND = 3
+    FIELDS = ("platform", "type", "current_price")
+    __slots__ = FIELDS
+
+
+_KINDS: Dict[int, type] = {cls.KIND: cls for cls in (RegBucket, SellBucket, AdminBucket)}
+
+# اسم المساحة → نوع السجل (المساحات غير المعروفة تبقى dict عادي)
+RECORD_TYPES: Dict[str, type] = {
+    "reg": RegBucket,
+    "sell": SellBucket,
+    "admin": AdminBucket,
+}
+
+
+def _rebuild(kind: int, touched: float, mask: int, values: tuple, extra) -> BucketRecord:
+    """دالة إعادة بناء السجل التي يستدعيها pickle"""
+    cls = _KINDS[kind]
+    record = cls.__new__(cls)
+    record.touched = touched
+    record._extra = extra
+    values = iter(values)
+    for name in cls.FIELDS:
+        if not mask:
+            break
+        if mask & 1:
+            setattr(record, name, next(values))
+        mask >>= 1
+    return record
+
+
+def new_bucket(name: str, data=None):
+    """
+    إنشاء مساحة جديدة (سجل مضغوط للخدمات المعروفة، dict لغيرها)
+
+    Args:
+        name: اسم المساحة
+        data: بيانات موجودة (مثلاً dict قديم من الجلسات) لنقلها للسجل
+    """
+    record_type = RECORD_TYPES.get(name)
+    if record_type is None:
+        return dict(data) if data else {}
+    return record_type(data)
+
+
+# الـ pickle يكتب EXT1 241 بدل "utils.session_records _rebuild" في كل جلسة.
+# التسجيل فقط عند الاستيراد كوحدة (وليس عند التشغيل المباشر كـ __main__)
+if __name__ == "utils.session_records":
+    copyreg.add_extension(__name__, "_rebuild", EXTENSION_CODE)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📊 BENCHMARK (للتطوير فقط)
+# ═══════════════════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    import random
+    import tracemalloc
+
+    # استخدام الوحدة المستوردة حتى يعمل رقم الامتداد كما في البوت
+    from utils.session_records import new_bucket as make_bucket, RegBucket as Reg
+
+    USERS = 100_000
+    random.seed(26)
+
+    # اختبار سريع للواجهة والترميز
+    record = Reg(platform="pc", whatsapp="01012345678")
+    record["interrupted_step"] = "choosing_payment"
+    record["note"] = ["custom", 1]
+    record.touched = time.time()
+    clone = pickle.loads(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+    assert clone == record.to_dict() and type(clone) is Reg
+    assert int(clone.touched) == int(record.touched)
+    assert record.pop("note") == ["custom", 1] and "note" not in record
+    assert record.get("payment_method") is None and "payment_method" not in record
+    del record["whatsapp"]
+    assert list(record) == ["platform", "interrupted_step"]
+    record.clear()
+    assert not record
+    print("✅ Record API & round trip OK\n")
+
+    def synthetic_buckets(i: int):
+        """بيانات تشبه الجلسات الحقيقية: تسجيل غير مكتمل، بيع، أدمن"""
+        now = time.time() - random.randint(0, 6 * 3600)
+        platform = random.choice(("playstation", "xbox", "pc"))
+        roll = i % 10
+        if roll < 6:
+            data = {
+                "reg": {
+                    "platform": platform,
+                    "whatsapp": f"010{random.randint(10_000_000, 99_999_999)}",
+                    "payment_method": random.choice(("vodafone_cash", "instapay", "telda")),
+                }
+            }
+            if roll == 0:
+                data["reg"].update(
+                    interrupted_platform=platform,
+                    interrupted_whatsapp=data["reg"]["whatsapp"],
+                    interrupted_payment=None,
+                    interrupted_step="entering_whatsapp",
+                )
+        elif roll < 9:
+            data = {"sell": {"platform": platform,
+                             "type": random.choice(("normal", "instant")),
+                             "amount": random.randint(100, 20_000) * 1000}}
+        else:
+            data = {"admin": {"platform": platform, "type": "normal",
+                              "current_price": random.randint(1000, 9000)}}
+        return data, now
+
+    samples = [synthetic_buckets(i) for i in range(USERS)]
+
+    def build_dicts():
+        sessions = {}
+        for user_id, (data, now) in enumerate(samples):
+            sessions[user_id] = {
+                "_buckets": {name: dict(values) for name, values in data.items()},
+                "_bucket_touched": {name: now for name in data},
+            }
+        return sessions
+
+    def build_records():
+        sessions = {}
+        for user_id, (data, now) in enumerate(samples):
+            buckets = {}
+            for name, values in data.items():
+                buckets[name] = make_bucket(name, values)
+                buckets[name].touched = now
+            sessions[user_id] = {"_buckets": buckets}
+        return sessions
+
+    def measure(label, build):
+        tracemalloc.start()
+        sessions = build()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # SQLitePersistence يحفظ كل مستخدم كـ pickle مستقل
+        start = time.perf_counter()
+        blobs = [pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL) for data in sessions.values()]
+        dump_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for blob in blobs:
+            pickle.loads(blob)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        size = sum(len(blob) for blob in blobs)
+        print(f"📊 {label}")
+        print(f"   Memory:     {memory / 1024 / 1024:8.1f} MB  ({memory / USERS:6.0f} B/user)")
+        print(f"   Persisted:  {size / 1024 / 1024:8.1f} MB  ({size / USERS:6.0f} B/user)")
+        print(f"   Dump/Load:  {dump_ms:8.0f} ms / {load_ms:.0f} ms\n")
+        return memory, size, dump_ms, load_ms
+
+    print(f"🧪 Synthetic session set: {USERS:,} users\n")
+    dict_memory, dict_size, dict_dump, dict_load = measure("dict buckets + _bucket_touched", build_dicts)
+    record_memory, record_size, record_dump, record_load = measure("__slots__ records", build_records)
+
+    print(f"✅ Memory:    -{(1 - record_memory / dict_memory) * 100:.0f}%")
+    print(f"✅ Persisted: -{(1 - record_size / dict_size) * 100:.0f}%")
+    print(f"⚠️ Dump/Load: x{record_dump / dict_dump:.1f} / x{record_load / dict_load:.1f} (مقارنة بالـ dict)")
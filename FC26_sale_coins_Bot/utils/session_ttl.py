@@ -0,0 +1,153 @@
+# ╔══════════════════════════════════════════════════════════════════════════╗
+# ║                    ⏳ SESSION TTL SWEEPER                                ║
+# ║                  حذف الجلسات المهجورة تلقائياً                          ║
+# ║            مساحات العمل وحالات المحادثات التي لم تُستخدم منذ مدة        ║
+# ╚══════════════════════════════════════════════════════════════════════════╝
+
+"""
+⏳ حذف الجلسات المهجورة (TTL)
+
+الهدف:
+-------
+المستخدم الذي يبدأ /sell أو /admin أو التسجيل ثم يختفي يترك بيانات
+في user_data وحالة محادثة محفوظة للأبد. هذا النظام يحذفها بعد مدة
+خمول محددة حتى يبقى حجم الذاكرة وملف الجلسات محدوداً.
+
+الميزات:
+--------
+✅ وقت آخر استخدام لكل مساحة عمل (يسجله bucket())
+✅ وقت آخر نشاط لكل مستخدم (handler في group -100 يسجله مع كل تحديث)
+✅ فحص دوري عبر JobQueue يحذف المساحات المنتهية
+✅ حالات المحادثات: conversation_timeout في كل ConversationHandler (نفس المدة)
+   + SQLitePersistence(conversation_ttl) للحالات المحفوظة قبل إعادة التشغيل
+✅ تقرير بعدد البايتات المحررة
+"""
+
+import pickle
+import time
+from typing import Dict
+
+from telegram import Update
+from telegram.ext import TypeHandler
+
+from config import SESSION_TTL_CONFIG
+from utils.session_bucket import TOUCHED_KEY, remove_bucket
+
+# آخر نشاط لكل مستخدم (في الذاكرة فقط - بعد إعادة التشغيل يبدأ العد من جديد)
+_last_seen: Dict[int, float] = {}
+
+# إحصائيات آخر فحص وإجمالي ما تم تحريره
+_stats = {
+    "sweeps": 0,
+    "buckets_removed": 0,
+    "users_dropped": 0,
+    "bytes_reclaimed": 0,
+    "last_sweep": None,
+}
+
+
+def _size(obj) -> int:
+    """الحجم التقريبي بعد الـ pickle (نفس ما يُكتب في ملف الجلسات)"""
+    try:
+        return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+async def touch_activity(update: Update, context) -> None:
+    """تسجيل نشاط المستخدم مع كل تحديث (لا يوقف باقي الـ handlers)"""
+    if update.effective_user:
+        _last_seen[update.effective_user.id] = time.time()
+
+
+def _sweep_buckets(application, cutoff: float, report: dict):
+    """حذف المساحات التي لم تُستخدم منذ cutoff"""
+    changed_users = set()
+
+    for user_id, user_data in list(application.user_data.items()):
+        touched = user_data.get(TOUCHED_KEY, {})
+        buckets = user_data.get("_buckets", {})
+
+        for name in list(buckets.keys() | touched.keys()):
+            # السجلات المضغوطة تحفظ وقتها بداخلها، والمساحات الأخرى في _bucket_touched.
+            # مساحة بدون وقت مسجل (بيانات قديمة) تأخذ آخر نشاط للمستخدم
+            last = (getattr(buckets.get(name), "touched", None) or touched.get(name)
+                    or _last_seen.setdefault(user_id, time.time()))
+            if last < cutoff:
+                report["bytes"] += _size(buckets.get(name, {})) + _size(name)
+                remove_bucket(user_data, name)
+                report["buckets"] += 1
+                changed_users.add(user_id)
+
+        # مستخدم لم يبق له أي بيانات - حذفه من الجلسات نهائياً
+        if not user_data:
+            application.drop_user_data(user_id)
+            changed_users.discard(user_id)
+            report["users"] += 1
+
+    if changed_users:
+        application.mark_data_for_update_persistence(user_ids=changed_users)
+
+
+async def session_ttl_sweep(context):
+    """
+    فحص دوري: حذف المساحات المنتهية
+
+    Args:
+        context: telegram.ext.ContextTypes.DEFAULT_TYPE
+    """
+    application = context.application
+    ttl = SESSION_TTL_CONFIG["idle_ttl_seconds"]
+    cutoff = time.time() - ttl
+    start = time.perf_counter()
+
+    print(f"\n⏳ [SESSION-TTL] Sweep started (idle TTL: {ttl // 60} min)...")
+
+    report = {"buckets": 0, "users": 0, "bytes": 0}
+    _sweep_buckets(application, cutoff, report)
+
+    # تنظيف سجل النشاط نفسه من المستخدمين الخاملين
+    for user_id, last in list(_last_seen.items()):
+        if last < cutoff:
+            del _last_seen[user_id]
+
+    _stats["sweeps"] += 1
+    _stats["buckets_removed"] += report["buckets"]
+    _stats["users_dropped"] += report["users"]
+    _stats["bytes_reclaimed"] += report["bytes"]
+    _stats["last_sweep"] = dict(report, ms=round((time.perf_counter() - start) * 1000, 2))
+
+    print(
+        f"   ✅ [SESSION-TTL] Removed {report['buckets']} buckets, "
+        f"{report['users']} empty users"
+    )
+    print(f"   💾 [SESSION-TTL] Reclaimed ~{report['bytes'] / 1024:.1f} KB")
+
+
+def get_ttl_stats() -> dict:
+    """إحصائيات الحذف (إجمالي + آخر فحص)"""
+    return dict(_stats, tracked_users=len(_last_seen))
+
+
+def register_session_ttl(app):
+    """
+    تسجيل تتبع النشاط والفحص الدوري
+
+    Args:
+        app: telegram.ext.Application
+    """
+    print("\n⏳ [SESSION-TTL] Registering idle session eviction...")
+
+    # group -100: يعمل قبل كل الـ handlers ولا يمنعها
+    app.add_handler(TypeHandler(Update, touch_activity), group=-100)
+    print("   ✅ Activity tracker registered (group -100)")
+
+    interval = SESSION_TTL_CONFIG["sweep_interval_seconds"]
+    app.job_queue.run_repeating(
+        session_ttl_sweep,
+        interval=interval,
+        first=interval,
+        name="session_ttl_sweep",
+    )
+    print(f"   ✅ Sweep scheduled: every {interval // 60} min")
+    print(f"   ⏱️ Idle TTL: {SESSION_TTL_CONFIG['idle_ttl_seconds'] // 60} min\n")